@@ -56,6 +56,12 @@ from context_enhancement import (
 
 # Import RAG system
 from rag_system import get_rag_system, cleanup_rag_system
+# Camera frames for crop diagnosis
+from frame_sampler import attach_frame_sampler
+# Farm profiles from the web client's My Farm page
+from farm_profile import attach_farm_client
+# Per-call context store shared across tools
+from session_context import SessionContext
 load_dotenv()
 
 
@@ -116,8 +122,10 @@ class Assistant(Agent):
 
 
 async def entrypoint(ctx: agents.JobContext):
+    # Farm profile, location, weather and retrieval results shared by the tools of this call
+    session_context = SessionContext()
     session = AgentSession(
-        
+        userdata=session_context,
     )
 
     await session.start(
@@ -134,6 +142,12 @@ async def entrypoint(ctx: agents.JobContext):
 
     await ctx.connect()
 
+    # Farm data replies arrive over the data channel
+    session_context.farm_client = attach_farm_client(ctx.room)
+
+    # Sample the farmer's camera so diagnose_crop_disease can use what it shows
+    attach_frame_sampler(ctx.room, session_context)
+
     await session.generate_reply(
         instructions=SESSION_INSTRUCTION,
     )
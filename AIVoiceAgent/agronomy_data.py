@@ -0,0 +1,143 @@
+"""
+Agronomy Reference Data for AI Farm Care Assistant
+Loads the versioned agronomic reference tables (water needs, NPK requirements,
+pests, crop families, calendars, equipment, schemes, disease symptoms and
+reference cities) once into immutable, indexed structures so tools answer with
+keyed lookups instead of rebuilding them
+"""
+
+import json
+import logging
+import math
+import os
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "utils", "agronomy_data.json")
+
+# Tables the tools depend on; a data file missing any of them is rejected at load
+REQUIRED_TABLES = (
+    "crop_water_needs", "soil_water_factors", "fertilizer_needs", "soil_nutrient_factors",
+    "crop_pests", "pest_control_methods", "crop_families", "family_benefits",
+    "maturity_days", "yield_per_acre", "seasonal_activities", "crop_calendar",
+    "soil_crop_recommendations", "equipment_by_size", "equipment_costs",
+    "government_schemes", "schemes_by_goal", "symptom_terms", "crop_conditions",
+    "reference_cities",
+)
+
+EARTH_RADIUS_KM = 6371.0
+# Farther than this from every reference city, a farm gets no named location
+MAX_CITY_DISTANCE_KM = 250.0
+
+EMPTY = MappingProxyType({})
+
+
+def freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class AgronomyData:
+    """Immutable registry of agronomic reference tables"""
+
+    def __init__(self, data: Dict[str, Any], source: Optional[str] = None):
+        tables = data.get("tables") or {}
+        missing = [name for name in REQUIRED_TABLES if name not in tables]
+        if missing:
+            raise ValueError(f"Agronomy data {source or ''} is missing tables: {', '.join(missing)}")
+
+        self.version = str(data.get("version", "unversioned"))
+        self.source = source
+        self.tables: Mapping[str, Mapping] = freeze(tables)
+        self.defaults: Mapping[str, Any] = freeze(data.get("defaults") or {})
+
+        # Inverted index so a crop's family is one lookup instead of a scan of every family
+        self.crop_family_index: Mapping[str, str] = MappingProxyType({
+            crop: family
+            for family, crops in self.tables["crop_families"].items()
+            for crop in crops
+        })
+
+        logger.info(f"Agronomy data v{self.version} loaded ({len(self.tables)} tables)")
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_DATA_PATH) -> "AgronomyData":
+        """Load a versioned data file such as utils/agronomy_data.json"""
+        with open(path, encoding="utf-8") as handle:
+            return cls(json.load(handle), source=path)
+
+    def table(self, name: str) -> Mapping:
+        """Read-only view of a whole table"""
+        return self.tables[name]
+
+    def lookup(self, table: str, key: str, default: Any = None) -> Any:
+        """Entry of a table, or default when the key is unknown"""
+        return self.tables[table].get(key, default)
+
+    def water_needs(self, crop: str) -> Mapping[str, float]:
+        """Seasonal water needs (liters per day per acre) of a crop"""
+        return self.lookup("crop_water_needs", crop.lower(), self.defaults.get("water_needs", EMPTY))
+
+    def soil_water_factor(self, soil_type: str) -> float:
+        """Irrigation multiplier for a soil type"""
+        return self.lookup("soil_water_factors", soil_type.lower(), self.defaults.get("soil_water_factor", 1.0))
+
+    def npk(self, crop: str, growth_stage: str) -> Mapping[str, float]:
+        """NPK needs (kg per acre) of a crop at a growth stage"""
+        stages = self.lookup("fertilizer_needs", crop.lower(), EMPTY)
+        return stages.get(growth_stage, self.defaults.get("npk", EMPTY))
+
+    def soil_nutrient_factors(self, soil_type: str) -> Mapping[str, float]:
+        """NPK multipliers for a soil type"""
+        return self.lookup("soil_nutrient_factors", soil_type.lower(), self.defaults.get("soil_nutrient_factors", EMPTY))
+
+    def crop_family(self, crop: str) -> Optional[str]:
+        """Botanical family used for rotation planning, or None if unknown"""
+        return self.crop_family_index.get(crop.lower())
+
+    def maturity_days(self, crop: str) -> int:
+        """Days from planting to harvest"""
+        return self.lookup("maturity_days", crop.lower(), self.defaults.get("maturity_days", 100))
+
+    def yield_per_acre(self, crop: str) -> float:
+        """Typical yield in kg per acre"""
+        return self.lookup("yield_per_acre", crop.lower(), self.defaults.get("yield_per_acre", 2000))
+
+    def equipment_cost(self, equipment: str, default: Optional[float] = None) -> float:
+        """Equipment price in INR lakhs"""
+        if default is None:
+            default = self.defaults.get("equipment_cost", 1.0)
+        return self.lookup("equipment_costs", equipment, default)
+
+    def nearest_city(self, latitude: float, longitude: float,
+                     max_distance_km: float = MAX_CITY_DISTANCE_KM) -> Optional[Mapping[str, Any]]:
+        """Closest reference city (with its state) to a point, or None if none is near"""
+        best, best_distance = None, max_distance_km
+        for city in self.tables["reference_cities"].values():
+            # Haversine distance
+            d_lat = math.radians(city["latitude"] - latitude)
+            d_lng = math.radians(city["longitude"] - longitude)
+            a = (math.sin(d_lat / 2) ** 2 + math.cos(math.radians(latitude))
+                 * math.cos(math.radians(city["latitude"])) * math.sin(d_lng / 2) ** 2)
+            distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+            if distance <= best_distance:
+                best, best_distance = city, distance
+        return best
+
+
+# Global registry instance
+agronomy_data = None
+
+def get_agronomy_data() -> AgronomyData:
+    """Get or create the global agronomy data registry"""
+    global agronomy_data
+    if agronomy_data is None:
+        agronomy_data = AgronomyData.load(os.getenv("AGRONOMY_DATA_PATH") or DEFAULT_DATA_PATH)
+    return agronomy_data
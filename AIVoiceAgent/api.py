@@ -5,6 +5,13 @@ from livekit import api
 import os
 from dotenv import load_dotenv
 import uuid
+import asyncio
+from typing import List, Optional
+
+import numpy as np
+
+from crop_recommender import get_crop_engine, current_season
+from soil_service import get_soil_service, SOIL_PROPERTIES
 
 load_dotenv()
 
@@ -102,6 +109,65 @@ async def create_token(request: TokenRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class FarmInput(BaseModel):
+    farm_id: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    season: Optional[str] = None
+
+class CropRecommendationRequest(BaseModel):
+    farms: List[FarmInput]
+    top_k: int = 3
+    max_investment: Optional[float] = None
+    farming_type: Optional[str] = None
+    min_roi: Optional[float] = None
+
+# Batch scoring for the web app's crop recommendations page
+@app.post("/crop-recommendations")
+async def recommend_crops(request: CropRecommendationRequest):
+    try:
+        soil_service = get_soil_service()
+        located = [farm for farm in request.farms if farm.latitude is not None and farm.longitude is not None]
+        # SoilService caps the SoilGrids requests in flight, so large batches queue instead of flooding it
+        soil_results = await asyncio.gather(*[
+            soil_service.get_soil_profile(farm.latitude, farm.longitude) for farm in located
+        ])
+        profiles = {
+            farm.farm_id: result["profile"]
+            for farm, result in zip(located, soil_results) if result["success"]
+        }
+
+        soil_vectors = np.full((len(request.farms), len(SOIL_PROPERTIES)), np.nan, dtype=np.float32)
+        for row, farm in enumerate(request.farms):
+            if farm.farm_id in profiles:
+                soil_vectors[row] = profiles[farm.farm_id].to_vector()
+
+        season = current_season()
+        results = get_crop_engine().recommend_batch(
+            soil_vectors,
+            [farm.season or season for farm in request.farms],
+            top_k=request.top_k,
+            max_investment=request.max_investment,
+            farming_type=request.farming_type,
+            min_roi=request.min_roi
+        )
+
+        return {
+            "results": [
+                {
+                    "farm_id": farm.farm_id,
+                    "soil_profile": profiles[farm.farm_id].to_dict() if farm.farm_id in profiles else None,
+                    # Without soil data every crop gets the same soil fit
+                    "ranking_basis": "soil, season and ROI" if farm.farm_id in profiles else "season and ROI only (no soil data)",
+                    "recommendations": recommendations
+                }
+                for farm, recommendations in zip(request.farms, results)
+            ]
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the FastAPI server!"}
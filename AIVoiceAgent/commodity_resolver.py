@@ -0,0 +1,326 @@
+"""
+Commodity Name Resolver for AI Farm Care Assistant
+Maps spoken commodity names (English, Hindi, transliterations and
+speech-to-text misspellings) to canonical commodity ids used for market lookups.
+Scraped names are only ever matched exactly (canonical_commodity_id); fuzzy
+matching is reserved for spoken queries (resolve_commodity_id)
+"""
+
+import logging
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Canonical commodity id -> (display name, aliases)
+COMMODITY_ALIASES: Dict[str, Tuple[str, List[str]]] = {
+    "wheat": ("Wheat", ["gehun", "gehu", "gehoon", "gahu", "kanak", "godhumai", "गेहूं", "गेहूँ", "गेहू"]),
+    "rice": ("Rice", ["chawal", "chaawal", "chaval", "basmati", "चावल"]),
+    "paddy": ("Paddy", ["dhan", "dhaan", "धान"]),
+    "maize": ("Maize", ["corn", "makka", "makki", "bhutta", "मक्का"]),
+    "soybean": ("Soybean", ["soya", "soyabean", "soy bean", "soybeans", "सोयाबीन"]),
+    "cotton": ("Cotton", ["kapas", "kapaas", "narma", "कपास"]),
+    "sugarcane": ("Sugarcane", ["sugar cane", "ganna", "ganne", "ikh", "गन्ना"]),
+    "onion": ("Onion", ["onions", "pyaz", "pyaaz", "piyaz", "kanda", "kaanda", "प्याज", "प्याज़"]),
+    "tomato": ("Tomato", ["tomatoes", "tamatar", "tamaatar", "tamator", "टमाटर"]),
+    "potato": ("Potato", ["potatoes", "aloo", "alu", "aaloo", "batata", "आलू"]),
+    "groundnut": ("Groundnut", ["peanut", "peanuts", "moongphali", "mungfali", "moongfali", "shengdana", "मूंगफली"]),
+    "turmeric": ("Turmeric", ["haldi", "हल्दी"]),
+    "chilli": ("Chilli", ["chili", "chillies", "chilies", "mirch", "mirchi", "lal mirch", "मिर्च", "मिर्ची"]),
+    "coriander": ("Coriander", ["dhaniya", "dhania", "धनिया"]),
+    "cumin": ("Cumin", ["jeera", "jira", "zeera", "जीरा"]),
+    "mustard": ("Mustard", ["sarson", "sarso", "sarsoon", "rai", "raya", "toria", "rapeseed", "सरसों", "सरसो"]),
+    "gram": ("Gram", ["chana", "channa", "chickpea", "chickpeas", "bengal gram", "चना"]),
+    "tur": ("Tur/Arhar", ["tur arhar", "arhar", "toor", "tuar", "pigeon pea", "red gram", "arhar dal", "tur dal", "अरहर", "तुअर"]),
+    "barley": ("Barley", ["jau", "जौ"]),
+    "bajra": ("Bajra", ["pearl millet", "bajri", "बाजरा"]),
+    "jowar": ("Jowar", ["sorghum", "jwar", "ज्वार"]),
+    "moong": ("Moong", ["green gram", "mung", "moong dal", "मूंग"]),
+    "urad": ("Urad", ["black gram", "urad dal", "उड़द"]),
+    "masoor": ("Masoor", ["lentil", "lentils", "masur", "मसूर"]),
+    "garlic": ("Garlic", ["lahsun", "lehsun", "lasun", "लहसुन"]),
+    "ginger": ("Ginger", ["adrak", "अदरक"]),
+    "banana": ("Banana", ["bananas", "kela", "केला"]),
+    "mango": ("Mango", ["mangoes", "aam", "आम"]),
+    "cauliflower": ("Cauliflower", ["phool gobhi", "phool gobi", "gobhi", "gobi", "फूलगोभी", "गोभी"]),
+    "cabbage": ("Cabbage", ["patta gobhi", "band gobhi", "bandh gobi", "पत्ता गोभी"]),
+    "brinjal": ("Brinjal", ["eggplant", "baingan", "bengan", "बैंगन"]),
+    "okra": ("Okra", ["bhindi", "lady finger", "ladyfinger", "भिंडी"]),
+    "ragi": ("Ragi", ["finger millet", "nachni", "mandua", "रागी"]),
+    "guar": ("Guar", ["gwar", "cluster bean", "cluster beans", "ग्वार"]),
+    "jaggery": ("Jaggery", ["gur", "gud", "गुड़"]),
+}
+
+# Traded commodities that are a stage of another crop; agronomy (diagnosis, pests)
+# is keyed by the crop
+COMMODITY_CROPS = {"paddy": "rice"}
+
+# Minimum trigram similarity for a fuzzy candidate to be considered
+MIN_TRIGRAM_SIMILARITY = 0.3
+
+# Maximum edits covered by the deletion index used as the last-resort lookup
+MAX_DELETE_DISTANCE = 2
+
+# Minimum score for a fuzzy or edit-distance match to be trusted; one slip in a
+# short word ("ragi" -> "rai", "gur" -> "tur") lands on a different crop
+MIN_FUZZY_SCORE = 0.8
+
+# Words that turn a crop into a different traded product ("wheat atta",
+# "mustard oil", "sweet potato", "coriander leaves"); a crop name next to one is not that crop
+PRODUCT_QUALIFIERS = {
+    "atta", "flour", "maida", "suji", "oil", "seed", "seeds", "bran", "peas",
+    "husk", "cake", "straw", "sweet", "leaves", "leaf",
+}
+
+# Words that surround commodity names in spoken queries and must never fuzzy-match
+# one ("price" is one edit away from "rice")
+QUERY_STOPWORDS = {
+    "price", "prices", "rate", "rates", "bhav", "bhaav", "daam", "dam", "mandi",
+    "market", "today", "aaj", "kya", "hai", "the", "for", "and", "what", "current",
+}
+
+_PUNCTUATION = re.compile(r"[/,.\-_()'\"!?]+")
+_BRACKETS = re.compile(r"[()]")
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, strip punctuation and collapse whitespace"""
+    text = unicodedata.normalize("NFC", text or "").lower()
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Character trigrams of a padded string"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _deletes(text: str, depth: int) -> Set[str]:
+    """All strings reachable from text by deleting up to depth characters"""
+    results = {text}
+    frontier = {text}
+    for _ in range(depth):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        results |= frontier
+    return results
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Edit distance counting adjacent transpositions as one edit (common STT slip),
+    returning limit + 1 as soon as it is exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            )
+            if before and i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+
+    return previous[-1]
+
+
+def _is_product_of(words: List[str], start: int, end: int) -> bool:
+    """Whether a word next to a matched crop name makes it a product ("mustard oil", "sweet potato")"""
+    return (end < len(words) and words[end] in PRODUCT_QUALIFIERS) or \
+        (start > 0 and words[start - 1] in PRODUCT_QUALIFIERS)
+
+
+@dataclass
+class CommodityMatch:
+    """Result of resolving a spoken commodity name"""
+    commodity_id: str
+    name: str
+    matched_alias: str
+    score: float
+    method: str
+
+
+class CommodityResolver:
+    """Alias table plus trigram index with edit-distance fallback"""
+
+    def __init__(self, aliases: Optional[Dict[str, Tuple[str, List[str]]]] = None):
+        self.names: Dict[str, str] = {}
+        self.alias_to_id: Dict[str, str] = {}
+        self.alias_list: List[str] = []
+        self.trigram_index: Dict[str, List[int]] = {}
+        self.delete_index: Dict[str, Set[str]] = {}
+
+        for commodity_id, (name, alias_names) in (aliases or COMMODITY_ALIASES).items():
+            self.add_commodity(commodity_id, name, alias_names)
+
+    def add_commodity(self, commodity_id: str, name: str, aliases: List[str] = ()):
+        """Register a commodity and its aliases in the index"""
+        self.names[commodity_id] = name
+        for alias in [commodity_id, name, *aliases]:
+            normalized = normalize_text(alias)
+            if not normalized or normalized in self.alias_to_id:
+                continue
+
+            self.alias_to_id[normalized] = commodity_id
+            position = len(self.alias_list)
+            self.alias_list.append(normalized)
+            for variant in _deletes(normalized, min(MAX_DELETE_DISTANCE, max(1, len(normalized) // 3))):
+                self.delete_index.setdefault(variant, set()).add(normalized)
+            for gram in _trigrams(normalized):
+                self.trigram_index.setdefault(gram, []).append(position)
+
+    def _exact(self, text: str) -> Optional[CommodityMatch]:
+        """Exact alias hit on the whole phrase or any 1-3 word n-gram of it"""
+        commodity_id = self.alias_to_id.get(text)
+        if commodity_id:
+            return CommodityMatch(commodity_id, self.names[commodity_id], text, 1.0, "exact")
+
+        return self._phrase(text.split())
+
+    def _phrase(self, words: List[str]) -> Optional[CommodityMatch]:
+        """Alias hit on a 1-3 word n-gram not next to a product qualifier"""
+        for size in (3, 2, 1):
+            for start in range(len(words) - size + 1):
+                phrase = " ".join(words[start:start + size])
+                commodity_id = self.alias_to_id.get(phrase)
+                if commodity_id and not _is_product_of(words, start, start + size):
+                    return CommodityMatch(commodity_id, self.names[commodity_id], phrase, 0.95, "phrase")
+        return None
+
+    def canonical(self, text: str) -> Optional[str]:
+        """Commodity id of a scraped market name, or None if it is not exactly a known commodity.
+        
+        The whole name must be a commodity name or alias; failing that, one of its bracketed
+        parts ("Cummin Seed(Jeera)", "Paddy(Dhan)(Common)") must be. A bracketed qualifier
+        applies to the whole name, so "Coriander(Leaves)" is not coriander.
+        """
+        commodity_id = self.alias_to_id.get(normalize_text(text))
+        if commodity_id:
+            return commodity_id
+
+        parts = [normalize_text(part).split() for part in _BRACKETS.split(text or "")]
+        parts = [words for words in parts if words]
+        if any(all(word in PRODUCT_QUALIFIERS for word in words) for words in parts[1:]):
+            return None
+        for words in parts:
+            match = self._phrase(words)
+            if match:
+                return match.commodity_id
+        return None
+
+    def _fuzzy(self, text: str) -> Optional[CommodityMatch]:
+        """Trigram candidate generation ranked by edit distance"""
+        grams = _trigrams(text)
+        shared = Counter()
+        for gram in grams:
+            for position in self.trigram_index.get(gram, ()):
+                shared[position] += 1
+
+        best: Optional[Tuple[float, int, str]] = None
+        for position, count in shared.most_common(10):
+            alias = self.alias_list[position]
+            similarity = count / len(grams | _trigrams(alias))
+            if similarity < MIN_TRIGRAM_SIMILARITY:
+                continue
+
+            limit = max(1, len(alias) // 3)
+            distance = _edit_distance(text, alias, limit)
+            if distance > limit:
+                continue
+
+            score = 1.0 - distance / max(len(text), len(alias))
+            if best is None or score > best[0]:
+                best = (score, distance, alias)
+
+        if best is None:
+            return None
+
+        commodity_id = self.alias_to_id[best[2]]
+        return CommodityMatch(commodity_id, self.names[commodity_id], best[2], best[0], "fuzzy")
+
+    def _edit_scan(self, text: str) -> Optional[CommodityMatch]:
+        """Last resort: deletion-index lookup verified by bounded edit distance"""
+        limit = min(MAX_DELETE_DISTANCE, max(1, len(text) // 3))
+        candidates: Set[str] = set()
+        for variant in _deletes(text, limit):
+            candidates |= self.delete_index.get(variant, set())
+
+        best: Optional[Tuple[int, str]] = None
+        for alias in sorted(candidates):
+            distance = _edit_distance(text, alias, limit)
+            if distance <= limit and (best is None or distance < best[0]):
+                best = (distance, alias)
+
+        if best is None:
+            return None
+
+        commodity_id = self.alias_to_id[best[1]]
+        score = 1.0 - best[0] / max(len(text), len(best[1]))
+        return CommodityMatch(commodity_id, self.names[commodity_id], best[1], score, "edit_distance")
+
+    def resolve(self, text: str, fuzzy: bool = True) -> Optional[CommodityMatch]:
+        """Resolve any spoken variant of a commodity name (exact aliases only without fuzzy)"""
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+
+        match = self._exact(normalized)
+        if match or not fuzzy:
+            return match
+
+        # Fuzzy-match the one content word of a query as well, so "gehoon ka bhaw" still
+        # finds wheat; a name of several words ("ragi finger millet") or a product
+        # ("wheat atta") is not guessed from one of its words
+        words = [word for word in normalized.split() if len(word) >= 3 and word not in QUERY_STOPWORDS]
+        candidates = [normalized] if normalized not in QUERY_STOPWORDS else []
+        if len(words) == 1 and words[0] != normalized and words[0] not in PRODUCT_QUALIFIERS:
+            candidates.append(words[0])
+
+        for lookup in (self._fuzzy, self._edit_scan):
+            for candidate in candidates:
+                match = lookup(candidate)
+                if match and match.score >= MIN_FUZZY_SCORE:
+                    return match
+
+        return None
+
+
+# Global resolver instance
+commodity_resolver = None
+
+def get_commodity_resolver() -> CommodityResolver:
+    """Get or create the global commodity resolver"""
+    global commodity_resolver
+    if commodity_resolver is None:
+        commodity_resolver = CommodityResolver()
+    return commodity_resolver
+
+
+@lru_cache(maxsize=4096)
+def resolve_commodity_id(text: str) -> Optional[str]:
+    """Canonical commodity id for a spoken name, or None if unknown"""
+    match = get_commodity_resolver().resolve(text)
+    return match.commodity_id if match else None
+
+
+@lru_cache(maxsize=4096)
+def canonical_commodity_id(text: str) -> Optional[str]:
+    """Canonical commodity id for a scraped name, on an exact name or alias match only"""
+    return get_commodity_resolver().canonical(text)
+
+
+def resolve_crop_id(text: str) -> Optional[str]:
+    """Crop id for a spoken crop name ("dhan" is paddy, grown as rice), or None if unknown"""
+    commodity_id = resolve_commodity_id(text)
+    return COMMODITY_CROPS.get(commodity_id, commodity_id)
@@ -13,12 +13,23 @@ import asyncio
 
 # Import RAG system and existing tools
 from rag_system import get_rag_system
-from tools import get_user_farm_info, get_weather_farming_advice
+from tools import get_weather_farming_advice
+from result_dedup import ResultDeduplicator
+from session_context import SessionContext, get_session_context, current_request_memo, request_scoped
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Seconds the whole web search fan-out may take before stragglers are dropped
+WEB_SEARCH_DEADLINE = 6.0
+# Results kept per search query
+RESULTS_PER_QUERY = 2
+# Stop waiting once this many results at or above HIGH_RELEVANCE are in hand
+ENOUGH_WEB_RESULTS = 4
+HIGH_RELEVANCE = 0.5
+
 @function_tool()
+@request_scoped
 async def enhance_context_with_web_search(
     context: RunContext,
     original_query: str,
@@ -38,9 +49,11 @@ async def enhance_context_with_web_search(
         Enhanced answer with web-scraped information and location context
     """
     try:
+        session = get_session_context(context)
+        
         # Get user's farm location if available
-        farm_info = await get_user_location_context(context)
-        user_location = farm_info.get("location", location or "India")
+        farm_info = await session.get_location()
+        user_location = farm_info["location"] if farm_info.get("has_farm_profile") else (location or "India")
         
         # Get RAG system for comprehensive search
         rag_system = await get_rag_system()
@@ -48,7 +61,7 @@ async def enhance_context_with_web_search(
         response = f"🔍 **Enhanced Answer for: {original_query}**\n\n"
         
         # First, search existing knowledge base
-        kb_result = await rag_system.query_comprehensive(original_query, include_web_search=False)
+        kb_result = await search_knowledge(session, rag_system, original_query, include_web_search=False)
         
         if kb_result.get("knowledge_base_results"):
             response += "📚 **From Our Knowledge Base:**\n"
@@ -61,15 +74,8 @@ async def enhance_context_with_web_search(
         
         response += f"🌐 **Latest Information from Web Search** (Location: {user_location}):\n\n"
         
-        comprehensive_info = []
-        
-        for query in web_queries[:3]:  # Limit to 3 searches for performance
-            try:
-                web_result = await rag_system.web_scraper.search_agricultural_web(query, max_results=3)
-                if web_result.get("success") and web_result.get("results"):
-                    comprehensive_info.extend(web_result["results"][:2])  # Top 2 results per query
-            except Exception as e:
-                logger.error(f"Web search error for query '{query}': {e}")
+        # Limit to 3 searches, run together under one deadline
+        comprehensive_info = await gather_web_results(session, rag_system, web_queries[:3])
         
         # Process and format web search results
         if comprehensive_info:
@@ -113,46 +119,8 @@ async def get_user_location_context(context: RunContext) -> Dict[str, Any]:
         User location context including coordinates, state, and farm details
     """
     try:
-        # Get user farm information
-        farm_info_result = await get_user_farm_info(context)
-        
-        # Extract location from farm info if available
-        if "Sorry" not in farm_info_result and "error" not in farm_info_result.lower():
-            # Parse farm information to extract location details
-            location_context = {
-                "has_farm_profile": True,
-                "location": "India",  # Default
-                "state": "Not specified",
-                "coordinates": None,
-                "soil_type": "Not specified",
-                "farm_size": "Not specified"
-            }
-            
-            # Try to extract location from farm info response
-            if "Location:" in farm_info_result:
-                try:
-                    location_line = [line for line in farm_info_result.split('\n') if 'Location:' in line][0]
-                    location = location_line.split('Location:')[1].strip()
-                    location_context["location"] = location
-                    
-                    # Extract state if present
-                    if "," in location:
-                        parts = location.split(",")
-                        if len(parts) >= 2:
-                            location_context["state"] = parts[-1].strip()
-                except:
-                    pass
-            
-            return location_context
-        else:
-            # No farm profile available
-            return {
-                "has_farm_profile": False,
-                "location": "India",
-                "state": "General",
-                "coordinates": None,
-                "message": "No farm profile found. Providing general guidance for India."
-            }
+        # Resolved once per session from the farm profile and shared with the other tools
+        return await get_session_context(context).get_location()
             
     except Exception as e:
         logger.error(f"Error getting location context: {e}")
@@ -163,6 +131,69 @@ async def get_user_location_context(context: RunContext) -> Dict[str, Any]:
             "error": str(e)
         }
 
+async def search_knowledge(session: SessionContext, rag_system: Any, query: str,
+                           include_web_search: bool = True) -> Dict[str, Any]:
+    """Knowledge base query, shared by the tools of a session while fresh"""
+    memo = current_request_memo()
+    if not include_web_search and memo:
+        # The same question already ran with web search in this request; its KB half is reused
+        fuller = memo.peek(("retrieval", ("knowledge", query, True)))
+        if fuller and "error" not in fuller:
+            return {**fuller, "web_search_results": []}
+    return await session.get_or_load(
+        "retrieval", ("knowledge", query, include_web_search),
+        lambda: rag_system.query_comprehensive(query, include_web_search=include_web_search, owner=session),
+        cacheable=lambda result: "error" not in result,
+    )
+
+async def search_web_cached(session: SessionContext, rag_system: Any, query: str,
+                            max_results: int = 5) -> Dict[str, Any]:
+    """Agricultural web search, shared by the tools of a session while fresh"""
+    return await session.get_or_load(
+        "retrieval", ("web", query, max_results),
+        lambda: rag_system.web_scraper.search_agricultural_web(query, max_results=max_results),
+        cacheable=lambda result: bool(result.get("success")),
+    )
+
+async def gather_web_results(session: SessionContext, rag_system: Any, queries: List[str],
+                             deadline: float = WEB_SEARCH_DEADLINE,
+                             enough: int = ENOUGH_WEB_RESULTS) -> List[Dict[str, Any]]:
+    """Run web searches concurrently, merging distinct results as they arrive, until
+    enough relevant ones are in or the deadline passes; unfinished searches are cancelled
+    (down to the HTTP request, unless another tool is waiting on the same search)"""
+    tasks = [asyncio.ensure_future(search_web_cached(session, rag_system, query, max_results=3))
+             for query in queries]
+    # Mirrors, tracking-parameter variants and syndicated copies collapse as results arrive
+    deduplicator = ResultDeduplicator()
+    merged = deduplicator.results
+    try:
+        for next_result in asyncio.as_completed(tasks, timeout=deadline):
+            try:
+                web_result = await next_result
+            except asyncio.TimeoutError:
+                logger.warning(f"Web search deadline of {deadline}s reached with {len(merged)} results")
+                break
+            except Exception as e:
+                logger.error(f"Web search error: {e}")
+                continue
+
+            if not web_result.get("success"):
+                continue
+            for result in web_result.get("results", [])[:RESULTS_PER_QUERY]:
+                deduplicator.add(result)
+
+            if sum(result["relevance_score"] >= HIGH_RELEVANCE for result in merged) >= enough:
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if deduplicator.duplicates:
+        logger.info(f"Collapsed {deduplicator.duplicates} duplicate web results")
+    # Arrival order depends on network timing; present the most relevant first
+    merged.sort(key=lambda result: result["relevance_score"], reverse=True)
+    return merged
+
 def generate_enhanced_search_queries(original_query: str, location: str, context_type: str) -> List[str]:
     """Generate multiple search queries to get comprehensive information"""
     
@@ -213,7 +244,8 @@ async def get_location_specific_guidance(location: str, query: str, context: Run
     try:
         # Get weather context for location
         if location != "India":
-            weather_advice = await get_weather_farming_advice(context, location)
+            # "Ludhiana, Punjab" -> weather for the city
+            weather_advice = await get_weather_farming_advice(context, location.split(",")[0].strip())
             if weather_advice and "Sorry" not in weather_advice:
                 guidance += f"🌤️ **Current Weather Context:**\n{weather_advice[:200]}...\n\n"
         
@@ -315,6 +347,7 @@ def generate_actionable_recommendations(query: str, location: str) -> str:
     return recommendations
 
 @function_tool()
+@request_scoped
 async def provide_comprehensive_answer_with_context(
     context: RunContext,
     user_query: str,
@@ -332,8 +365,10 @@ async def provide_comprehensive_answer_with_context(
         Comprehensive answer with enhanced context and location-specific guidance
     """
     try:
+        session = get_session_context(context)
+        
         # Get user location context
-        location_info = await get_user_location_context(context)
+        location_info = await session.get_location()
         user_location = location_info.get("location", "India")
         
         # Get RAG system
@@ -350,8 +385,10 @@ async def provide_comprehensive_answer_with_context(
             response += f"📍 **General Context**: Providing guidance for India (Add farm profile for personalized advice)\n"
         response += "\n"
         
-        # Query comprehensive knowledge base
-        kb_result = await rag_system.query_comprehensive(user_query, include_web_search=True)
+        # Query comprehensive knowledge base; low confidence always goes to the
+        # enhanced web search below, so the plain web search would be wasted there
+        kb_result = await search_knowledge(session, rag_system, user_query,
+                                           include_web_search=confidence_level != "low")
         
         # If confidence is low or limited results, enhance with web search
         if (confidence_level == "low" or 
@@ -0,0 +1,244 @@
+"""
+Crop Strategy Recommendation Engine for AI Farm Care Assistant
+Loads the farming strategy catalog once into NumPy feature matrices and scores
+every strategy against a farm's soil vector and season in one vectorized pass
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "utils", "mockCropCards.json")
+
+SEASONS = ("Kharif", "Rabi", "Zaid")
+
+# Soil features scored, derived from the soil vector (see soil_service.SOIL_PROPERTIES)
+SOIL_FEATURES = ("ph", "organic_matter", "clay", "sand", "cec")
+# Distance outside the ideal range at which the fit has dropped to ~37%
+FEATURE_TOLERANCE = np.array([0.75, 1.5, 12.0, 15.0, 10.0])
+DEFAULT_PH_RANGE = (5.5, 8.5)
+
+# Ideal-soil phrases in the catalog -> (feature, low, high) constraints
+SOIL_TYPE_RANGES = {
+    "heavy clay": [("clay", 40, 70)],
+    "clay loam": [("clay", 27, 40)],
+    "clay": [("clay", 35, 70)],
+    "black cotton": [("clay", 35, 70), ("cec", 25, 70)],
+    "medium to heavy": [("clay", 25, 55)],
+    "waterlogged": [("clay", 35, 70)],
+    "sandy loam": [("sand", 50, 75), ("clay", 5, 20)],
+    "deep loamy": [("clay", 15, 30), ("sand", 25, 55)],
+    "loam": [("clay", 10, 27), ("sand", 25, 55)],
+    "sandy": [("sand", 70, 100)],
+    "well-drained": [("sand", 35, 80)],
+    "well drained": [("sand", 35, 80)],
+    "good drainage": [("sand", 35, 80)],
+    "organic matter": [("organic_matter", 2.5, 10)],
+    "slightly alkaline": [("ph", 7.2, 8.5)],
+    "alkaline": [("ph", 7.5, 9.0)],
+    "acidic": [("ph", 4.5, 6.5)],
+}
+
+# Sowing seasons of catalog crops; crops not listed fit any season
+CROP_SEASONS = {
+    "paddy": ("Kharif",), "rice": ("Kharif",), "cotton": ("Kharif",), "turmeric": ("Kharif",),
+    "maize": ("Kharif", "Zaid"), "soybean": ("Kharif",), "groundnut": ("Kharif", "Zaid"),
+    "wheat": ("Rabi",), "mustard": ("Rabi",), "gram": ("Rabi",), "saffron": ("Rabi",),
+    "sugarcane": ("Rabi", "Zaid"), "cucumber": ("Zaid", "Kharif"), "watermelon": ("Zaid",),
+    "potato": ("Rabi",), "onion": ("Rabi", "Kharif"), "tomato": SEASONS, "capsicum": SEASONS,
+}
+
+# Upper bound on farm x strategy x feature cells scored at once
+SCORING_CHUNK_CELLS = 2_000_000
+
+# Weights of the score components (sum to 1)
+SOIL_WEIGHT = 0.5
+ROI_WEIGHT = 0.3
+SEASON_WEIGHT = 0.2
+
+
+def current_season(month: Optional[int] = None) -> str:
+    """Season a farmer is planning for in a given month"""
+    month = month or datetime.now().month
+    if 6 <= month <= 9:
+        return "Kharif"
+    if month >= 10 or month <= 2:
+        return "Rabi"
+    return "Zaid"
+
+
+def soil_features(soil_vectors: np.ndarray) -> np.ndarray:
+    """SOIL_FEATURES matrix from soil vectors (ph, soc g/kg, sand, silt, clay, cec, nitrogen)"""
+    vectors = np.atleast_2d(np.asarray(soil_vectors, dtype=np.float64))
+    return np.column_stack([
+        vectors[:, 0],
+        vectors[:, 1] * 0.1724,  # organic carbon g/kg -> organic matter %
+        vectors[:, 4],
+        vectors[:, 2],
+        vectors[:, 5],
+    ])
+
+
+def _soil_ranges(ideal_soil_types: Sequence[str]) -> np.ndarray:
+    """(low, high) per soil feature for a strategy's ideal soil descriptions.
+
+    Phrases within one description narrow each other ("well-drained sandy loam");
+    separate descriptions are alternatives, so their ranges are widened together.
+    """
+    constraints: Dict[str, List[tuple]] = {}
+    for description in ideal_soil_types:
+        text = description.lower()
+        ranges: Dict[str, tuple] = {}
+        for phrase, phrase_ranges in SOIL_TYPE_RANGES.items():
+            if phrase in text:
+                for feature, low, high in phrase_ranges:
+                    current = ranges.get(feature, (-np.inf, np.inf))
+                    narrowed = (max(current[0], low), min(current[1], high))
+                    ranges[feature] = narrowed if narrowed[0] <= narrowed[1] else (low, high)
+                # Longer phrases are listed first; "sandy loam" must not also count as "loam"
+                text = text.replace(phrase, " ")
+        for feature, bounds in ranges.items():
+            constraints.setdefault(feature, []).append(bounds)
+
+    bounds = np.array([[-np.inf, np.inf]] * len(SOIL_FEATURES))
+    bounds[0] = DEFAULT_PH_RANGE
+    for feature, ranges in constraints.items():
+        bounds[SOIL_FEATURES.index(feature)] = (min(r[0] for r in ranges), max(r[1] for r in ranges))
+    return bounds
+
+
+def _strategy_seasons(strategy: Dict[str, Any]) -> np.ndarray:
+    """Boolean season membership for a strategy"""
+    declared = strategy.get("season")
+    if declared and declared in SEASONS:
+        return np.array([season == declared for season in SEASONS])
+
+    crops = [crop.lower() for crop in strategy.get("crops_main", [])]
+    known = [CROP_SEASONS[crop] for crop in crops if crop in CROP_SEASONS]
+    if not known:
+        return np.ones(len(SEASONS), dtype=bool)
+    return np.array([any(season in seasons for seasons in known) for season in SEASONS])
+
+
+class CropStrategyEngine:
+    """Vectorized scoring of farming strategies against soil and season"""
+
+    def __init__(self, strategies: List[Dict[str, Any]]):
+        self.strategies = list(strategies)
+        count = len(self.strategies)
+
+        bounds = np.array([_soil_ranges(s.get("ideal_soil_types", [])) for s in self.strategies]).reshape(count, len(SOIL_FEATURES), 2)
+        self.soil_low = bounds[:, :, 0]
+        self.soil_high = bounds[:, :, 1]
+        self.constrained = np.isfinite(self.soil_low) | np.isfinite(self.soil_high)
+
+        self.season_matrix = np.array([_strategy_seasons(s) for s in self.strategies], dtype=bool).reshape(count, len(SEASONS))
+        self.investment = np.array([float(s.get("investment_cost", 0)) for s in self.strategies])
+        self.roi = np.array([float(s.get("roi_percentage", 0)) for s in self.strategies])
+        self.farming_types = np.array([s.get("farming_type", "").lower() for s in self.strategies])
+        roi_span = self.roi.max() - self.roi.min() if count else 0
+        self.roi_score = (self.roi - self.roi.min()) / roi_span if roi_span else np.ones(count)
+
+        logger.info(f"Crop strategy engine loaded {count} strategies")
+
+    @classmethod
+    def from_json(cls, path: str = DEFAULT_CATALOG_PATH) -> "CropStrategyEngine":
+        """Load a strategy catalog such as utils/mockCropCards.json"""
+        with open(path, encoding="utf-8") as handle:
+            return cls(json.load(handle))
+
+    def soil_fit(self, soil_vectors: Optional[np.ndarray]) -> np.ndarray:
+        """Soil suitability (0-1) of every strategy for every farm, shape (farms, strategies)"""
+        if soil_vectors is None:
+            return np.full((1, len(self.strategies)), 0.5)
+
+        features = soil_features(soil_vectors)
+        result = np.empty((len(features), len(self.strategies)))
+        # Bound the (farms x strategies x features) intermediates for large batches
+        chunk = max(1, SCORING_CHUNK_CELLS // max(1, len(self.strategies) * len(SOIL_FEATURES)))
+        for start in range(0, len(features), chunk):
+            block = features[start:start + chunk, None, :]
+            below = np.clip(self.soil_low[None] - block, 0, None)
+            above = np.clip(block - self.soil_high[None], 0, None)
+            distance = np.nan_to_num(below + above) / FEATURE_TOLERANCE
+            fit = np.exp(-distance ** 2)
+
+            # Only features the farm has data for and the strategy cares about count
+            weight = self.constrained[None] & ~np.isnan(block)
+            total = weight.sum(axis=2)
+            score = np.where(weight, fit, 0).sum(axis=2)
+            result[start:start + chunk] = np.where(total > 0, score / np.maximum(total, 1), 0.5)
+        return result
+
+    def score(self, soil_vectors: Optional[np.ndarray] = None,
+              seasons: Optional[Sequence[Optional[str]]] = None) -> np.ndarray:
+        """Suitability score (0-100) for every farm and strategy"""
+        soil = self.soil_fit(soil_vectors)
+        farms = soil.shape[0]
+
+        # One season applies to every farm; otherwise one season per farm
+        season_fit = np.ones((farms, len(self.strategies)))
+        if seasons is not None:
+            seasons = list(seasons) * farms if len(seasons) == 1 else list(seasons)
+            for row, season in enumerate(seasons[:farms]):
+                if season in SEASONS:
+                    season_fit[row] = self.season_matrix[:, SEASONS.index(season)]
+
+        return 100 * (SOIL_WEIGHT * soil + ROI_WEIGHT * self.roi_score[None] + SEASON_WEIGHT * season_fit)
+
+    def _filter_mask(self, max_investment: Optional[float] = None, farming_type: Optional[str] = None,
+                     min_roi: Optional[float] = None) -> np.ndarray:
+        """Strategies passing the hard filters"""
+        mask = np.ones(len(self.strategies), dtype=bool)
+        if max_investment is not None:
+            mask &= self.investment <= max_investment
+        if farming_type:
+            mask &= np.char.find(self.farming_types, farming_type.lower()) >= 0
+        if min_roi is not None:
+            mask &= self.roi >= min_roi
+        return mask
+
+    def _top_k(self, scores: np.ndarray, mask: np.ndarray, top_k: int) -> List[Dict[str, Any]]:
+        """Best-scoring strategies of one farm that pass the filters"""
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return []
+        k = min(top_k, len(candidates))
+        best = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [
+            {**self.strategies[i], "suitability_score": round(float(scores[i]), 1),
+             "season": "/".join(s for s, ok in zip(SEASONS, self.season_matrix[i]) if ok)}
+            for i in best
+        ]
+
+    def recommend(self, soil_vector: Optional[np.ndarray] = None, season: Optional[str] = None,
+                  top_k: int = 3, **filters) -> List[Dict[str, Any]]:
+        """Top-k strategies for one farm, best first"""
+        scores = self.score(soil_vector, [season])[0]
+        return self._top_k(scores, self._filter_mask(**filters), top_k)
+
+    def recommend_batch(self, soil_vectors: np.ndarray, seasons: Optional[Sequence[Optional[str]]] = None,
+                        top_k: int = 3, **filters) -> List[List[Dict[str, Any]]]:
+        """Top-k strategies for many farms scored in one pass"""
+        scores = self.score(soil_vectors, seasons)
+        mask = self._filter_mask(**filters)
+        return [self._top_k(row, mask, top_k) for row in scores]
+
+
+# Global engine instance
+crop_engine = None
+
+def get_crop_engine() -> CropStrategyEngine:
+    """Get or create the global crop strategy engine"""
+    global crop_engine
+    if crop_engine is None:
+        crop_engine = CropStrategyEngine.from_json()
+    return crop_engine
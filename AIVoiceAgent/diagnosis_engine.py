@@ -0,0 +1,195 @@
+"""
+Crop Disease Diagnosis Engine for AI Farm Care Assistant
+Finds every known symptom term (English, Hinglish and Hindi aliases) in a
+description with one Aho-Corasick pass and ranks diseases, pests and disorders
+through an inverted symptom index weighted by crop
+"""
+
+import logging
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from agronomy_data import AgronomyData, get_agronomy_data
+from commodity_resolver import normalize_text, resolve_crop_id
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Crop weight of a crop-specific condition when the farmer grows a different crop
+OTHER_CROP_WEIGHT = 0.4
+
+# Candidates scoring below this fraction of the best one are left out of the differential
+MIN_RELATIVE_SCORE = 0.25
+
+
+def _is_word_char(char: str) -> bool:
+    """Letters, digits and combining marks (Devanagari matras) belong to a word"""
+    return char.isalnum() or unicodedata.category(char).startswith("M")
+
+
+class TermAutomaton:
+    """Aho-Corasick automaton over normalized alias strings"""
+
+    def __init__(self, terms: Mapping[str, str]):
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.failure: List[int] = [0]
+        self.outputs: List[List[Tuple[int, str]]] = [[]]
+
+        for alias, term_id in terms.items():
+            state = 0
+            for char in alias:
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][char] = next_state
+                    self.transitions.append({})
+                    self.failure.append(0)
+                    self.outputs.append([])
+                state = next_state
+            self.outputs[state].append((len(alias), term_id))
+
+        # Breadth-first failure links; each state inherits the matches of its fallback
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.failure[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.failure[fallback]
+                target = self.transitions[fallback].get(char, 0)
+                self.failure[next_state] = target if target != next_state else 0
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.failure[next_state]]
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """Whole-word matches as (start, end, term id), longest first where they overlap"""
+        matches = []
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in self.transitions[state]:
+                state = self.failure[state]
+            state = self.transitions[state].get(char, 0)
+            for length, term_id in self.outputs[state]:
+                start = end - length
+                if (start == 0 or not _is_word_char(text[start - 1])) and (end == len(text) or not _is_word_char(text[end])):
+                    matches.append((start, end, term_id))
+
+        # "safed makkhi" (whiteflies) wins over the "safed" (white) inside it
+        matches.sort(key=lambda match: (match[0] - match[1], match[0]))
+        taken = [False] * (len(text) + 1)
+        selected = []
+        for start, end, term_id in matches:
+            if not any(taken[start:end]):
+                taken[start:end] = [True] * (end - start)
+                selected.append((start, end, term_id))
+        return sorted(selected)
+
+
+@dataclass
+class Diagnosis:
+    """One candidate in a differential diagnosis"""
+    condition_id: str
+    name: str
+    kind: str
+    score: float
+    confidence: float
+    matched_symptoms: List[str]
+    actions: Tuple[str, ...]
+
+
+class DiagnosisEngine:
+    """Symptom knowledge base with an inverted index from symptoms to conditions"""
+
+    def __init__(self, symptom_terms: Mapping[str, Mapping], conditions: Mapping[str, Mapping]):
+        self.symptom_labels: Dict[str, str] = {}
+        aliases: Dict[str, str] = {}
+        for symptom_id, entry in symptom_terms.items():
+            self.symptom_labels[symptom_id] = entry["label"]
+            for alias in (symptom_id.replace("_", " "), *entry["aliases"]):
+                normalized = normalize_text(alias)
+                if normalized:
+                    aliases.setdefault(normalized, symptom_id)
+        self.automaton = TermAutomaton(aliases)
+
+        self.condition_ids = list(conditions)
+        self.conditions = [conditions[condition_id] for condition_id in self.condition_ids]
+        self.total_weight = [sum(condition["symptoms"].values()) for condition in self.conditions]
+        self.symptom_index: Dict[str, List[Tuple[int, float]]] = {}
+        for position, condition in enumerate(self.conditions):
+            for symptom_id, weight in condition["symptoms"].items():
+                if symptom_id not in self.symptom_labels:
+                    raise ValueError(f"Condition {self.condition_ids[position]} uses unknown symptom {symptom_id}")
+                self.symptom_index.setdefault(symptom_id, []).append((position, weight))
+
+        logger.info(f"Diagnosis engine loaded {len(self.conditions)} conditions, {len(aliases)} symptom terms")
+
+    @classmethod
+    def from_agronomy_data(cls, data: AgronomyData) -> "DiagnosisEngine":
+        """Build from the symptom_terms and crop_conditions tables"""
+        return cls(data.table("symptom_terms"), data.table("crop_conditions"))
+
+    def match_symptoms(self, text: str) -> List[str]:
+        """Known symptoms mentioned in a description, in order of mention"""
+        found = []
+        for _, _, symptom_id in self.automaton.find(normalize_text(text)):
+            if symptom_id not in found:
+                found.append(symptom_id)
+        return found
+
+    def _crop_weight(self, position: int, crop_id: Optional[str]) -> float:
+        """Prior for a condition given the farmer's crop"""
+        crops = self.conditions[position].get("crops")
+        if not crop_id or not crops:
+            return 1.0
+        return crops.get(crop_id, OTHER_CROP_WEIGHT)
+
+    def diagnose(self, symptoms: str, crop: Optional[str] = None, top_k: int = 5) -> List[Diagnosis]:
+        """Ranked differential diagnosis for a symptom description"""
+        return self.rank(self.match_symptoms(symptoms), crop=crop, top_k=top_k)
+
+    def rank(self, matched: List[str], crop: Optional[str] = None, top_k: int = 5) -> List[Diagnosis]:
+        """Ranked differential diagnosis for already matched symptom ids"""
+        if not matched:
+            return []
+
+        evidence: Dict[int, float] = {}
+        for symptom_id in matched:
+            for position, weight in self.symptom_index.get(symptom_id, ()):
+                evidence[position] = evidence.get(position, 0.0) + weight
+
+        crop_id = (resolve_crop_id(crop) or normalize_text(crop)) if crop else None
+        ranked = sorted(
+            ((weight * self._crop_weight(position, crop_id), weight / self.total_weight[position], position)
+             for position, weight in evidence.items()),
+            key=lambda item: (-item[0], -item[1], item[2])
+        )
+
+        cutoff = MIN_RELATIVE_SCORE * ranked[0][0]
+        results = []
+        for score, confidence, position in ranked[:top_k]:
+            if score < cutoff:
+                break
+            condition = self.conditions[position]
+            results.append(Diagnosis(
+                condition_id=self.condition_ids[position],
+                name=condition["name"],
+                kind=condition["kind"],
+                score=round(score, 3),
+                confidence=round(confidence, 2),
+                matched_symptoms=[s for s in matched if s in condition["symptoms"]],
+                actions=tuple(condition["actions"]),
+            ))
+        return results
+
+
+# Global engine instance
+diagnosis_engine = None
+
+def get_diagnosis_engine() -> DiagnosisEngine:
+    """Get or create the global diagnosis engine"""
+    global diagnosis_engine
+    if diagnosis_engine is None:
+        diagnosis_engine = DiagnosisEngine.from_agronomy_data(get_agronomy_data())
+    return diagnosis_engine
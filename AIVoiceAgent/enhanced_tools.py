@@ -8,17 +8,21 @@ from livekit.agents import function_tool, RunContext
 import requests
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Optional
 import asyncio
 
 # Import RAG system for data access
 from rag_system import get_rag_system
 # Import existing tools
 from tools import get_weather, get_weather_farming_advice
+from weather_service import get_weather_service, WeatherWindows, HEAVY_RAIN_MM
+from agronomy_data import get_agronomy_data
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+agronomy = get_agronomy_data()
+
 @function_tool()
 async def analyze_income_optimization(
     context: RunContext,
@@ -139,14 +143,15 @@ async def generate_intelligent_tasks(
         Detailed task breakdown with timeline and weather considerations
     """
     try:
-        # Get weather data for location-specific recommendations
+        # Get forecast windows once for location-specific recommendations
         weather_data = None
         if farm_location:
             try:
-                weather_response = await get_weather_farming_advice(context, farm_location)
-                weather_data = weather_response
-            except:
-                pass
+                forecast = await get_weather_service().get_weather_windows(farm_location)
+                if forecast["success"]:
+                    weather_data = forecast["windows"]
+            except Exception as e:
+                logger.error(f"Error getting forecast windows for {farm_location}: {e}")
         
         # Get current farm data
         rag_system = await get_rag_system()
@@ -157,29 +162,31 @@ async def generate_intelligent_tasks(
         response = f"📋 **Intelligent Task Breakdown for: {farming_activity.title()}**\n\n"
         
         # Weather consideration
-        if weather_data and "temperature" in str(weather_data).lower():
-            response += f"🌤️ **Weather Considerations:**\n"
-            response += f"Current conditions factored into timeline\n\n"
+        if weather_data:
+            response += format_weather_windows(weather_data)
         
         # Generate detailed task breakdown based on activity type
         if "sow" in activity_lower or "plant" in activity_lower:
             if "mustard" in activity_lower or crop_name.lower() == "mustard":
-                tasks = await generate_mustard_sowing_tasks(weather_data, farm_location)
+                tasks = await generate_mustard_sowing_tasks(farm_location)
             elif "wheat" in activity_lower or crop_name.lower() == "wheat":
-                tasks = await generate_wheat_sowing_tasks(weather_data, farm_location)
+                tasks = await generate_wheat_sowing_tasks(farm_location)
             elif "rice" in activity_lower or crop_name.lower() == "rice":
-                tasks = await generate_rice_sowing_tasks(weather_data, farm_location)
+                tasks = await generate_rice_sowing_tasks(farm_location)
             else:
-                tasks = await generate_general_sowing_tasks(crop_name, weather_data)
+                tasks = await generate_general_sowing_tasks(crop_name)
                 
         elif "harvest" in activity_lower:
-            tasks = await generate_harvesting_tasks(crop_name, weather_data)
+            tasks = await generate_harvesting_tasks(crop_name)
             
         elif "fish" in activity_lower:
-            tasks = await generate_fishiculture_tasks(weather_data)
+            tasks = await generate_fishiculture_tasks()
             
         else:
-            tasks = await generate_general_farming_tasks(farming_activity, weather_data)
+            tasks = await generate_general_farming_tasks(farming_activity)
+        
+        if weather_data:
+            annotate_tasks_with_forecast(tasks, weather_data)
         
         # Format response with tasks
         response += "📅 **Detailed Task Schedule:**\n\n"
@@ -191,6 +198,8 @@ async def generate_intelligent_tasks(
             response += f"   🎯 Priority: {task['priority']}\n"
             if task.get('weather_dependency'):
                 response += f"   🌤️ Weather Note: {task['weather_dependency']}\n"
+            if task.get('forecast_note'):
+                response += f"   📡 Next 5 Days: {task['forecast_note']}\n"
             response += f"\n"
         
         # Add to tasks system (simulated - in real implementation would call API)
@@ -209,7 +218,72 @@ async def generate_intelligent_tasks(
         logger.error(f"Error in generate_intelligent_tasks: {e}")
         return f"Sorry, I encountered an error while generating task breakdown for '{farming_activity}'. Please try again."
 
-async def generate_mustard_sowing_tasks(weather_data: Any, location: str) -> List[Dict[str, str]]:
+def format_weather_windows(windows: WeatherWindows) -> str:
+    """Summarize forecast windows for the task breakdown"""
+    summary = windows.summary()
+    text = "🌤️ **Weather Considerations (5-day forecast):**\n"
+    text += f"• Expected rain: {summary['rain_mm']:.1f} mm\n"
+    if summary["dry_now_hours"]:
+        text += f"• Dry for the next {summary['dry_now_hours']} hours\n"
+    if summary["next_dry_48h"]:
+        text += f"• Next 48-hour dry spell starts {summary['next_dry_48h'].strftime('%a %d %b, %H:%M')}\n"
+    else:
+        text += "• No 48-hour dry spell in the forecast\n"
+    if summary["next_spray_window"]:
+        text += f"• Next spray-safe slot: {summary['next_spray_window'].strftime('%a %d %b, %H:%M')}\n"
+    if summary["frost_nights"]:
+        text += f"• Frost risk: {', '.join(day.strftime('%d %b') for day in summary['frost_nights'])}\n"
+    return text + "\n"
+
+
+def annotate_tasks_with_forecast(tasks: List[Dict[str, str]], windows: WeatherWindows):
+    """Attach concrete forecast windows to tasks whose timing depends on weather"""
+    spray_window = windows.next_spray_window()
+    dry_spell_48h = windows.next_dry_spell(48)
+    dry_spell_24h = windows.next_dry_spell(24)
+    rain_48h = windows.rain_within(48)
+    frost_nights = windows.frost_nights()
+
+    for task in tasks:
+        text = f"{task['title']} {task['description']} {task.get('weather_dependency', '')}".lower()
+        title = task["title"].lower()
+
+        if any(word in text for word in ("spray", "herbicide", "pesticide", "insecticide", "fungicide")):
+            task["forecast_note"] = (
+                f"best spray slot {spray_window.strftime('%a %H:%M')}" if spray_window
+                else "no dry, calm slot for spraying in the forecast"
+            )
+        elif "harvest" in title:
+            task["forecast_note"] = (
+                f"24-hour dry window from {dry_spell_24h.strftime('%a %H:%M')}" if dry_spell_24h
+                else "no 24-hour dry window in the forecast - keep produce covered"
+            )
+        elif "sowing" in title or "transplant" in title or "stocking" in title:
+            task["forecast_note"] = (
+                f"48-hour dry window from {dry_spell_48h.strftime('%a %H:%M')}" if dry_spell_48h
+                else f"{rain_48h:.0f} mm rain due in 48 hours - no 2-day dry window yet"
+            )
+        elif "irrigation" in title:
+            task["forecast_note"] = (
+                f"{rain_48h:.0f} mm rain due in 48 hours - irrigation can likely be skipped" if rain_48h >= HEAVY_RAIN_MM
+                else f"only {rain_48h:.0f} mm rain due in 48 hours - irrigate as planned"
+            )
+        elif "fertilizer" in title:
+            task["forecast_note"] = (
+                f"{rain_48h:.0f} mm rain due in 48 hours - delay to avoid nutrient runoff" if rain_48h >= 2 * HEAVY_RAIN_MM
+                else "no heavy rain due in 48 hours"
+            )
+        elif "tillage" in title or "construction" in title:
+            rain_24h = windows.rain_within(24)
+            task["forecast_note"] = (
+                f"{rain_24h:.0f} mm rain due in 24 hours - wait for the field to drain" if rain_24h >= HEAVY_RAIN_MM
+                else "field workable - no heavy rain due in 24 hours"
+            )
+        elif frost_nights and any(word in title for word in ("germination", "seedling", "nursery")):
+            task["forecast_note"] = f"frost risk on {', '.join(day.strftime('%d %b') for day in frost_nights)} - cover young plants"
+
+
+async def generate_mustard_sowing_tasks(location: str) -> List[Dict[str, str]]:
     """Generate detailed tasks for mustard sowing"""
     return [
         {
@@ -284,7 +358,7 @@ async def generate_mustard_sowing_tasks(weather_data: Any, location: str) -> Lis
         }
     ]
 
-async def generate_wheat_sowing_tasks(weather_data: Any, location: str) -> List[Dict[str, str]]:
+async def generate_wheat_sowing_tasks(location: str) -> List[Dict[str, str]]:
     """Generate detailed tasks for wheat sowing"""
     return [
         {
@@ -317,7 +391,7 @@ async def generate_wheat_sowing_tasks(weather_data: Any, location: str) -> List[
         }
     ]
 
-async def generate_rice_sowing_tasks(weather_data: Any, location: str) -> List[Dict[str, str]]:
+async def generate_rice_sowing_tasks(location: str) -> List[Dict[str, str]]:
     """Generate detailed tasks for rice sowing"""
     return [
         {
@@ -350,7 +424,7 @@ async def generate_rice_sowing_tasks(weather_data: Any, location: str) -> List[D
         }
     ]
 
-async def generate_fishiculture_tasks(weather_data: Any) -> List[Dict[str, str]]:
+async def generate_fishiculture_tasks() -> List[Dict[str, str]]:
     """Generate tasks for fish farming setup"""
     return [
         {
@@ -383,7 +457,7 @@ async def generate_fishiculture_tasks(weather_data: Any) -> List[Dict[str, str]]
         }
     ]
 
-async def generate_general_sowing_tasks(crop_name: str, weather_data: Any) -> List[Dict[str, str]]:
+async def generate_general_sowing_tasks(crop_name: str) -> List[Dict[str, str]]:
     """Generate general sowing tasks for any crop"""
     return [
         {
@@ -409,7 +483,7 @@ async def generate_general_sowing_tasks(crop_name: str, weather_data: Any) -> Li
         }
     ]
 
-async def generate_harvesting_tasks(crop_name: str, weather_data: Any) -> List[Dict[str, str]]:
+async def generate_harvesting_tasks(crop_name: str) -> List[Dict[str, str]]:
     """Generate harvesting task breakdown"""
     return [
         {
@@ -442,7 +516,7 @@ async def generate_harvesting_tasks(crop_name: str, weather_data: Any) -> List[D
         }
     ]
 
-async def generate_general_farming_tasks(activity: str, weather_data: Any) -> List[Dict[str, str]]:
+async def generate_general_farming_tasks(activity: str) -> List[Dict[str, str]]:
     """Generate general farming task breakdown"""
     return [
         {
@@ -510,6 +584,20 @@ async def suggest_profitable_crops_by_price(
             response += f"• Data sources: {', '.join(market_result.get('sources', []))}\n"
             response += f"• Last updated: Just now\n\n"
             
+            # Rank commodities with stored price history by their 30-day trend
+            price_trends = []
+            for commodity_name in rag_system.price_store.list_commodities():
+                trend = rag_system.price_store.price_trend(commodity_name, days=30)
+                if trend.get("success"):
+                    price_trends.append(trend)
+            
+            if price_trends:
+                price_trends.sort(key=lambda x: x["change_percent"], reverse=True)
+                response += "📈 **Strongest Mandi Price Trends (30 days):**\n"
+                for trend in price_trends[:5]:
+                    response += f"• {trend['commodity']}: ₹{trend['latest_price']:,.0f} ({trend['change_percent']:+.1f}%, {trend['direction']})\n"
+                response += "\n"
+            
             # Simulate price analysis (in real implementation, would analyze actual scraped data)
             high_price_crops = [
                 {"name": "Saffron", "price": "₹2,50,000/kg", "roi": "400%", "season": "rabi", "investment": "high"},
@@ -642,25 +730,7 @@ async def recommend_crops_by_weather_and_season(
         if weather_data:
             response += f"• Weather Status: Based on current conditions\n\n"
         
-        # Seasonal crop calendar
-        crop_calendar = {
-            "October": {
-                "rabi_sowing": ["Wheat", "Mustard", "Gram", "Pea", "Barley", "Oat"],
-                "vegetables": ["Cauliflower", "Cabbage", "Carrot", "Radish", "Spinach"],
-                "fruits": ["Strawberry planting", "Citrus care"]
-            },
-            "November": {
-                "rabi_sowing": ["Wheat", "Mustard", "Barley", "Gram"],
-                "vegetables": ["Onion", "Garlic", "Fenugreek", "Coriander"],
-                "late_kharif": ["Late rice harvest", "Sugarcane care"]
-            },
-            "December": {
-                "winter_crops": ["Wheat growth care", "Mustard flowering"],
-                "vegetables": ["Tomato", "Brinjal", "Okra", "Bottle gourd"],
-                "orchard": ["Fruit tree pruning", "Citrus harvest"]
-            }
-        }
-        
+        crop_calendar = agronomy.table("crop_calendar")
         current_recommendations = crop_calendar.get(current_month_name, crop_calendar.get("October"))
         
         response += f"🗓️ **{current_month_name} Crop Calendar:**\n\n"
@@ -687,26 +757,7 @@ async def recommend_crops_by_weather_and_season(
             response += "• Night temperature should be below 25°C\n"
             response += "• Morning dew is beneficial for germination\n\n"
         
-        # Soil-specific recommendations
-        soil_recommendations = {
-            "alluvial": {
-                "best_crops": ["Wheat", "Rice", "Sugarcane", "Cotton"],
-                "characteristics": "Well-drained, fertile, suitable for most crops"
-            },
-            "clay": {
-                "best_crops": ["Rice", "Wheat", "Gram", "Cotton"],
-                "characteristics": "Water-retentive, good for water-loving crops"
-            },
-            "sandy": {
-                "best_crops": ["Millet", "Groundnut", "Watermelon", "Carrot"],
-                "characteristics": "Well-drained, warm quickly, suitable for root crops"
-            },
-            "loam": {
-                "best_crops": ["Most crops", "Vegetables", "Fruits"],
-                "characteristics": "Ideal soil - balanced drainage and fertility"
-            }
-        }
-        
+        soil_recommendations = agronomy.table("soil_crop_recommendations")
         if soil_type.lower() in soil_recommendations:
             soil_info = soil_recommendations[soil_type.lower()]
             response += f"🌱 **Soil-Specific Recommendations ({soil_type.title()}):**\n"
@@ -761,112 +812,7 @@ async def suggest_government_schemes_for_farming_goal(
         
         response = f"🏛️ **Government Schemes for: {farming_goal.replace('_', ' ').title()}**\n\n"
         
-        # Comprehensive scheme database organized by goals
-        scheme_database = {
-            "income_increase": [
-                {
-                    "name": "PM-KISAN",
-                    "benefit": "₹6,000 annual direct income support",
-                    "eligibility": "All landholding farmer families",
-                    "application": "https://pmkisan.gov.in",
-                    "documents": "Land records, Aadhaar, Bank account"
-                },
-                {
-                    "name": "Pradhan Mantri Fasal Bima Yojana (PMFBY)",
-                    "benefit": "Crop insurance with premium subsidy",
-                    "eligibility": "All farmers growing notified crops",
-                    "application": "https://pmfby.gov.in",
-                    "documents": "Land records, sowing certificate, Aadhaar"
-                },
-                {
-                    "name": "Kisan Credit Card (KCC)",
-                    "benefit": "Flexible credit up to ₹3 lakh at 4% interest",
-                    "eligibility": "Farmers with land ownership/tenancy",
-                    "application": "Nearest bank branch",
-                    "documents": "Land documents, Aadhaar, PAN"
-                }
-            ],
-            "fishiculture": [
-                {
-                    "name": "Blue Revolution - Fisheries Development",
-                    "benefit": "90% subsidy for pond construction (SC/ST), 60% for others",
-                    "eligibility": "Fish farmers with minimum 0.2 hectare water area",
-                    "application": "State Fisheries Department",
-                    "documents": "Land ownership, project report, caste certificate (if applicable)"
-                },
-                {
-                    "name": "Pradhan Mantri Matsya Sampada Yojana",
-                    "benefit": "Financial assistance for fish processing and marketing",
-                    "eligibility": "Fish farmers, SHGs, Cooperatives",
-                    "application": "Department of Fisheries",
-                    "documents": "Project proposal, land documents, registration certificates"
-                }
-            ],
-            "organic_farming": [
-                {
-                    "name": "Paramparagat Krishi Vikas Yojana (PKVY)",
-                    "benefit": "₹50,000 per hectare for organic farming promotion",
-                    "eligibility": "Farmers in clusters of 50 or more",
-                    "application": "Through FPOs or State Agriculture Department",
-                    "documents": "Land records, group formation certificate"
-                },
-                {
-                    "name": "Mission Organic Value Chain Development for North Eastern Region (MOVCDNER)",
-                    "benefit": "End-to-end support for organic farming",
-                    "eligibility": "Farmers in NE states",
-                    "application": "State implementing agencies",
-                    "documents": "Land ownership, organic conversion plan"
-                }
-            ],
-            "equipment": [
-                {
-                    "name": "Sub-Mission on Agricultural Mechanization (SMAM)",
-                    "benefit": "40-50% subsidy on farm equipment",
-                    "eligibility": "Small and marginal farmers get priority",
-                    "application": "State Agriculture Department",
-                    "documents": "Land records, income certificate, Aadhaar"
-                },
-                {
-                    "name": "Custom Hiring Centers (CHC)",
-                    "benefit": "Support for equipment rental business",
-                    "eligibility": "FPOs, SHGs, Cooperatives",
-                    "application": "District Collector office",
-                    "documents": "Business plan, registration documents"
-                }
-            ],
-            "water_management": [
-                {
-                    "name": "Pradhan Mantri Krishi Sinchayee Yojana (PMKSY)",
-                    "benefit": "Subsidies for micro-irrigation systems",
-                    "eligibility": "All farmers",
-                    "application": "State Water Resource Department",
-                    "documents": "Land ownership, water source details"
-                },
-                {
-                    "name": "Per Drop More Crop",
-                    "benefit": "90% subsidy for drip/sprinkler irrigation",
-                    "eligibility": "Small and marginal farmers",
-                    "application": "State Agriculture Department",
-                    "documents": "Land records, water availability certificate"
-                }
-            ],
-            "livestock": [
-                {
-                    "name": "National Livestock Mission",
-                    "benefit": "Subsidies for dairy, poultry, and goat farming",
-                    "eligibility": "Individual farmers, SHGs, FPOs",
-                    "application": "District Animal Husbandry office",
-                    "documents": "Land availability, veterinary certificate"
-                },
-                {
-                    "name": "Dairy Entrepreneurship Development Scheme (DEDS)",
-                    "benefit": "Back-ended capital subsidy for dairy ventures",
-                    "eligibility": "Individual entrepreneurs, SHGs",
-                    "application": "NABARD or implementing agencies",
-                    "documents": "Project report, land documents"
-                }
-            ]
-        }
+        scheme_database = agronomy.table("schemes_by_goal")
         
         # Find relevant schemes
         relevant_schemes = scheme_database.get(farming_goal.lower(), [])
@@ -0,0 +1,167 @@
+"""
+Farm Profile RPC for AI Farm Care Assistant
+Requests the farmer's saved farms (kept in the web client's localStorage) over
+the LiveKit data channel with correlation ids, waits for the matching reply and
+keeps the profiles in memory for the rest of the conversation
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from livekit import rtc
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FARM_DATA_TOPIC = "farm_data"
+FARM_RPC_TIMEOUT = 5.0
+SQ_METERS_PER_ACRE = 4046.86
+
+
+@dataclass(frozen=True)
+class FarmProfile:
+    """A farm saved on the My Farm page"""
+    farm_id: str
+    name: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    area_acres: Optional[float] = None
+    crop_type: Optional[str] = None
+    soil_type: Optional[str] = None
+    irrigation_type: Optional[str] = None
+    boundary: Tuple[Tuple[float, float], ...] = ()
+    notes: Optional[str] = None
+    is_active: bool = True
+
+    @classmethod
+    def from_client(cls, farm: Dict[str, Any]) -> "FarmProfile":
+        """Build from a farm object of the web client's farm store"""
+        center = farm.get("center") or {}
+        area = farm.get("totalArea")
+        if not area and farm.get("areaInSquareMeters"):
+            area = farm["areaInSquareMeters"] / SQ_METERS_PER_ACRE
+        return cls(
+            farm_id=str(farm.get("id", "")),
+            name=farm.get("name") or "My Farm",
+            latitude=center.get("lat"),
+            longitude=center.get("lng"),
+            area_acres=round(float(area), 2) if area else None,
+            crop_type=farm.get("cropType") or None,
+            soil_type=farm.get("soilType") or None,
+            irrigation_type=farm.get("irrigationType") or None,
+            boundary=tuple((point["lat"], point["lng"]) for point in farm.get("coordinates") or ()),
+            notes=farm.get("notes") or None,
+            is_active=farm.get("isActive", True),
+        )
+
+    @property
+    def has_location(self) -> bool:
+        return self.latitude is not None and self.longitude is not None
+
+
+@dataclass
+class FarmSnapshot:
+    """Farms returned by the web client and which one is selected"""
+    farms: List[FarmProfile] = field(default_factory=list)
+    selected_farm_id: Optional[str] = None
+    received_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def selected(self) -> Optional[FarmProfile]:
+        """Selected farm, else the first active one"""
+        for farm in self.farms:
+            if farm.farm_id == self.selected_farm_id:
+                return farm
+        active = [farm for farm in self.farms if farm.is_active]
+        return (active or self.farms or [None])[0]
+
+
+class FarmDataClient:
+    """Correlation-id request/response over the room's data channel"""
+
+    def __init__(self, room: rtc.Room, timeout: float = FARM_RPC_TIMEOUT):
+        self.room = room
+        self.timeout = timeout
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.snapshot: Optional[FarmSnapshot] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self.stats = {"requests": 0, "responses": 0, "timeouts": 0, "cache_hits": 0}
+        room.on("data_received", self._on_data)
+
+    def _on_data(self, packet: rtc.DataPacket):
+        """Resolve the pending request a farm_data_response belongs to"""
+        try:
+            message = json.loads(packet.data)
+        except (ValueError, TypeError):
+            return
+        if not isinstance(message, dict) or message.get("type") != "farm_data_response":
+            return
+
+        self.stats["responses"] += 1
+        snapshot = FarmSnapshot(
+            farms=[FarmProfile.from_client(farm) for farm in message.get("farms") or []],
+            selected_farm_id=message.get("selected_farm_id"),
+        )
+        # Unsolicited responses (the farmer edited a farm) refresh the cache too
+        self.snapshot = snapshot
+
+        future = self.pending.pop(message.get("request_id"), None)
+        if future and not future.done():
+            future.set_result(snapshot)
+
+    async def request(self, action: str) -> Optional[FarmSnapshot]:
+        """Send one farm_data_request and wait for its reply"""
+        request_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.stats["requests"] += 1
+        try:
+            payload = {"type": "farm_data_request", "action": action, "request_id": request_id}
+            await self.room.local_participant.publish_data(json.dumps(payload), reliable=True, topic=FARM_DATA_TOPIC)
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.warning(f"No farm data from the web client within {self.timeout}s")
+            return None
+        except Exception as e:
+            logger.error(f"Farm data request failed: {e}")
+            return None
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def get_snapshot(self, refresh: bool = False) -> Optional[FarmSnapshot]:
+        """Farm profiles, fetched from the web client once per conversation"""
+        if self.snapshot is not None and not refresh:
+            self.stats["cache_hits"] += 1
+            return self.snapshot
+
+        # Tools running in parallel share one round trip
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self.request("get_all_farms"))
+            self._inflight.add_done_callback(lambda _: setattr(self, "_inflight", None))
+        return await asyncio.shield(self._inflight)
+
+    async def get_selected_farm(self) -> Optional[FarmProfile]:
+        """The farm the farmer is working with"""
+        snapshot = await self.get_snapshot()
+        return snapshot.selected if snapshot else None
+
+
+# Global client instance (one agent session per worker process)
+farm_client = None
+
+def attach_farm_client(room: rtc.Room) -> FarmDataClient:
+    """Start listening for farm data replies in a room"""
+    global farm_client
+    farm_client = FarmDataClient(room)
+    return farm_client
+
+
+def get_farm_client() -> Optional[FarmDataClient]:
+    """The room's farm data client, or None outside a live session"""
+    return farm_client
@@ -0,0 +1,315 @@
+"""
+Camera Frame Sampler for AI Farm Care Assistant
+Watches the farmer's video track during a call, keeps only a few steady, sharp
+and visually new frames per minute (motion gate, blur check, perceptual-hash
+dedup) and turns them into cheap NumPy colour/lesion observations for diagnosis
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, asdict
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+import numpy as np
+from livekit import rtc
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Frames looked at per second; the rest are dropped before touching pixels
+INSPECT_FPS = 2.0
+# Hard cap on frames analyzed per rolling minute
+MAX_ANALYSES_PER_MINUTE = 6
+# Mean absolute luma change (0-255) above which the camera is still moving
+MOTION_THRESHOLD = 12.0
+# Variance of the Laplacian below which a frame is too blurry to read
+BLUR_THRESHOLD = 60.0
+# Hamming distance (of 64 bits) at which two frames show the same view
+DUPLICATE_DISTANCE = 10
+# Recent hashes a new frame is compared against
+HASH_HISTORY = 16
+# Observations older than this are not used for diagnosis
+OBSERVATION_MAX_AGE = 120
+
+# Minimum share of the frame that must be leaf tissue to report symptoms
+MIN_LEAF_AREA = 0.2
+# Share of leaf tissue above which a colour sign is reported as a symptom
+CHLOROSIS_SYMPTOM = 0.15
+LESION_SYMPTOM = 0.04
+WHITE_SYMPTOM = 0.05
+
+HASH_SIZE = 8
+DCT_SIZE = 32
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II basis"""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(DCT_SIZE)
+
+
+def downsample(image: np.ndarray, size: int) -> np.ndarray:
+    """Nearest-neighbour resize of the first two axes to about size x size"""
+    rows = np.linspace(0, image.shape[0] - 1, size).astype(int)
+    cols = np.linspace(0, image.shape[1] - 1, size).astype(int)
+    return image[rows][:, cols].astype(np.float32)
+
+
+def to_gray(rgb: np.ndarray) -> np.ndarray:
+    """Luma of an RGB image"""
+    return rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114
+
+
+def motion_score(previous: Optional[np.ndarray], current: np.ndarray) -> float:
+    """Mean absolute luma change between two equally sized thumbnails"""
+    if previous is None or previous.shape != current.shape:
+        return 0.0
+    return float(np.abs(current - previous).mean())
+
+
+def sharpness(gray: np.ndarray) -> float:
+    """Variance of the 4-neighbour Laplacian (low means blurry)"""
+    laplacian = (gray[1:-1, :-2] + gray[1:-1, 2:] + gray[:-2, 1:-1] + gray[2:, 1:-1]
+                 - 4 * gray[1:-1, 1:-1])
+    return float(laplacian.var())
+
+
+def perceptual_hash(gray: np.ndarray) -> int:
+    """64-bit DCT perceptual hash"""
+    small = downsample(gray, DCT_SIZE)
+    low = (_DCT @ small @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].flatten()
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits"""
+    return (a ^ b).bit_count()
+
+
+def leaf_features(rgb: np.ndarray) -> Dict[str, float]:
+    """Colour shares of a (downsampled) RGB frame and of its leaf tissue"""
+    pixels = rgb.astype(np.float32) / 255.0
+    r, g, b = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+    value = pixels.max(axis=-1)
+    chroma = value - pixels.min(axis=-1)
+    saturation = np.where(value > 0, chroma / np.maximum(value, 1e-6), 0)
+
+    safe = np.maximum(chroma, 1e-6)
+    hue = np.where(value == r, ((g - b) / safe) % 6,
+                   np.where(value == g, (b - r) / safe + 2, (r - g) / safe + 4)) * 60
+    hue = np.where(chroma > 0, hue, 0)
+
+    green = (hue >= 70) & (hue < 170) & (saturation > 0.2) & (value > 0.15)
+    yellow = (hue >= 40) & (hue < 70) & (saturation > 0.3) & (value > 0.4)
+    brown = ((hue < 40) | (hue >= 340)) & (saturation > 0.25) & (value > 0.1) & (value < 0.6)
+    white = (saturation < 0.15) & (value > 0.8)
+    dark = value < 0.15
+
+    total = float(value.size)
+    leaf = float(green.sum() + yellow.sum() + brown.sum())
+    return {
+        "leaf_area": leaf / total,
+        "green_fraction": float(green.sum()) / total,
+        "yellow_fraction": float(yellow.sum()) / total,
+        "brown_fraction": float(brown.sum()) / total,
+        "white_fraction": float(white.sum()) / total,
+        "dark_fraction": float(dark.sum()) / total,
+        "chlorosis_share": float(yellow.sum()) / leaf if leaf else 0.0,
+        "lesion_share": float(brown.sum()) / leaf if leaf else 0.0,
+    }
+
+
+@dataclass
+class FrameObservation:
+    """Colour and lesion measurements of one informative camera frame"""
+    timestamp: float
+    sharpness: float
+    frame_hash: int
+    leaf_area: float
+    green_fraction: float
+    yellow_fraction: float
+    brown_fraction: float
+    white_fraction: float
+    dark_fraction: float
+    chlorosis_share: float
+    lesion_share: float
+
+    def symptoms(self) -> List[str]:
+        """Symptom ids (see the symptom_terms table) suggested by the frame"""
+        if self.leaf_area < MIN_LEAF_AREA:
+            return []
+        found = []
+        if self.chlorosis_share >= CHLOROSIS_SYMPTOM:
+            found.append("yellowing")
+        if self.lesion_share >= LESION_SYMPTOM:
+            found.append("brown_spots")
+        if self.white_fraction >= WHITE_SYMPTOM:
+            found.append("white_patches")
+        return found
+
+    def summary(self) -> str:
+        """One-line description for tool responses"""
+        return (f"leaf area {self.leaf_area:.0%}, yellowing {self.chlorosis_share:.0%}, "
+                f"brown lesions {self.lesion_share:.0%}, white patches {self.white_fraction:.0%}")
+
+    def to_dict(self) -> Dict[str, float]:
+        """Plain dict for logging or the data channel"""
+        return asdict(self)
+
+
+class FrameSampler:
+    """Adaptive sampler that lets only informative frames reach analysis"""
+
+    def __init__(self, inspect_fps: float = INSPECT_FPS, max_per_minute: int = MAX_ANALYSES_PER_MINUTE):
+        self.inspect_interval = 1.0 / inspect_fps
+        self.max_per_minute = max_per_minute
+        self.last_inspected = float("-inf")
+        self.previous_thumbnail: Optional[np.ndarray] = None
+        self.recent_hashes: Deque[int] = deque(maxlen=HASH_HISTORY)
+        self.analysis_times: Deque[float] = deque()
+        self.observations: Deque[FrameObservation] = deque(maxlen=20)
+        self.stats = Counter()
+
+    def offer(self, gray: np.ndarray, load_rgb: Callable[[], np.ndarray],
+              timestamp: Optional[float] = None) -> Optional[FrameObservation]:
+        """Run one frame through the gates; the RGB image is only loaded if it passes"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        self.stats["received"] += 1
+        if timestamp - self.last_inspected < self.inspect_interval:
+            return None
+        self.last_inspected = timestamp
+        self.stats["inspected"] += 1
+
+        thumbnail = downsample(gray, 64)
+        moving = motion_score(self.previous_thumbnail, thumbnail) > MOTION_THRESHOLD
+        self.previous_thumbnail = thumbnail
+        if moving:
+            self.stats["moving"] += 1
+            return None
+
+        while self.analysis_times and timestamp - self.analysis_times[0] >= 60:
+            self.analysis_times.popleft()
+        if len(self.analysis_times) >= self.max_per_minute:
+            self.stats["throttled"] += 1
+            return None
+
+        frame_sharpness = sharpness(downsample(gray, 160))
+        if frame_sharpness < BLUR_THRESHOLD:
+            self.stats["blurry"] += 1
+            return None
+
+        frame_hash = perceptual_hash(gray)
+        if any(hamming(frame_hash, seen) <= DUPLICATE_DISTANCE for seen in self.recent_hashes):
+            self.stats["duplicate"] += 1
+            return None
+        self.recent_hashes.append(frame_hash)
+
+        features = leaf_features(downsample(load_rgb(), 120))
+        observation = FrameObservation(timestamp=timestamp, sharpness=frame_sharpness, frame_hash=frame_hash, **features)
+        self.analysis_times.append(timestamp)
+        self.observations.append(observation)
+        self.stats["analyzed"] += 1
+        return observation
+
+    def offer_frame(self, frame, timestamp: Optional[float] = None) -> Optional[FrameObservation]:
+        """Offer a LiveKit VideoFrame, reading luma straight from I420 planes when possible"""
+        width, height = frame.width, frame.height
+        packed = {
+            rtc.VideoBufferType.RGBA: (0, 1, 2), rtc.VideoBufferType.BGRA: (2, 1, 0),
+            rtc.VideoBufferType.ARGB: (1, 2, 3), rtc.VideoBufferType.ABGR: (3, 2, 1),
+        }
+
+        def load_rgb() -> np.ndarray:
+            if frame.type in packed:
+                pixels = np.frombuffer(frame.data, dtype=np.uint8)[:width * height * 4].reshape(height, width, 4)
+                return pixels[..., list(packed[frame.type])]
+            converted = frame if frame.type == rtc.VideoBufferType.RGB24 else frame.convert(rtc.VideoBufferType.RGB24)
+            return np.frombuffer(converted.data, dtype=np.uint8)[:width * height * 3].reshape(height, width, 3)
+
+        if frame.type in (rtc.VideoBufferType.I420, rtc.VideoBufferType.I420A, rtc.VideoBufferType.NV12):
+            gray = np.frombuffer(frame.get_plane(0), dtype=np.uint8)[:width * height].reshape(height, width)
+            return self.offer(gray, load_rgb, timestamp)
+
+        rgb = load_rgb()
+        return self.offer(to_gray(rgb.astype(np.float32)), lambda: rgb, timestamp)
+
+    async def run(self, track):
+        """Consume a remote video track until it ends"""
+        # capacity=1 keeps only the newest frame, so a slow consumer never builds a backlog
+        stream = rtc.VideoStream(track, capacity=1)
+        logger.info(f"Frame sampler watching video track {track.sid}")
+        try:
+            async for event in stream:
+                observation = self.offer_frame(event.frame)
+                if observation:
+                    logger.info(f"Camera observation: {observation.summary()}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Frame sampler stopped: {e}")
+        finally:
+            await stream.aclose()
+
+    def latest(self, max_age: float = OBSERVATION_MAX_AGE) -> Optional[FrameObservation]:
+        """Most recent observation, if still fresh"""
+        if not self.observations:
+            return None
+        observation = self.observations[-1]
+        return observation if time.monotonic() - observation.timestamp <= max_age else None
+
+
+class CameraFeed:
+    """Frame samplers of one call, one per video track so each camera's motion and
+    duplicates are judged against its own previous frames"""
+
+    def __init__(self):
+        self.samplers: Dict[str, FrameSampler] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def sampler_for(self, track_sid: str) -> FrameSampler:
+        """The sampler of one track, created on first use"""
+        if track_sid not in self.samplers:
+            self.samplers[track_sid] = FrameSampler()
+        return self.samplers[track_sid]
+
+    def watch(self, track):
+        """Sample a remote video track until it ends"""
+        if track.kind != rtc.TrackKind.KIND_VIDEO or track.sid in self.samplers:
+            return
+        task = asyncio.create_task(self.sampler_for(track.sid).run(track))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def latest(self, max_age: float = OBSERVATION_MAX_AGE) -> Optional[FrameObservation]:
+        """Most recent fresh observation from any of the call's cameras"""
+        fresh = [observation for observation in (sampler.latest(max_age) for sampler in self.samplers.values())
+                 if observation]
+        return max(fresh, key=lambda observation: observation.timestamp, default=None)
+
+    def close(self):
+        """Stop sampling every track"""
+        for task in list(self._tasks):
+            task.cancel()
+
+
+def attach_frame_sampler(room, session) -> CameraFeed:
+    """Sample every remote video track the room subscribes to into the session's camera feed"""
+    feed = CameraFeed()
+    session.camera = feed
+
+    room.on("track_subscribed", lambda track, publication, participant: feed.watch(track))
+    room.on("disconnected", lambda *args: feed.close())
+    for participant in room.remote_participants.values():
+        for publication in participant.track_publications.values():
+            if publication.track is not None:
+                feed.watch(publication.track)
+    return feed
@@ -0,0 +1,345 @@
+"""
+Bulk Knowledge Import for AI Farm Care Assistant
+Loads corpora of extension bulletins, KVK advisories and similar documents
+(JSONL, CSV, Markdown or plain text) into the knowledge base. Files are parsed in
+a process pool while earlier ones are embedded in large batches and written in
+large transactions; finished files are recorded in the database so an
+interrupted import resumes where it stopped.
+
+Usage: python -m rag_system import <file or directory>... [--db farm_knowledge.db]
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = {".jsonl", ".csv", ".md", ".markdown", ".txt"}
+# Documents embedded and committed together
+IMPORT_BATCH_SIZE = 512
+DEFAULT_CATEGORY = "techniques"
+# Record fields holding the document text, title and date, in order of preference
+CONTENT_FIELDS = ("content", "text", "body", "advisory", "description")
+TITLE_FIELDS = ("title", "heading", "subject", "name")
+DATE_FIELDS = ("date", "published", "issued", "timestamp")
+# Records shorter than this are headers, empty rows or stray lines
+MIN_DOCUMENT_CHARS = 20
+# Top-level Markdown headings start a new document
+_MARKDOWN_HEADING = re.compile(r"^(#{1,2})\s+(.+?)\s*#*\s*$")
+
+
+def find_corpus_files(paths: Iterable[str]) -> List[Path]:
+    """Supported files among the given files and directories, in a stable order"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in SUPPORTED_EXTENSIONS))
+        elif path.is_file():
+            files.append(path)
+        else:
+            logger.warning(f"No such file or directory: {path}")
+    return files
+
+
+def document_id(content: str) -> str:
+    """Content-derived id, so re-importing a document replaces nothing and stores nothing twice"""
+    normalized = " ".join(content.split()).lower()
+    return "import_" + hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def _first(record: Dict[str, Any], fields) -> str:
+    for field in fields:
+        value = record.get(field)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def _parse_date(value: str) -> Optional[str]:
+    """ISO timestamp of a record date, if it is one"""
+    if not value:
+        return None
+    for parse in (datetime.fromisoformat, lambda v: datetime.strptime(v, "%d-%m-%Y"),
+                  lambda v: datetime.strptime(v, "%d/%m/%Y")):
+        try:
+            return parse(value.strip()).isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def make_document(content: str, path: Path, title: str = "", extra: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Plain (picklable) document record; None if there is no real text"""
+    content = content.strip()
+    if len(content) < MIN_DOCUMENT_CHARS:
+        return None
+    extra = dict(extra or {})
+    title = title or content.split("\n", 1)[0][:100]
+    metadata = {
+        key: value for key, value in extra.items()
+        if key not in CONTENT_FIELDS + ("id", "category", "source") and isinstance(value, (str, int, float, bool))
+    }
+    metadata.update({"title": title, "summary": title, "file": path.name, "type": "imported"})
+    return {
+        "id": str(extra["id"]) if extra.get("id") else document_id(content),
+        "content": content,
+        "metadata": metadata,
+        "category": str(extra.get("category") or ""),
+        "source": str(extra.get("source") or ""),
+        "timestamp": _parse_date(_first(extra, DATE_FIELDS)),
+    }
+
+
+def _records_to_documents(records: Iterable[Dict[str, Any]], path: Path) -> List[Dict[str, Any]]:
+    documents = []
+    for record in records:
+        document = make_document(_first(record, CONTENT_FIELDS), path, _first(record, TITLE_FIELDS), record)
+        if document:
+            documents.append(document)
+    return documents
+
+
+def parse_jsonl(path: Path) -> List[Dict[str, Any]]:
+    """One document per JSON object line; malformed lines are skipped"""
+    records = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"{path.name}:{line_number}: not valid JSON, skipped")
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+    return _records_to_documents(records, path)
+
+
+def parse_csv(path: Path) -> List[Dict[str, Any]]:
+    """One document per row; the header names the fields"""
+    with open(path, encoding="utf-8-sig", errors="replace", newline="") as f:
+        rows = [{(key or "").strip().lower(): value for key, value in row.items()} for row in csv.DictReader(f)]
+    return _records_to_documents(rows, path)
+
+
+def parse_markdown(path: Path) -> List[Dict[str, Any]]:
+    """One document per top-level section, titled by its heading"""
+    documents = []
+    title, lines = "", []
+
+    def flush():
+        document = make_document("\n".join(lines), path, title)
+        if document:
+            documents.append(document)
+
+    for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        heading = _MARKDOWN_HEADING.match(line)
+        if heading:
+            flush()
+            title, lines = heading.group(2), []
+        else:
+            lines.append(line)
+    flush()
+    return documents
+
+
+def parse_text(path: Path) -> List[Dict[str, Any]]:
+    """The whole file as one document (long ones are chunked by the knowledge base)"""
+    document = make_document(path.read_text(encoding="utf-8", errors="replace"), path)
+    return [document] if document else []
+
+
+PARSERS: Dict[str, Callable[[Path], List[Dict[str, Any]]]] = {
+    ".jsonl": parse_jsonl,
+    ".csv": parse_csv,
+    ".md": parse_markdown,
+    ".markdown": parse_markdown,
+    ".txt": parse_text,
+}
+
+
+def parse_file(path: str) -> List[Dict[str, Any]]:
+    """Documents of one corpus file (runs in a worker process)"""
+    path = Path(path)
+    parser = PARSERS.get(path.suffix.lower())
+    if parser is None:
+        raise ValueError(f"Unsupported file type: {path.suffix}")
+    return parser(path)
+
+
+class ImportLedger:
+    """Files fully imported into a knowledge base database, keyed by path, size and mtime"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        conn = sqlite3.connect(db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS knowledge_imports (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime REAL,
+                documents INTEGER,
+                imported_at DATETIME
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def is_done(self, path: Path) -> bool:
+        stat = path.stat()
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute("SELECT size, mtime FROM knowledge_imports WHERE path = ?", (str(path.resolve()),)).fetchone()
+        conn.close()
+        return row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime
+
+    def mark_done(self, files: List[tuple]):
+        """Record (path, document count) pairs as imported"""
+        now = datetime.now()
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany(
+            "INSERT OR REPLACE INTO knowledge_imports (path, size, mtime, documents, imported_at) VALUES (?, ?, ?, ?, ?)",
+            [(str(path.resolve()), path.stat().st_size, path.stat().st_mtime, count, now) for path, count in files],
+        )
+        conn.commit()
+        conn.close()
+
+    def reset(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DELETE FROM knowledge_imports")
+        conn.commit()
+        conn.close()
+
+
+async def import_corpus(paths: Iterable[str], knowledge_base, workers: Optional[int] = None,
+                        batch_size: int = IMPORT_BATCH_SIZE, category: str = DEFAULT_CATEGORY,
+                        source: Optional[str] = None, resume: bool = True,
+                        progress: Callable[[str], None] = print) -> Dict[str, int]:
+    """Import corpus files into the knowledge base; returns counts of files and documents"""
+    from rag_system import RAGDocument
+
+    ledger = ImportLedger(knowledge_base.db_path)
+    if not resume:
+        ledger.reset()
+    files = find_corpus_files(paths)
+    pending = [path for path in files if not (resume and ledger.is_done(path))]
+    stats = {"files": len(files), "skipped_files": len(files) - len(pending), "parsed": 0,
+             "imported": 0, "duplicates": 0, "failed_files": 0}
+    if stats["skipped_files"]:
+        progress(f"⏭️ {stats['skipped_files']} files already imported")
+    if not pending:
+        return stats
+
+    start = time.monotonic()
+    seen = set()
+    buffer: List[RAGDocument] = []
+    # Files whose documents are all in the buffer; recorded once the buffer is committed
+    waiting: List[tuple] = []
+
+    async def flush():
+        for i in range(0, len(buffer), batch_size):
+            batch = buffer[i:i + batch_size]
+            if await knowledge_base.add_documents(batch) != len(batch):
+                raise RuntimeError("knowledge base rejected a batch; rerun the import to resume")
+            stats["imported"] += len(batch)
+        buffer.clear()
+        ledger.mark_done(waiting)
+        waiting.clear()
+
+    async def parsed(path: Path, future: asyncio.Future):
+        try:
+            return path, await future, None
+        except Exception as e:
+            return path, [], e
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Every file is queued before embedding starts, so workers parse while the model runs
+        jobs = [parsed(path, asyncio.wrap_future(pool.submit(parse_file, str(path)))) for path in pending]
+        for done, job in enumerate(asyncio.as_completed(jobs), 1):
+            path, documents, error = await job
+            if error is not None:
+                stats["failed_files"] += 1
+                logger.error(f"Could not parse {path}: {error}")
+                continue
+            stats["parsed"] += len(documents)
+            for record in documents:
+                if record["id"] in seen or knowledge_base.has_document(record["id"]):
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(record["id"])
+                buffer.append(RAGDocument(
+                    id=record["id"],
+                    content=record["content"],
+                    metadata=record["metadata"],
+                    timestamp=datetime.fromisoformat(record["timestamp"]) if record["timestamp"] else None,
+                    source=record["source"] or source or f"import:{path.name}",
+                    category=record["category"] or category,
+                ))
+            waiting.append((path, len(documents)))
+            if len(buffer) >= batch_size:
+                await flush()
+            rate = (stats["imported"] + len(buffer)) / max(time.monotonic() - start, 1e-9)
+            progress(f"[{done}/{len(pending)} files] {stats['imported'] + len(buffer)} documents read, "
+                     f"{stats['imported']} stored, {stats['duplicates']} already present ({rate:.0f} docs/s)")
+        await flush()
+
+    return stats
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m rag_system", description="Knowledge base maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="Import JSONL, CSV, Markdown or text corpora")
+    importer.add_argument("paths", nargs="+", help="Files or directories to import")
+    importer.add_argument("--db", default="farm_knowledge.db", help="Knowledge base database (default: %(default)s)")
+    importer.add_argument("--category", default=DEFAULT_CATEGORY, help="Category for records without one (default: %(default)s)")
+    importer.add_argument("--source", help="Source for records without one (default: import:<file name>)")
+    importer.add_argument("--workers", type=int, default=os.cpu_count(), help="Parser processes (default: CPU count)")
+    importer.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Documents per transaction (default: %(default)s)")
+    importer.add_argument("--restart", action="store_true", help="Re-read files that were already imported")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    from rag_system import KnowledgeBase
+
+    knowledge_base = KnowledgeBase(db_path=args.db)
+    if knowledge_base.model is None:
+        print("❌ Embedding model could not be loaded", file=sys.stderr)
+        return 1
+
+    started = time.monotonic()
+    try:
+        stats = asyncio.run(import_corpus(
+            args.paths, knowledge_base, workers=args.workers, batch_size=args.batch_size,
+            category=args.category, source=args.source, resume=not args.restart,
+            progress=lambda line: print(line, flush=True),
+        ))
+    except KeyboardInterrupt:
+        print("⏸️ Interrupted; rerun the same command to resume", file=sys.stderr)
+        return 130
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    print(f"✅ Imported {stats['imported']} documents from {stats['files'] - stats['skipped_files']} files "
+          f"in {time.monotonic() - started:.1f}s ({stats['duplicates']} already present, "
+          f"{stats['failed_files']} files failed)")
+    return 0 if not stats["failed_files"] else 1
@@ -0,0 +1,584 @@
+"""
+Market Price Time-Series Store for AI Farm Care Assistant
+Keeps the full history of scraped mandi prices in SQLite and serves numeric
+trend/aggregate queries from NumPy arrays held in memory per commodity
+"""
+
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+import numpy as np
+
+from commodity_resolver import canonical_commodity_id, resolve_commodity_id
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Relative change (over the analysed window) below which a price is "stable"
+TREND_STABLE_THRESHOLD = 0.01
+
+
+def normalize_commodity(name: str) -> str:
+    """Normalize a commodity name into the key used by the store"""
+    return " ".join((name or "").lower().split())
+
+
+def commodity_key(name: str) -> str:
+    """Store key for a scraped commodity name: the canonical id on an exact or alias
+    match, otherwise the normalized name (never a fuzzy guess, which would merge
+    different commodities into one price series)"""
+    return canonical_commodity_id(name or "") or normalize_commodity(name)
+
+
+def _parse_price_date(item: Dict[str, Any]) -> date:
+    """Work out the trading date of a scraped record"""
+    arrival = item.get("arrivalDate") or item.get("date")
+    if arrival:
+        for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y"):
+            try:
+                return datetime.strptime(str(arrival), fmt).date()
+            except ValueError:
+                continue
+
+    scraped_at = item.get("scrapedAt")
+    if scraped_at:
+        try:
+            return datetime.fromisoformat(str(scraped_at).replace("Z", "+00:00")).date()
+        except ValueError:
+            pass
+
+    return date.today()
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """Convert a scraped price field into a float, ignoring junk"""
+    try:
+        if value is None or value == "":
+            return None
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class CommoditySeries:
+    """Columnar in-memory view of every price observation for one commodity"""
+    commodity: str
+    dates: np.ndarray = field(default_factory=lambda: np.empty(0, dtype="datetime64[D]"))
+    prices: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    market_codes: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    state_codes: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    markets: List[str] = field(default_factory=list)
+    states: List[str] = field(default_factory=list)
+    unit: str = "₹/quintal"
+
+    def mask(self, state: Optional[str] = None, market: Optional[str] = None,
+             since: Optional[date] = None) -> np.ndarray:
+        """Boolean row mask for the given filters"""
+        selected = np.ones(len(self.prices), dtype=bool)
+
+        if state:
+            state_lower = state.lower()
+            codes = [i for i, s in enumerate(self.states) if state_lower in s.lower()]
+            selected &= np.isin(self.state_codes, codes)
+
+        if market:
+            market_lower = market.lower()
+            codes = [i for i, m in enumerate(self.markets) if market_lower in m.lower()]
+            selected &= np.isin(self.market_codes, codes)
+
+        if since is not None:
+            selected &= self.dates >= np.datetime64(since, "D")
+
+        return selected
+
+
+@dataclass
+class MarketAggregate:
+    """Precomputed market summary for one commodity in one state (or all India)"""
+    commodity: str
+    state: str
+    unit: str
+    latest_date: str
+    latest_price: float
+    change_7d: Optional[float]
+    change_30d: Optional[float]
+    cheapest_market: str
+    cheapest_price: float
+    costliest_market: str
+    costliest_price: float
+    markets: int
+
+
+def _percent_change(dates: np.ndarray, prices: np.ndarray, latest: np.datetime64,
+                    latest_price: float, days: int) -> Optional[float]:
+    """Percent change from the last observed day at least `days` before `latest`"""
+    cutoff = latest - np.timedelta64(days, "D")
+    earlier = dates <= cutoff
+    if not earlier.any():
+        return None
+
+    reference_day = dates[earlier].max()
+    reference_price = float(prices[dates == reference_day].mean())
+    if not reference_price:
+        return None
+    return (latest_price - reference_price) / reference_price * 100
+
+
+def _collapse_sources(dates: np.ndarray, prices: np.ndarray,
+                      market_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """One row per (market, date), averaging the quotes of different sources, so a
+    market is neither counted twice nor ranked against itself"""
+    pairs = np.stack([market_codes.astype(np.int64), dates.astype(np.int64)])
+    unique_pairs, inverse = np.unique(pairs, axis=1, return_inverse=True)
+    inverse = inverse.ravel()
+    if unique_pairs.shape[1] == prices.size:
+        return dates, prices, market_codes
+
+    means = np.bincount(inverse, weights=prices) / np.bincount(inverse)
+    return unique_pairs[1].astype("datetime64[D]"), means, unique_pairs[0].astype(market_codes.dtype)
+
+
+def _compute_aggregate(series: CommoditySeries, selected: np.ndarray, state_label: str) -> Optional[MarketAggregate]:
+    """Summarize the selected rows of a commodity series"""
+    if not selected.any():
+        return None
+
+    dates, prices, market_codes = _collapse_sources(series.dates[selected], series.prices[selected],
+                                                    series.market_codes[selected])
+
+    latest = dates.max()
+    latest_price = float(prices[dates == latest].mean())
+
+    # Most recent observation per market: sort by (market, date) and take each group's last row
+    order = np.lexsort((dates, market_codes))
+    sorted_codes = market_codes[order]
+    last_rows = order[np.append(sorted_codes[1:] != sorted_codes[:-1], True)]
+    market_prices = prices[last_rows]
+    cheapest = last_rows[int(np.argmin(market_prices))]
+    costliest = last_rows[int(np.argmax(market_prices))]
+
+    return MarketAggregate(
+        commodity=series.commodity,
+        state=state_label,
+        unit=series.unit,
+        latest_date=str(latest),
+        latest_price=latest_price,
+        change_7d=_percent_change(dates, prices, latest, latest_price, 7),
+        change_30d=_percent_change(dates, prices, latest, latest_price, 30),
+        cheapest_market=series.markets[int(market_codes[cheapest])],
+        cheapest_price=float(prices[cheapest]),
+        costliest_market=series.markets[int(market_codes[costliest])],
+        costliest_price=float(prices[costliest]),
+        markets=int(last_rows.size)
+    )
+
+
+class MarketPriceStore:
+    """Historical market price store with vectorized aggregate queries"""
+
+    def __init__(self, db_path: str = "market_prices.db"):
+        self.db_path = db_path
+        self.series: Dict[str, CommoditySeries] = {}
+        # (commodity key, lower-cased state or "" for all India) -> summary
+        self.aggregates: Dict[Tuple[str, str], MarketAggregate] = {}
+        self._lock = threading.Lock()
+
+        # Initialize database
+        self._init_database()
+
+        # Load existing history into memory
+        self._load_series()
+
+    def _init_database(self):
+        """Initialize SQLite table and indexes for price history"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS market_prices (
+                    commodity TEXT NOT NULL,
+                    commodity_name TEXT,
+                    market TEXT NOT NULL,
+                    state TEXT,
+                    price_date DATE NOT NULL,
+                    price REAL NOT NULL,
+                    min_price REAL,
+                    max_price REAL,
+                    modal_price REAL,
+                    unit TEXT,
+                    source TEXT NOT NULL DEFAULT '',
+                    scraped_at DATETIME,
+                    PRIMARY KEY (commodity, market, price_date, source)
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_market_prices_commodity_market_date
+                ON market_prices (commodity, market, price_date)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_market_prices_commodity_state_date
+                ON market_prices (commodity, state, price_date)
+            ''')
+
+            # Re-key history stored while ingest still fuzzy-matched names
+            cursor.execute("SELECT DISTINCT commodity, commodity_name FROM market_prices")
+            rekeyed = [(commodity_key(name), key, name) for key, name in cursor.fetchall()
+                       if name and commodity_key(name) != key]
+            if rekeyed:
+                cursor.executemany('''
+                    UPDATE OR REPLACE market_prices SET commodity = ?
+                    WHERE commodity = ? AND commodity_name = ?
+                ''', rekeyed)
+                logger.info(f"Re-keyed price history for {len(rekeyed)} commodity names")
+
+            conn.commit()
+            conn.close()
+            logger.info("Market price database initialized")
+
+        except Exception as e:
+            logger.error(f"Error initializing market price database: {e}")
+
+    def _load_series(self, commodities: Optional[Iterable[str]] = None):
+        """Build the in-memory arrays from SQLite (all or selected commodities)"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            query = '''
+                SELECT commodity, commodity_name, market, state, price_date, price, unit
+                FROM market_prices
+            '''
+            params: List[Any] = []
+            if commodities is not None:
+                keys = list(commodities)
+                if not keys:
+                    conn.close()
+                    return
+                query += f" WHERE commodity IN ({','.join('?' for _ in keys)})"
+                params = keys
+            query += " ORDER BY commodity, price_date"
+
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            conn.close()
+
+            grouped: Dict[str, List[tuple]] = {}
+            for row in rows:
+                grouped.setdefault(row[0], []).append(row)
+
+            built = {key: self._build_series(key, key_rows) for key, key_rows in grouped.items()}
+
+            aggregates = {}
+            for key, series in built.items():
+                aggregates.update(self._build_aggregates(key, series))
+
+            with self._lock:
+                if commodities is None:
+                    self.series = built
+                    self.aggregates = aggregates
+                else:
+                    self.series.update(built)
+                    self.aggregates = {
+                        agg_key: agg for agg_key, agg in self.aggregates.items()
+                        if agg_key[0] not in built
+                    }
+                    self.aggregates.update(aggregates)
+
+            logger.info(f"Loaded price history for {len(built)} commodities")
+
+        except Exception as e:
+            logger.error(f"Error loading market price history: {e}")
+
+    @staticmethod
+    def _build_series(key: str, rows: List[tuple]) -> CommoditySeries:
+        """Convert SQLite rows for one commodity into a CommoditySeries"""
+        market_index: Dict[str, int] = {}
+        state_index: Dict[str, int] = {}
+        market_codes = np.empty(len(rows), dtype=np.int32)
+        state_codes = np.empty(len(rows), dtype=np.int32)
+
+        for i, row in enumerate(rows):
+            market_codes[i] = market_index.setdefault(row[2], len(market_index))
+            state_codes[i] = state_index.setdefault(row[3] or "Unknown", len(state_index))
+
+        return CommoditySeries(
+            commodity=rows[-1][1] or key.title(),
+            dates=np.array([row[4] for row in rows], dtype="datetime64[D]"),
+            prices=np.array([row[5] for row in rows], dtype=np.float64),
+            market_codes=market_codes,
+            state_codes=state_codes,
+            markets=list(market_index),
+            states=list(state_index),
+            unit=rows[-1][6] or "₹/quintal"
+        )
+
+    @staticmethod
+    def _build_aggregates(key: str, series: CommoditySeries) -> Dict[Tuple[str, str], MarketAggregate]:
+        """Precompute the all-India and per-state summaries for one commodity"""
+        aggregates = {}
+
+        overall = _compute_aggregate(series, np.ones(len(series.prices), dtype=bool), "All India")
+        if overall:
+            aggregates[(key, "")] = overall
+
+        for code, state in enumerate(series.states):
+            aggregate = _compute_aggregate(series, series.state_codes == code, state)
+            if aggregate:
+                aggregates[(key, state.lower())] = aggregate
+
+        return aggregates
+
+    def ingest_records(self, records: List[Dict[str, Any]], source: str = "") -> int:
+        """Store scraped market price records, keeping history across scrapes"""
+        try:
+            rows = []
+            for item in records:
+                commodity_name = item.get("commodity")
+                price = _to_float(item.get("currentPrice", item.get("modalPrice")))
+                if not commodity_name or price is None:
+                    continue
+
+                rows.append((
+                    commodity_key(commodity_name),
+                    commodity_name,
+                    item.get("market") or "Unknown",
+                    item.get("state") or "Unknown",
+                    _parse_price_date(item).isoformat(),
+                    price,
+                    _to_float(item.get("minPrice")),
+                    _to_float(item.get("maxPrice")),
+                    _to_float(item.get("modalPrice")),
+                    item.get("unit") or "₹/quintal",
+                    item.get("scrapedFrom") or source,
+                    item.get("scrapedAt") or datetime.now().isoformat()
+                ))
+
+            if not rows:
+                return 0
+
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT OR REPLACE INTO market_prices
+                (commodity, commodity_name, market, state, price_date, price,
+                 min_price, max_price, modal_price, unit, source, scraped_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+            conn.close()
+
+            # Refresh only the commodities that changed
+            self._load_series({row[0] for row in rows})
+
+            logger.info(f"Stored {len(rows)} market price records")
+            return len(rows)
+
+        except Exception as e:
+            logger.error(f"Error storing market price records: {e}")
+            return 0
+
+    def lookup_key(self, commodity: str) -> str:
+        """Store key for a queried name: an exact match first, then a confident
+        fuzzy match for spoken or misspelled names"""
+        key = commodity_key(commodity)
+        if key in self.series:
+            return key
+        return resolve_commodity_id(commodity or "") or key
+
+    def get_series(self, commodity: str) -> Optional[CommoditySeries]:
+        """Get the in-memory series for a commodity"""
+        return self.series.get(self.lookup_key(commodity))
+
+    def get_aggregate(self, commodity: str, state: Optional[str] = None) -> Optional[MarketAggregate]:
+        """Precomputed summary for a commodity, nationally or in one state"""
+        state_key = " ".join(state.lower().split()) if state else ""
+        return self.aggregates.get((self.lookup_key(commodity), state_key))
+
+    def get_state_aggregates(self, commodity: str) -> List[MarketAggregate]:
+        """Precomputed per-state summaries for a commodity"""
+        key = self.lookup_key(commodity)
+        series = self.series.get(key)
+        if series is None:
+            return []
+        return [self.aggregates[(key, state.lower())] for state in series.states
+                if (key, state.lower()) in self.aggregates]
+
+    def latest_aggregates(self, state: Optional[str] = None) -> List[MarketAggregate]:
+        """Precomputed summaries for every commodity, nationally or in one state"""
+        return [agg for agg in (self.get_aggregate(key, state) for key in self.series) if agg]
+
+    def list_commodities(self) -> List[str]:
+        """Display names of all commodities with price history"""
+        return sorted(series.commodity for series in self.series.values())
+
+    def price_stats(self, commodity: str, state: Optional[str] = None,
+                    market: Optional[str] = None, days: Optional[int] = None) -> Dict[str, Any]:
+        """Min/max/median/mean of prices across the matching markets"""
+        series = self.get_series(commodity)
+        if series is None:
+            return {"success": False, "error": f"No price history for {commodity}"}
+
+        since = date.today() - timedelta(days=days) if days else None
+        selected = series.mask(state, market, since)
+        prices = series.prices[selected]
+
+        if prices.size == 0:
+            return {"success": False, "error": f"No matching prices for {commodity}"}
+
+        dates = series.dates[selected]
+        latest_date = dates.max()
+        latest_prices = prices[dates == latest_date]
+
+        return {
+            "success": True,
+            "commodity": series.commodity,
+            "unit": series.unit,
+            "count": int(prices.size),
+            "min": float(prices.min()),
+            "max": float(prices.max()),
+            "median": float(np.median(prices)),
+            "mean": float(prices.mean()),
+            "latest_date": str(latest_date),
+            "latest_mean": float(latest_prices.mean()),
+            "markets": int(np.unique(series.market_codes[selected]).size)
+        }
+
+    def daily_average(self, commodity: str, state: Optional[str] = None,
+                      market: Optional[str] = None, days: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Average price per calendar day across matching markets (gaps are NaN)"""
+        series = self.get_series(commodity)
+        empty = {"dates": np.empty(0, dtype="datetime64[D]"), "prices": np.empty(0)}
+        if series is None:
+            return empty
+
+        since = date.today() - timedelta(days=days) if days else None
+        selected = series.mask(state, market, since)
+        if not selected.any():
+            return empty
+
+        dates = series.dates[selected]
+        prices = series.prices[selected]
+
+        start = dates.min()
+        offsets = (dates - start).astype(np.int64)
+        length = int(offsets.max()) + 1
+
+        sums = np.bincount(offsets, weights=prices, minlength=length)
+        counts = np.bincount(offsets, minlength=length)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            averages = np.where(counts > 0, sums / counts, np.nan)
+
+        return {
+            "dates": start + np.arange(length).astype("timedelta64[D]"),
+            "prices": averages,
+            "sums": sums,
+            "counts": counts
+        }
+
+    def rolling_average(self, commodity: str, window_days: int = 7, state: Optional[str] = None,
+                        market: Optional[str] = None, days: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Rolling mean of prices over a calendar-day window"""
+        daily = self.daily_average(commodity, state, market, days)
+        if daily["prices"].size == 0:
+            return daily
+
+        window = max(1, int(window_days))
+        sum_cumulative = np.concatenate(([0.0], np.cumsum(daily["sums"])))
+        count_cumulative = np.concatenate(([0], np.cumsum(daily["counts"])))
+
+        upper = np.arange(1, daily["sums"].size + 1)
+        lower = np.maximum(upper - window, 0)
+        window_sums = sum_cumulative[upper] - sum_cumulative[lower]
+        window_counts = count_cumulative[upper] - count_cumulative[lower]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rolling = np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+        return {"dates": daily["dates"], "prices": rolling}
+
+    def price_trend(self, commodity: str, state: Optional[str] = None,
+                    market: Optional[str] = None, days: int = 30) -> Dict[str, Any]:
+        """Fit a linear trend to daily average prices and classify the direction"""
+        daily = self.daily_average(commodity, state, market, days)
+        observed = ~np.isnan(daily["prices"])
+
+        if observed.sum() < 2:
+            return {
+                "success": False,
+                "error": f"Not enough price history to judge the trend for {commodity}"
+            }
+
+        x = np.flatnonzero(observed).astype(np.float64)
+        y = daily["prices"][observed]
+        slope, intercept = np.polyfit(x, y, 1)
+
+        span_days = x[-1] - x[0]
+        baseline = float(y.mean())
+        change_percent = (slope * span_days / baseline * 100) if baseline else 0.0
+
+        if abs(change_percent) < TREND_STABLE_THRESHOLD * 100:
+            direction = "stable"
+        elif change_percent > 0:
+            direction = "rising"
+        else:
+            direction = "falling"
+
+        return {
+            "success": True,
+            "commodity": self.get_series(commodity).commodity,
+            "state": state,
+            "direction": direction,
+            "change_percent": float(change_percent),
+            "slope_per_day": float(slope),
+            "first_price": float(y[0]),
+            "latest_price": float(y[-1]),
+            "days_observed": int(observed.sum()),
+            "from_date": str(daily["dates"][int(x[0])]),
+            "to_date": str(daily["dates"][int(x[-1])])
+        }
+
+    def compare_states(self, commodity: str, days: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Median price per state for a commodity, cheapest first"""
+        series = self.get_series(commodity)
+        if series is None:
+            return []
+
+        since = date.today() - timedelta(days=days) if days else None
+        selected = series.mask(since=since)
+        prices = series.prices[selected]
+        codes = series.state_codes[selected]
+
+        order = np.argsort(codes, kind="stable")
+        codes_sorted = codes[order]
+        prices_sorted = prices[order]
+        unique_codes, starts = np.unique(codes_sorted, return_index=True)
+
+        results = []
+        for code, group in zip(unique_codes, np.split(prices_sorted, starts[1:])):
+            results.append({
+                "state": series.states[int(code)],
+                "median": float(np.median(group)),
+                "min": float(group.min()),
+                "max": float(group.max()),
+                "count": int(group.size)
+            })
+
+        results.sort(key=lambda x: x["median"])
+        return results
+
+
+# Global price store instance
+price_store = None
+
+def get_price_store() -> MarketPriceStore:
+    """Get or create the global market price store"""
+    global price_store
+    if price_store is None:
+        price_store = MarketPriceStore()
+    return price_store
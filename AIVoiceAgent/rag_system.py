@@ -7,7 +7,7 @@ import json
 import logging
 import os
 import requests
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, Hashable, List, Any, Optional, Union
 from datetime import datetime, timedelta
 import asyncio
 import aiohttp
@@ -21,11 +21,60 @@ import faiss
 import pickle
 from duckduckgo_search import DDGS
 import re
+import threading
+from collections import OrderedDict
+
+from market_store import get_price_store
+from result_dedup import dedupe_results
+from text_chunker import DocumentChunker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Share of a web result's relevance taken from embedding similarity (the rest is lexical)
+RERANK_WEIGHT = 0.7
+# Recent query embeddings kept so KB search and reranking encode a question once
+QUERY_EMBEDDING_CACHE_SIZE = 256
+# Chunks fetched per requested result, so hits on one document still fill k results
+SEARCH_OVERSAMPLE = 4
+# Write-behind queue: documents embedded and committed together, and how long the
+# writer waits after the first queued document for others to join its batch
+WRITE_BATCH_SIZE = 64
+WRITE_BATCH_DELAY = 0.05
+# Longest a search waits for its caller's queued documents before answering without them
+WRITE_FLUSH_TIMEOUT = 5.0
+# How long documents of each category stay valid; None (or an unlisted category) keeps them for good
+RETENTION_POLICIES = {
+    "market_data": timedelta(hours=48),   # prices are re-scraped continuously
+    "farming_tasks": timedelta(days=7),   # re-read from the website at startup
+    "weather": timedelta(hours=6),
+    "community": timedelta(days=30),
+    "web": timedelta(days=30),            # fetched pages, re-fetched when searched again
+    "crop_info": None,
+    "government": None,
+    "techniques": None,
+}
+# Half-life of a document's freshness, per category; unlisted categories never go stale
+FRESHNESS_HALF_LIVES = {
+    "market_data": timedelta(hours=12),
+    "weather": timedelta(hours=3),
+    "farming_tasks": timedelta(days=2),
+    "community": timedelta(days=14),
+    "web": timedelta(days=14),
+}
+# Share of a knowledge base hit's ranking that decays with age (a stale hit keeps the rest)
+FRESHNESS_WEIGHT = 0.5
+# Candidates re-ranked for freshness, so a slightly less similar but newer document can win
+FRESHNESS_CANDIDATES = 50
+# Seconds between background compactions
+COMPACTION_INTERVAL = 3600
+# Free database pages released per compaction (about 4 MB at the default page size)
+COMPACTION_VACUUM_PAGES = 1000
+# Free pages an older (non-incremental) database must have before compaction rewrites it once
+# with a full VACUUM to switch it to incremental auto-vacuum
+AUTO_VACUUM_CONVERT_PAGES = 1000
+
 @dataclass
 class RAGDocument:
     """Document structure for RAG system"""
@@ -225,9 +274,14 @@ class WebsiteDataAccess:
 class WebScrapingService:
     """Enhanced web scraping service for agricultural data"""
     
-    def __init__(self):
+    def __init__(self, knowledge_base: Optional["KnowledgeBase"] = None, rerank: bool = True):
         self.session = None
         self.scraped_cache = {}
+        # The knowledge base's embedding model reranks results when available
+        self.knowledge_base = knowledge_base
+        self.rerank = rerank
+        # Set by ComprehensiveRAGSystem: stores the pages behind relevant results
+        self.ingestion = None
         
     async def get_session(self):
         """Get or create aiohttp session"""
@@ -261,37 +315,73 @@ class WebScrapingService:
     async def search_agricultural_web(self, query: str, max_results: int = 10) -> Dict[str, Any]:
         """Search the web for agricultural information"""
         try:
-            with DDGS() as ddgs:
-                # Add farming-specific context to queries
-                farming_query = f"{query} farming agriculture india"
-                results = list(ddgs.text(farming_query, max_results=max_results))
-                
-                if not results:
-                    return {"success": False, "error": "No search results found"}
-                
-                processed_results = []
-                for result in results:
-                    processed_results.append({
-                        "title": result.get("title", ""),
-                        "description": result.get("body", ""),
-                        "url": result.get("href", ""),
-                        "relevance_score": self._calculate_relevance(result.get("body", ""), query)
-                    })
-                
-                # Sort by relevance
-                processed_results.sort(key=lambda x: x["relevance_score"], reverse=True)
-                
-                return {
-                    "success": True,
-                    "results": processed_results,
-                    "query": query,
-                    "timestamp": datetime.now()
-                }
+            # Add farming-specific context to queries
+            farming_query = f"{query} farming agriculture india"
+            # DDGS blocks; a worker thread keeps the event loop (audio, parallel searches) running
+            results = await asyncio.to_thread(self._ddgs_text, farming_query, max_results)
+            
+            if not results:
+                return {"success": False, "error": "No search results found"}
+            
+            processed_results = []
+            for result in results:
+                processed_results.append({
+                    "title": result.get("title", ""),
+                    "description": result.get("body", ""),
+                    "url": result.get("href", ""),
+                    "relevance_score": self._calculate_relevance(result.get("body", ""), query)
+                })
+            
+            # Collapse mirrors and tracking-parameter variants, then sort by relevance
+            processed_results = dedupe_results(processed_results)
+            await self._rerank(query, processed_results)
+            processed_results.sort(key=lambda x: x["relevance_score"], reverse=True)
+            
+            if self.ingestion:
+                self.ingestion.schedule(processed_results, query)
+            
+            return {
+                "success": True,
+                "results": processed_results,
+                "query": query,
+                "timestamp": datetime.now()
+            }
                 
         except Exception as e:
             logger.error(f"Error in web search: {e}")
             return {"success": False, "error": str(e)}
     
+    @staticmethod
+    def _ddgs_text(query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Blocking DuckDuckGo text search"""
+        with DDGS() as ddgs:
+            return list(ddgs.text(query, max_results=max_results))
+    
+    async def _rerank(self, query: str, results: List[Dict[str, Any]]):
+        """Blend embedding similarity into the lexical relevance scores"""
+        if not self.rerank or not results or self.knowledge_base is None or self.knowledge_base.model is None:
+            return
+        try:
+            texts = [f"{result['title']}. {result['description']}" for result in results]
+            semantic = await asyncio.to_thread(self._semantic_scores, query, texts)
+        except Exception as e:
+            logger.error(f"Error reranking web results: {e}")
+            return
+        
+        for result, score in zip(results, semantic):
+            result["lexical_score"] = result["relevance_score"]
+            result["semantic_score"] = float(score)
+            result["relevance_score"] = RERANK_WEIGHT * float(score) + (1 - RERANK_WEIGHT) * result["lexical_score"]
+    
+    def _semantic_scores(self, query: str, texts: List[str]) -> np.ndarray:
+        """Cosine similarity of each text to the query, clipped to 0-1"""
+        query_embedding = self.knowledge_base.encode_query(query)
+        # All snippets in one batch: a single forward pass per search
+        embeddings = np.asarray(self.knowledge_base.model.encode(texts, batch_size=len(texts)), dtype="float32")
+        norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query_embedding)
+        similarity = embeddings @ query_embedding / np.maximum(norms, 1e-9)
+        return np.clip(similarity, 0.0, 1.0)
+    
     def _calculate_relevance(self, text: str, query: str) -> float:
         """Calculate relevance score for search results"""
         try:
@@ -324,15 +414,47 @@ class WebScrapingService:
 class KnowledgeBase:
     """Agricultural knowledge base with vector search"""
     
-    def __init__(self, db_path: str = "farm_knowledge.db"):
+    def __init__(self, db_path: str = "farm_knowledge.db", model: Optional[SentenceTransformer] = None,
+                 chunker: Optional[DocumentChunker] = None,
+                 retention: Optional[Dict[str, Optional[timedelta]]] = None,
+                 half_lives: Optional[Dict[str, Optional[timedelta]]] = None):
         self.db_path = db_path
-        self.model = None
+        self.model = model
+        self.chunker = chunker or DocumentChunker()
+        self.retention = {**RETENTION_POLICIES, **(retention or {})}
+        self.half_lives = {**FRESHNESS_HALF_LIVES, **(half_lives or {})}
+        # Time source for retention and freshness; replaceable to simulate months of operation
+        self.clock = datetime.now
         self.index = None
+        # Chunk texts and metadata, aligned with the FAISS index
         self.documents = []
         self.document_metadata = []
+        self.document_ids = set()
+        # Per-vector arrays, also aligned with the index, for vectorized re-ranking:
+        # timestamps (epoch seconds), freshness half-lives and retention limits (seconds, inf = never),
+        # integer codes of the parent document and whether the vector is current (False once its
+        # document is replaced; compaction then drops it)
+        self._timestamps = np.empty(0, dtype=np.float64)
+        self._half_life_seconds = np.empty(0, dtype=np.float64)
+        self._max_age_seconds = np.empty(0, dtype=np.float64)
+        self._parent_codes = np.empty(0, dtype=np.int64)
+        self._live = np.empty(0, dtype=bool)
+        self._parent_code_of: Dict[str, int] = {}
+        self._query_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Reranking encodes queries from worker threads
+        self._query_lock = threading.Lock()
+        # Write-behind queue of (document, completion future), the owner (conversation) of each
+        # pending future and the writer task
+        self._write_queue: List[tuple] = []
+        self._pending_writes: Dict[asyncio.Future, Hashable] = {}
+        self._queued_ids: set = set()
+        self.write_flush_timeout = WRITE_FLUSH_TIMEOUT
+        self._writer: Optional[asyncio.Task] = None
+        self._compactor: Optional[asyncio.Task] = None
         
         # Initialize embedding model
-        self._init_embedding_model()
+        if self.model is None:
+            self._init_embedding_model()
         
         # Initialize database
         self._init_database()
@@ -356,6 +478,11 @@ class KnowledgeBase:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
+            # Incremental auto-vacuum lets compaction return free pages a few at a time. It is
+            # free to set on a new database; existing ones are converted later by compaction
+            if cursor.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0:
+                cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS knowledge_documents (
                     id TEXT PRIMARY KEY,
@@ -364,10 +491,20 @@ class KnowledgeBase:
                     embedding BLOB,
                     timestamp DATETIME,
                     source TEXT,
-                    category TEXT
+                    category TEXT,
+                    parent_id TEXT,
+                    chunk_index INTEGER
                 )
             ''')
             
+            # Databases created before chunking lack the chunk columns
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(knowledge_documents)")}
+            if "parent_id" not in columns:
+                cursor.execute("ALTER TABLE knowledge_documents ADD COLUMN parent_id TEXT")
+            if "chunk_index" not in columns:
+                cursor.execute("ALTER TABLE knowledge_documents ADD COLUMN chunk_index INTEGER")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_knowledge_parent ON knowledge_documents (parent_id)")
+            
             conn.commit()
             conn.close()
             logger.info("Knowledge database initialized")
@@ -381,26 +518,31 @@ class KnowledgeBase:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            cursor.execute("SELECT * FROM knowledge_documents")
+            cursor.execute('''
+                SELECT id, content, metadata, embedding, timestamp, source, category, parent_id, chunk_index
+                FROM knowledge_documents
+            ''')
             rows = cursor.fetchall()
             
-            documents = []
             embeddings = []
             
             for row in rows:
-                doc_id, content, metadata_json, embedding_blob, timestamp, source, category = row
+                doc_id, content, metadata_json, embedding_blob, timestamp, source, category, parent_id, chunk_index = row
+                self.document_ids.add(parent_id or doc_id)
                 
                 # Deserialize metadata
                 metadata = json.loads(metadata_json) if metadata_json else {}
                 
-                # Deserialize embedding
+                # Deserialize embedding (parents of chunked documents have none)
                 if embedding_blob:
                     embedding = pickle.loads(embedding_blob)
                     embeddings.append(embedding)
-                    documents.append(content)
+                    self.documents.append(content)
                     
                     self.document_metadata.append({
-                        "id": doc_id,
+                        "id": parent_id or doc_id,
+                        "chunk_id": doc_id,
+                        "chunk_index": chunk_index or 0,
                         "metadata": metadata,
                         "timestamp": timestamp,
                         "source": source,
@@ -414,7 +556,9 @@ class KnowledgeBase:
                 embeddings_array = np.array(embeddings).astype('float32')
                 self.index.add(embeddings_array)
                 
-                logger.info(f"Loaded {len(documents)} documents into knowledge base")
+                self._reset_vector_arrays()
+                
+                logger.info(f"Loaded {len(embeddings)} chunks of {len(self.document_ids)} documents into knowledge base")
             else:
                 # Create empty index
                 if self.model:
@@ -426,85 +570,362 @@ class KnowledgeBase:
         except Exception as e:
             logger.error(f"Error loading knowledge: {e}")
     
+    def encode_query(self, query: str) -> np.ndarray:
+        """Embedding of a query, cached for repeated and follow-up questions"""
+        key = " ".join(query.lower().split())
+        with self._query_lock:
+            embedding = self._query_embeddings.get(key)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(key)
+                return embedding
+        
+        embedding = np.asarray(self.model.encode(query), dtype="float32")
+        with self._query_lock:
+            self._query_embeddings[key] = embedding
+            if len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_embeddings.popitem(last=False)
+        return embedding
+    
     async def add_document(self, doc: RAGDocument) -> bool:
         """Add a document to the knowledge base"""
+        return await self.add_documents([doc]) == 1
+    
+    async def add_documents(self, docs: List[RAGDocument]) -> int:
+        """Add documents, chunked, with one batched embedding pass and one transaction; returns the number added"""
         try:
+            if not docs:
+                return 0
             if not self.model or not self.index:
                 logger.error("Model or index not initialized")
-                return False
+                return 0
             
-            # Generate embedding
-            embedding = self.model.encode(doc.content)
-            doc.embedding = embedding
+            # A document repeated in one batch replaces its earlier copy, as separate adds would
+            unique = list({doc.id: doc for doc in docs}.values())
+            
+            # (document, chunk id, chunk index, chunk text) for every chunk of every document
+            chunks = []
+            # Chunked documents keep their full text in a parent row without an embedding
+            parents = []
+            now = datetime.now()
+            for doc in unique:
+                # Retention is measured from this timestamp, in memory and on disk alike
+                doc.timestamp = doc.timestamp or now
+                parts = self.chunker.split(doc.content) or [doc.content]
+                if len(parts) == 1:
+                    chunks.append((doc, doc.id, 0, doc.content))
+                else:
+                    parents.append(doc)
+                    chunks.extend((doc, f"{doc.id}#{index}", index, part) for index, part in enumerate(parts))
             
-            # Add to FAISS index
-            self.index.add(np.array([embedding]).astype('float32'))
+            # Encoding is CPU bound; keep the event loop free while it runs
+            embeddings = await asyncio.to_thread(self.model.encode, [chunk[3] for chunk in chunks], batch_size=32)
+            embeddings = np.asarray(embeddings, dtype="float32")
             
-            # Store in database
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-            
-            cursor.execute('''
+            # Replacing a document drops its previous chunks
+            cursor.executemany("DELETE FROM knowledge_documents WHERE parent_id = ?", [(doc.id,) for doc in unique])
+            cursor.executemany('''
                 INSERT OR REPLACE INTO knowledge_documents 
-                (id, content, metadata, embedding, timestamp, source, category)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                doc.id,
-                doc.content,
-                json.dumps(doc.metadata),
-                pickle.dumps(embedding),
-                doc.timestamp or datetime.now(),
-                doc.source,
-                doc.category
-            ))
-            
+                (id, content, metadata, embedding, timestamp, source, category, parent_id, chunk_index)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (doc.id, doc.content, json.dumps(doc.metadata), None,
+                 doc.timestamp, doc.source, doc.category, None, None)
+                for doc in parents
+            ] + [
+                (chunk_id, text, json.dumps(doc.metadata), pickle.dumps(embedding),
+                 doc.timestamp, doc.source, doc.category,
+                 doc.id if chunk_id != doc.id else None, index)
+                for (doc, chunk_id, index, text), embedding in zip(chunks, embeddings)
+            ])
             conn.commit()
             conn.close()
             
-            # Update local metadata
-            self.document_metadata.append({
-                "id": doc.id,
-                "metadata": doc.metadata,
-                "timestamp": doc.timestamp,
-                "source": doc.source,
-                "category": doc.category
-            })
+            # Replaced documents stop answering at once, not only after the next compaction
+            replaced = [self._parent_code_of[doc.id] for doc in unique if doc.id in self._parent_code_of]
+            if replaced:
+                self._live[np.isin(self._parent_codes, replaced)] = False
+            
+            self.index.add(embeddings)
+            added = len(self.document_metadata)
+            for (doc, chunk_id, index, text), embedding in zip(chunks, embeddings):
+                if index == 0:
+                    doc.embedding = embedding
+                self.documents.append(text)
+                self.document_metadata.append({
+                    "id": doc.id,
+                    "chunk_id": chunk_id,
+                    "chunk_index": index,
+                    "metadata": doc.metadata,
+                    "timestamp": doc.timestamp,
+                    "source": doc.source,
+                    "category": doc.category
+                })
+                self.document_ids.add(doc.id)
+            self._append_vector_arrays(self.document_metadata[added:])
+            
+            logger.info(f"Added {len(docs)} documents ({len(chunks)} chunks) to knowledge base")
+            return len(docs)
             
-            logger.info(f"Added document {doc.id} to knowledge base")
+        except Exception as e:
+            logger.error(f"Error adding documents: {e}")
+            return 0
+    
+    def enqueue_document(self, doc: RAGDocument, owner: Hashable = None) -> Optional[asyncio.Future]:
+        """Queue a document for the background writer and return at once.
+        
+        The returned future resolves to whether the document was stored; None if
+        the knowledge base cannot accept documents. Searches by the same owner
+        (usually the conversation's SessionContext) wait for its queued writes, so
+        what was added is found by the next question without stalling other sessions.
+        """
+        if not self.model or not self.index:
+            logger.error("Model or index not initialized")
+            return None
+        
+        future = asyncio.get_running_loop().create_future()
+        self._write_queue.append((doc, future))
+        self._pending_writes[future] = owner
+        self._queued_ids.add(doc.id)
+        self._ensure_writer()
+        return future
+    
+    def _ensure_writer(self):
+        if self._write_queue and (self._writer is None or self._writer.done()):
+            self._writer = asyncio.create_task(self._write_behind())
+    
+    async def _write_behind(self):
+        """Embed and commit queued documents in batches until the queue is empty"""
+        while self._write_queue:
+            # Let documents queued close together share one encode and one commit
+            await asyncio.sleep(WRITE_BATCH_DELAY)
+            batch = self._write_queue[:WRITE_BATCH_SIZE]
+            
+            try:
+                stored = await self.add_documents([doc for doc, _ in batch]) == len(batch)
+            except Exception as e:
+                logger.error(f"Error writing queued documents: {e}")
+                stored = False
+            
+            # Dequeued only once written: a writer cancelled mid-batch leaves it for the next one
+            del self._write_queue[:len(batch)]
+            for doc, future in batch:
+                self._queued_ids.discard(doc.id)
+                self._pending_writes.pop(future, None)
+                if not future.done():
+                    future.set_result(stored)
+    
+    async def flush_writes(self, owner: Hashable = None, timeout: Optional[float] = None) -> bool:
+        """Wait until the documents queued by owner (every document if None) are stored and searchable.
+        
+        Gives up after `timeout` seconds (write_flush_timeout by default); returns whether all were written.
+        """
+        pending = [future for future, queued_by in self._pending_writes.items() if owner is None or queued_by == owner]
+        if not pending:
             return True
+        # A writer that died mid-batch left its documents queued; a new one picks them up
+        self._ensure_writer()
+        _, unfinished = await asyncio.wait(pending, timeout=self.write_flush_timeout if timeout is None else timeout)
+        if unfinished:
+            logger.warning(f"{len(unfinished)} queued documents not written yet; continuing without them")
+        return not unfinished
+    
+    def has_document(self, document_id: str) -> bool:
+        """Whether a document id is stored or queued"""
+        return document_id in self.document_ids or document_id in self._queued_ids
+    
+    def _expiry_cutoffs(self, now: datetime) -> Dict[str, datetime]:
+        """Oldest timestamp still valid, per category with a retention limit"""
+        return {category: now - ttl for category, ttl in self.retention.items() if ttl is not None}
+    
+    @staticmethod
+    def _as_datetime(value: Any) -> Optional[datetime]:
+        if isinstance(value, datetime) or value is None:
+            return value
+        try:
+            return datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    
+    def _vector_arrays(self, entries: List[Dict[str, Any]]) -> tuple:
+        """Timestamps, half-lives, retention limits and parent codes of index entries"""
+        def seconds(limit: Optional[timedelta]) -> float:
+            return limit.total_seconds() if limit else np.inf
+        
+        timestamps = []
+        for entry in entries:
+            timestamp = self._as_datetime(entry["timestamp"])
+            # Undated rows count as new
+            timestamps.append(timestamp.timestamp() if timestamp else np.nan)
+        return (
+            np.array(timestamps, dtype=np.float64),
+            np.array([seconds(self.half_lives.get(entry["category"])) for entry in entries], dtype=np.float64),
+            np.array([seconds(self.retention.get(entry["category"])) for entry in entries], dtype=np.float64),
+            np.array([self._parent_code_of.setdefault(entry["id"], len(self._parent_code_of)) for entry in entries],
+                     dtype=np.int64),
+        )
+    
+    def _append_vector_arrays(self, entries: List[Dict[str, Any]]):
+        timestamps, half_lives, max_ages, codes = self._vector_arrays(entries)
+        self._timestamps = np.concatenate([self._timestamps, timestamps])
+        self._half_life_seconds = np.concatenate([self._half_life_seconds, half_lives])
+        self._max_age_seconds = np.concatenate([self._max_age_seconds, max_ages])
+        self._parent_codes = np.concatenate([self._parent_codes, codes])
+        self._live = np.concatenate([self._live, np.ones(len(entries), dtype=bool)])
+    
+    def _reset_vector_arrays(self):
+        self._parent_code_of = {}
+        self._timestamps, self._half_life_seconds, self._max_age_seconds, self._parent_codes = \
+            self._vector_arrays(self.document_metadata)
+        self._live = np.ones(len(self.document_metadata), dtype=bool)
+    
+    def _delete_expired_rows(self, cutoffs: Dict[str, datetime]) -> tuple:
+        """Delete expired rows; returns the number deleted and the ids of the embedded rows left"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        deleted = 0
+        for category, cutoff in cutoffs.items():
+            cursor.execute("DELETE FROM knowledge_documents WHERE category = ? AND timestamp < ?", (category, cutoff))
+            deleted += cursor.rowcount
+        conn.commit()
+        live_ids = {row[0] for row in cursor.execute("SELECT id FROM knowledge_documents WHERE embedding IS NOT NULL")}
+        conn.close()
+        return deleted, live_ids
+    
+    def _rebuild_index(self, checked: int, live_ids: set) -> int:
+        """Drop vectors of deleted and replaced rows among the first `checked`; returns the number dropped"""
+        # A replaced document leaves its old vectors behind, already marked as no longer live
+        keep = [
+            position for position in range(checked)
+            if self._live[position] and self.document_metadata[position]["chunk_id"] in live_ids
+        ]
+        # Vectors added while the database was being compacted are all current
+        keep.extend(range(checked, self.index.ntotal))
+        removed = self.index.ntotal - len(keep)
+        if not removed:
+            return 0
+        
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)[keep] if keep else None
+        index = faiss.IndexFlatIP(self.index.d)
+        if vectors is not None:
+            index.add(vectors)
+        self.index = index
+        self.documents = [self.documents[position] for position in keep]
+        self.document_metadata = [self.document_metadata[position] for position in keep]
+        self.document_ids = {metadata["id"] for metadata in self.document_metadata}
+        self._reset_vector_arrays()
+        return removed
+    
+    def _incremental_vacuum(self, pages: int):
+        conn = sqlite3.connect(self.db_path)
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})")
+        elif conn.execute("PRAGMA freelist_count").fetchone()[0] >= AUTO_VACUUM_CONVERT_PAGES:
+            # A database from before incremental auto-vacuum: rewrite it once, now that it pays off
+            logger.info("Converting knowledge database to incremental auto-vacuum")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        conn.commit()
+        conn.close()
+    
+    async def compact(self, vacuum_pages: int = COMPACTION_VACUUM_PAGES) -> Dict[str, int]:
+        """Delete expired documents, drop stale vectors and release free pages"""
+        try:
+            await self.flush_writes()
+            if not self.index:
+                return {"deleted_rows": 0, "removed_vectors": 0, "vectors": 0}
+            
+            checked = self.index.ntotal
+            deleted, live_ids = await asyncio.to_thread(self._delete_expired_rows, self._expiry_cutoffs(self.clock()))
+            removed = self._rebuild_index(checked, live_ids)
+            await asyncio.to_thread(self._incremental_vacuum, vacuum_pages)
+            
+            if deleted or removed:
+                logger.info(f"Compacted knowledge base: {deleted} expired rows deleted, "
+                            f"{removed} stale vectors dropped, {self.index.ntotal} vectors left")
+            return {"deleted_rows": deleted, "removed_vectors": removed, "vectors": self.index.ntotal}
             
         except Exception as e:
-            logger.error(f"Error adding document: {e}")
-            return False
+            logger.error(f"Error compacting knowledge base: {e}")
+            return {"deleted_rows": 0, "removed_vectors": 0, "vectors": self.index.ntotal if self.index else 0}
+    
+    async def _compaction_loop(self, interval: float):
+        while True:
+            await self.compact()
+            await asyncio.sleep(interval)
+    
+    def start_compaction(self, interval: float = COMPACTION_INTERVAL):
+        """Compact now and then every `interval` seconds in the background"""
+        if self._compactor is None or self._compactor.done():
+            self._compactor = asyncio.create_task(self._compaction_loop(interval))
     
-    async def search_similar(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Search for similar documents using vector similarity"""
+    def stop_compaction(self):
+        """Stop the background compaction job"""
+        if self._compactor:
+            self._compactor.cancel()
+            self._compactor = None
+    
+    async def search_similar(self, query: str, k: int = 5, freshness: bool = False,
+                             owner: Hashable = None) -> List[Dict[str, Any]]:
+        """Search for similar documents using vector similarity; each hit carries its best chunk as snippet.
+        
+        With freshness on (opt-in), time-sensitive categories are re-ranked by an exponential decay
+        of their age, so today's price outranks a three-week-old one with slightly closer text.
+        """
         try:
+            # Read-your-writes: documents this owner queued before the search must be visible to it
+            await self.flush_writes(owner)
+            
             if not self.model or not self.index or self.index.ntotal == 0:
                 logger.warning("No documents in knowledge base or model not initialized")
                 return []
             
             # Generate query embedding
-            query_embedding = self.model.encode(query)
+            query_embedding = self.encode_query(query)
             
-            # Search FAISS index
+            # Search FAISS index; extra chunks leave room for several hits on one document
+            # and for newer documents to overtake closer but older ones
+            candidates = k * SEARCH_OVERSAMPLE
+            if freshness:
+                candidates = max(candidates, FRESHNESS_CANDIDATES)
             scores, indices = self.index.search(
                 np.array([query_embedding]).astype('float32'), 
-                min(k, self.index.ntotal)
+                min(candidates, self.index.ntotal)
             )
             
+            # Re-rank all candidates at once
+            valid = (indices[0] >= 0) & (indices[0] < len(self.document_metadata))
+            positions = indices[0][valid]
+            similarity = scores[0][valid].astype(np.float64)
+            ages = np.nan_to_num(self.clock().timestamp() - self._timestamps[positions], nan=0.0).clip(min=0.0)
+            decay = np.exp2(-ages / self._half_life_seconds[positions])
+            ranking = similarity * (1 - FRESHNESS_WEIGHT + FRESHNESS_WEIGHT * decay) if freshness else similarity
+            
+            order = np.argsort(-ranking, kind="stable")
+            # Expired and replaced documents not yet compacted away must not answer questions
+            current = (ages[order] <= self._max_age_seconds[positions[order]]) & self._live[positions[order]]
+            order = order[current]
+            # The best-ranked chunk of each document stands for it
+            _, first = np.unique(self._parent_codes[positions[order]], return_index=True)
+            order = order[np.sort(first)][:k]
+            
             results = []
-            for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-                if idx < len(self.document_metadata):
-                    metadata = self.document_metadata[idx]
-                    results.append({
-                        "document_id": metadata["id"],
-                        "similarity_score": float(score),
-                        "metadata": metadata["metadata"],
-                        "source": metadata["source"],
-                        "category": metadata["category"],
-                        "timestamp": metadata["timestamp"]
-                    })
+            for i in order:
+                idx = positions[i]
+                metadata = self.document_metadata[idx]
+                results.append({
+                    "document_id": metadata["id"],
+                    "similarity_score": float(similarity[i]),
+                    "freshness": float(decay[i]),
+                    "ranking_score": float(ranking[i]),
+                    "metadata": metadata["metadata"],
+                    "source": metadata["source"],
+                    "category": metadata["category"],
+                    "timestamp": metadata["timestamp"],
+                    "snippet": self.documents[idx],
+                    "chunk_index": metadata["chunk_index"]
+                })
             
             return results
             
@@ -512,9 +933,11 @@ class KnowledgeBase:
             logger.error(f"Error searching knowledge base: {e}")
             return []
     
-    async def get_document_content(self, document_id: str) -> Optional[str]:
+    async def get_document_content(self, document_id: str, owner: Hashable = None) -> Optional[str]:
         """Get the full content of a document by ID"""
         try:
+            await self.flush_writes(owner)
+            
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
@@ -534,8 +957,13 @@ class ComprehensiveRAGSystem:
     
     def __init__(self):
         self.website_data = WebsiteDataAccess()
-        self.web_scraper = WebScrapingService()
         self.knowledge_base = KnowledgeBase()
+        self.web_scraper = WebScrapingService(knowledge_base=self.knowledge_base)
+        # Imported here: web_ingestion builds on this module's KnowledgeBase
+        from web_ingestion import WebIngestionPipeline
+        self.web_ingestion = WebIngestionPipeline(self.knowledge_base)
+        self.web_scraper.ingestion = self.web_ingestion
+        self.price_store = get_price_store()
         
         # Categories for organizing information
         self.categories = {
@@ -571,6 +999,9 @@ class ComprehensiveRAGSystem:
             # Add static farming knowledge
             await self._add_static_farming_knowledge()
             
+            # Expire old prices and tasks, and drop the vectors replaced above
+            self.knowledge_base.start_compaction()
+            
             logger.info("Knowledge base initialization completed")
             
         except Exception as e:
@@ -579,8 +1010,15 @@ class ComprehensiveRAGSystem:
     async def _process_and_store_data(self, source: str, data: Dict[str, Any]):
         """Process and store data from a specific source"""
         try:
+            # Collected first, then chunked, embedded and committed as one batch
+            documents = []
             # Convert data to searchable documents
             if source == "market_prices" and "data" in data:
+                # Keep the full numeric history; only a sample goes into the vector index.
+                # Cached responses are generated sample rows, not real prices.
+                if not data.get("cached"):
+                    self.price_store.ingest_records(data["data"], source=source)
+                
                 for item in data["data"][:10]:  # Limit to prevent overflow
                     content = f"""
                     Commodity: {item.get('commodity', 'Unknown')}
@@ -600,7 +1038,7 @@ class ComprehensiveRAGSystem:
                         source=source,
                         category="market_data"
                     )
-                    await self.knowledge_base.add_document(doc)
+                    documents.append(doc)
             
             elif source == "tasks" and "active_tasks" in data:
                 for task in data["active_tasks"]:
@@ -619,7 +1057,7 @@ class ComprehensiveRAGSystem:
                         source=source,
                         category="farming_tasks"
                     )
-                    await self.knowledge_base.add_document(doc)
+                    documents.append(doc)
             
             elif source == "crops" and "recommended_crops" in data:
                 for crop in data["recommended_crops"]:
@@ -638,10 +1076,12 @@ class ComprehensiveRAGSystem:
                         source=source,
                         category="crop_info"
                     )
-                    await self.knowledge_base.add_document(doc)
+                    documents.append(doc)
             
             # Add other data processing logic for community, farm, schemes
             
+            await self.knowledge_base.add_documents(documents)
+            
         except Exception as e:
             logger.error(f"Error processing data from {source}: {e}")
     
@@ -687,8 +1127,8 @@ class ComprehensiveRAGSystem:
                 }
             ]
             
-            for knowledge in static_knowledge:
-                doc = RAGDocument(
+            await self.knowledge_base.add_documents([
+                RAGDocument(
                     id=knowledge["id"],
                     content=knowledge["content"].strip(),
                     metadata={"type": "static_knowledge"},
@@ -696,16 +1136,18 @@ class ComprehensiveRAGSystem:
                     source="static",
                     category=knowledge["category"]
                 )
-                await self.knowledge_base.add_document(doc)
+                for knowledge in static_knowledge
+            ])
                 
         except Exception as e:
             logger.error(f"Error adding static knowledge: {e}")
     
-    async def query_comprehensive(self, query: str, include_web_search: bool = True) -> Dict[str, Any]:
+    async def query_comprehensive(self, query: str, include_web_search: bool = True,
+                                  owner: Hashable = None) -> Dict[str, Any]:
         """Comprehensive query that searches knowledge base and web if needed"""
         try:
-            # Search knowledge base first
-            kb_results = await self.knowledge_base.search_similar(query, k=5)
+            # Search knowledge base first; farmers asking about prices or weather want the latest
+            kb_results = await self.knowledge_base.search_similar(query, k=5, freshness=True, owner=owner)
             
             response = {
                 "query": query,
@@ -824,6 +1266,10 @@ class ComprehensiveRAGSystem:
         try:
             await self.website_data.close_session()
             await self.web_scraper.close_session()
+            await self.web_ingestion.close_session()
+            # Queued knowledge must reach the database before shutdown
+            await self.knowledge_base.flush_writes()
+            self.knowledge_base.stop_compaction()
             logger.info("All sessions closed successfully")
         except Exception as e:
             logger.error(f"Error closing sessions: {e}")
@@ -845,3 +1291,8 @@ async def cleanup_rag_system():
     if rag_system:
         await rag_system.close_all_sessions()
         rag_system = None
+
+if __name__ == "__main__":
+    # python -m rag_system import <path>
+    from knowledge_import import main
+    raise SystemExit(main())
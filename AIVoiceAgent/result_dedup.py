@@ -0,0 +1,176 @@
+"""
+Web Result Deduplication for AI Farm Care Assistant
+Collapses search results that point at the same page (URLs differing only in
+tracking parameters, mobile/AMP mirrors, fragments) or carry near-identical
+snippets (syndicated or mirrored articles) using URL canonicalization and 64-bit
+SimHash fingerprints with banded lookup, in a single linear pass
+"""
+
+import hashlib
+import logging
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track the visit and never change the page
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "referrer", "source", "share", "amp", "cmpid", "ito",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_", "__hs", "_ga")
+# Host prefixes of mobile/AMP mirrors of the same site
+MIRROR_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+SIMHASH_BITS = 64
+# Fingerprints this close (of 64 bits) are the same text
+NEAR_DUPLICATE_DISTANCE = 7
+# Bands for candidate lookup; with 8 bands any pair within 7 bits shares one exactly
+SIMHASH_BANDS = 8
+# Snippets shorter than this (in words) are too short to fingerprint reliably
+MIN_SIMHASH_WORDS = 8
+# Titles shorter than this (in words) are too generic ("Home") to identify a page
+MIN_TITLE_WORDS = 4
+# Snippets are short, so single words give steadier fingerprints than longer shingles
+SHINGLE_SIZE = 1
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def canonicalize_url(url: str) -> str:
+    """Canonical form of a URL so trivially different links to one page compare equal"""
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip().lower()
+
+    host = (parts.hostname or "").lower()
+    for prefix in MIRROR_HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    path = re.sub(r"/(index|default)\.(html?|php|aspx?)$", "/", path, flags=re.IGNORECASE)
+    path = re.sub(r"/amp/?$", "/", path)
+    path = path.rstrip("/") or "/"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    # Scheme and fragment never select a different article
+    return urlunsplit(("", host, path, urlencode(query), "")).lstrip("/")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens"""
+    return _WORD.findall((text or "").lower())
+
+
+def simhash(tokens: List[str], shingle_size: int = SHINGLE_SIZE) -> int:
+    """64-bit SimHash over word shingles"""
+    if len(tokens) < shingle_size:
+        shingles = [" ".join(tokens)] if tokens else []
+    else:
+        shingles = [" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)]
+
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits"""
+    return (a ^ b).bit_count()
+
+
+def _bands(fingerprint: int) -> Iterable[Tuple[int, int]]:
+    width = SIMHASH_BITS // SIMHASH_BANDS
+    mask = (1 << width) - 1
+    for band in range(SIMHASH_BANDS):
+        yield band, fingerprint >> (band * width) & mask
+
+
+class ResultDeduplicator:
+    """Incremental near-duplicate filter; each result costs O(1) expected lookups"""
+
+    def __init__(self, text_key: str = "description", max_distance: int = NEAR_DUPLICATE_DISTANCE):
+        self.text_key = text_key
+        self.max_distance = max_distance
+        self.results: List[Dict[str, Any]] = []
+        self._by_url: Dict[str, int] = {}
+        self._by_title: Dict[str, int] = {}
+        self._by_band: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self._fingerprints: List[Optional[int]] = []
+        self.duplicates = 0
+
+    def _find(self, url: str, title: str, fingerprint: Optional[int]) -> Optional[int]:
+        if url and url in self._by_url:
+            return self._by_url[url]
+        if title and title in self._by_title:
+            return self._by_title[title]
+        if fingerprint is None:
+            return None
+        for band in _bands(fingerprint):
+            for index in self._by_band.get(band, ()):
+                if hamming(fingerprint, self._fingerprints[index]) <= self.max_distance:
+                    return index
+        return None
+
+    def _index(self, index: int, url: str, title: str):
+        if url:
+            self._by_url.setdefault(url, index)
+        if title:
+            self._by_title.setdefault(title, index)
+
+    def add(self, result: Dict[str, Any]) -> bool:
+        """Add a result; returns False if it duplicates one already kept"""
+        url = canonicalize_url(result.get("url", ""))
+        title_tokens = tokenize(result.get("title", ""))
+        title = " ".join(title_tokens) if len(title_tokens) >= MIN_TITLE_WORDS else ""
+        tokens = tokenize(result.get(self.text_key, ""))
+        fingerprint = simhash(tokens) if len(tokens) >= MIN_SIMHASH_WORDS else None
+
+        index = self._find(url, title, fingerprint)
+        if index is not None:
+            self.duplicates += 1
+            # Keep the better-scored copy in the earlier slot
+            if result.get("relevance_score", 0) > self.results[index].get("relevance_score", 0):
+                self.results[index] = result
+            self._index(index, url, title)
+            return False
+
+        index = len(self.results)
+        self.results.append(result)
+        self._fingerprints.append(fingerprint)
+        self._index(index, url, title)
+        if fingerprint is not None:
+            for band in _bands(fingerprint):
+                self._by_band[band].append(index)
+        return True
+
+
+def dedupe_results(results: Iterable[Dict[str, Any]], text_key: str = "description") -> List[Dict[str, Any]]:
+    """Results with URL and near-text duplicates collapsed, in first-seen order"""
+    deduplicator = ResultDeduplicator(text_key)
+    for result in results:
+        deduplicator.add(result)
+    if deduplicator.duplicates:
+        logger.info(f"Collapsed {deduplicator.duplicates} duplicate web results")
+    return deduplicator.results
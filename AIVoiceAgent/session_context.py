@@ -0,0 +1,245 @@
+"""
+Session Context Store for AI Farm Care Assistant
+Per-conversation store attached to the AgentSession as userdata. It holds the
+farm profile, the resolved farm location, weather snapshots and recent retrieval
+results with per-field TTLs, so the tools of one turn share a single fetch of
+each instead of repeating the data-channel, weather and knowledge base round trips.
+A request scope additionally lets the helpers nested under one tool invocation
+share identical lookups, even outside a live session
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from agronomy_data import get_agronomy_data
+from farm_profile import FarmDataClient, FarmProfile, FarmSnapshot, get_farm_client
+from frame_sampler import CameraFeed
+from weather_service import get_weather_service, normalize_city
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds each kind of value stays valid within a session
+FIELD_TTLS = {
+    "farm": 600,       # the farmer rarely edits farms mid-call
+    "location": 600,   # derived from the farm profile
+    "weather": 600,    # matches the weather service cache window
+    "retrieval": 300,  # knowledge base and web search results
+}
+DEFAULT_TTL = 300
+
+
+def normalize_key(key: Hashable) -> Hashable:
+    """Case- and whitespace-insensitive key for free-text lookups"""
+    if isinstance(key, str):
+        return " ".join(key.casefold().split())
+    if isinstance(key, tuple):
+        return tuple(normalize_key(item) for item in key)
+    return key
+
+
+async def await_shared(future: asyncio.Future, waiters: Counter) -> Any:
+    """Await a load shared by several callers. A cancelled caller leaves the load
+    running for the others, but the last one to go cancels it, so abandoned
+    searches stop instead of running on unobserved"""
+    waiters[future] += 1
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        if waiters[future] == 1 and not future.done():
+            future.cancel()
+        raise
+    finally:
+        waiters[future] -= 1
+        if not waiters[future]:
+            del waiters[future]
+
+
+class RequestMemo:
+    """Results of the lookups made while answering one tool invocation"""
+
+    def __init__(self):
+        self._results: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Counter = Counter()
+        self.stats = Counter()
+
+    async def run(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Run loader once per key; later and concurrent callers share its outcome"""
+        key = normalize_key(key)
+        future = self._results.get(key)
+        # A load cancelled because every caller left is started again
+        if future is None or future.cancelled():
+            self.stats["misses"] += 1
+            future = asyncio.ensure_future(loader())
+            self._results[key] = future
+        else:
+            self.stats["hits"] += 1
+        return await await_shared(future, self._waiters)
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Result of a finished, successful lookup, else None"""
+        future = self._results.get(normalize_key(key))
+        if future is None or not future.done() or future.cancelled() or future.exception():
+            return None
+        return future.result()
+
+
+_request_memo: ContextVar[Optional[RequestMemo]] = ContextVar("request_memo", default=None)
+
+
+@contextmanager
+def request_scope() -> Iterator[RequestMemo]:
+    """Share lookups between a tool and the helpers/tools it calls; nested scopes join the outer one"""
+    memo = _request_memo.get()
+    if memo is not None:
+        yield memo
+        return
+    memo = RequestMemo()
+    token = _request_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _request_memo.reset(token)
+        logger.debug(f"Request memo: {dict(memo.stats)}")
+
+
+def current_request_memo() -> Optional[RequestMemo]:
+    """Memo of the enclosing request scope, if any"""
+    return _request_memo.get()
+
+
+async def request_memoized(key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """Run loader through the enclosing request scope, or directly outside one"""
+    memo = _request_memo.get()
+    return await (memo.run(key, loader) if memo else loader())
+
+
+def request_scoped(func):
+    """Decorator (below @function_tool()) running a tool inside a request scope"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with request_scope():
+            return await func(*args, **kwargs)
+    return wrapper
+
+
+class SessionContext:
+    """TTL store of per-conversation context shared by every tool"""
+
+    def __init__(self, farm_client: Optional[FarmDataClient] = None, ttls: Optional[Dict[str, float]] = None):
+        self.farm_client = farm_client
+        # This call's video tracks; set by attach_frame_sampler
+        self.camera: Optional[CameraFeed] = None
+        self.ttls = {**FIELD_TTLS, **(ttls or {})}
+        self._entries: Dict[Tuple[str, Hashable], Tuple[float, Any]] = {}
+        self._inflight: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self._waiters: Counter = Counter()
+        self.stats = Counter()
+
+    async def get_or_load(self, field: str, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                          cacheable: Callable[[Any], bool] = lambda value: value is not None) -> Any:
+        """Fresh value of field[key], loading it at most once across concurrent tools"""
+        entry_key = (field, normalize_key(key))
+        entry = self._entries.get(entry_key)
+        if entry and entry[0] > time.monotonic():
+            self.stats[f"{field}_hits"] += 1
+            return entry[1]
+
+        future = self._inflight.get(entry_key)
+        if future is not None and not future.done():
+            self.stats[f"{field}_coalesced"] += 1
+            return await await_shared(future, self._waiters)
+
+        self.stats[f"{field}_loads"] += 1
+        future = asyncio.ensure_future(request_memoized((field, key), loader))
+        self._inflight[entry_key] = future
+        try:
+            value = await await_shared(future, self._waiters)
+        finally:
+            if self._inflight.get(entry_key) is future:
+                del self._inflight[entry_key]
+
+        # Failures are not stored, so the next tool retries them
+        if cacheable(value):
+            ttl = self.ttls.get(field, DEFAULT_TTL)
+            self._entries[entry_key] = (time.monotonic() + ttl, value)
+        return value
+
+    def invalidate(self, field: Optional[str] = None):
+        """Drop one field (or everything) so it is fetched again"""
+        if field is None:
+            self._entries.clear()
+        else:
+            self._entries = {key: entry for key, entry in self._entries.items() if key[0] != field}
+
+    async def get_farm_snapshot(self) -> Optional[FarmSnapshot]:
+        """The farmer's saved farms from the web client"""
+        client = self.farm_client or get_farm_client()
+        if client is None:
+            return None
+        # The store owns the TTL: the first load may use the client's copy, an expired entry asks again
+        refresh = self.stats["farm_loads"] > 0
+        return await self.get_or_load("farm", "snapshot", lambda: client.get_snapshot(refresh=refresh))
+
+    async def get_selected_farm(self) -> Optional[FarmProfile]:
+        """The farm the farmer is working with"""
+        snapshot = await self.get_farm_snapshot()
+        return snapshot.selected if snapshot else None
+
+    async def get_location(self) -> Dict[str, Any]:
+        """Location context resolved from the selected farm, or India in general"""
+        return await self.get_or_load("location", "selected", self._resolve_location)
+
+    async def _resolve_location(self) -> Dict[str, Any]:
+        farm = await self.get_selected_farm()
+        if farm is None:
+            return {
+                "has_farm_profile": False,
+                "location": "India",
+                "state": "General",
+                "coordinates": None,
+                "message": "No farm profile found. Providing general guidance for India."
+            }
+
+        location = {
+            "has_farm_profile": True,
+            "farm_name": farm.name,
+            "location": "India",
+            "state": "Not specified",
+            "coordinates": (farm.latitude, farm.longitude) if farm.has_location else None,
+            "soil_type": farm.soil_type or "Not specified",
+            "farm_size": f"{farm.area_acres:.2f} acres" if farm.area_acres else "Not specified",
+            "crop_type": farm.crop_type,
+        }
+        if farm.has_location:
+            city = get_agronomy_data().nearest_city(farm.latitude, farm.longitude)
+            if city:
+                location["location"] = f"{city['city']}, {city['state']}"
+                location["state"] = city["state"]
+        return location
+
+    async def get_weather(self, city: str) -> Dict[str, Any]:
+        """Current weather for a city; successful results carry a WeatherRecord"""
+        return await self.get_or_load(
+            "weather", normalize_city(city),
+            lambda: get_weather_service().get_current_weather(city),
+            cacheable=lambda result: bool(result.get("success")),
+        )
+
+
+def get_session_context(context: Any = None) -> SessionContext:
+    """The session's context store, or a throwaway one outside a live session"""
+    try:
+        userdata = context.userdata if context is not None else None
+    except (AttributeError, ValueError):
+        # RunContext.userdata raises ValueError when the session has none
+        userdata = None
+    if isinstance(userdata, SessionContext):
+        return userdata
+    return SessionContext()
@@ -0,0 +1,467 @@
+"""
+Soil Data Service for AI Farm Care Assistant
+Fetches SoilGrids topsoil properties asynchronously and keeps them forever in a
+geohash-keyed SQLite cache, since soil changes on geological timescales.
+An optional local soil grid (CSV/NPZ regional extract) answers lookups offline
+"""
+
+import asyncio
+import csv
+import logging
+import math
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional
+
+import aiohttp
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scattered grids fall back to a vectorized NumPy scan
+    cKDTree = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SOILGRIDS_URL = "https://rest.isric.org/soilgrids/v2.0/properties/query"
+SOILGRIDS_TIMEOUT = 15
+# SoilGrids rate-limits per client; batch callers share this many open requests
+MAX_CONCURRENT_SOIL_REQUESTS = 4
+
+# Order of the values in a soil vector and the SoilGrids property for each
+SOIL_PROPERTIES = ("phh2o", "soc", "sand", "silt", "clay", "cec", "nitrogen")
+# Topsoil depths averaged into the vector, weighted by their thickness in cm
+TOPSOIL_DEPTHS = {"0-5cm": 5, "5-15cm": 10, "15-30cm": 15}
+
+# Geohash precision 6 is a ~1.2 km x 0.6 km tile: one entry per village
+GEOHASH_PRECISION = 6
+
+# Local grid cells further than this from the query point are not used
+LOCAL_GRID_MAX_DISTANCE_KM = 10.0
+KM_PER_DEGREE = 111.32
+
+# Column names accepted in local soil grid exports, per vector position
+SOIL_COLUMN_ALIASES = (
+    ("phh2o", "ph"),
+    ("soc", "organic_carbon", "oc"),
+    ("sand",),
+    ("silt",),
+    ("clay",),
+    ("cec",),
+    ("nitrogen", "n"),
+)
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Standard base-32 geohash of a coordinate"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    bits = []
+    even = True
+    while len(bits) < precision * 5:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            bits.append(1)
+            bounds[0] = middle
+        else:
+            bits.append(0)
+            bounds[1] = middle
+        even = not even
+
+    return "".join(
+        _GEOHASH_ALPHABET[int("".join(map(str, bits[i:i + 5])), 2)]
+        for i in range(0, len(bits), 5)
+    )
+
+
+@dataclass(frozen=True)
+class SoilProfile:
+    """Topsoil (0-30 cm) properties in agronomic units"""
+    ph: float
+    organic_carbon: float  # g/kg
+    sand: float  # %
+    silt: float  # %
+    clay: float  # %
+    cec: float  # cmol(c)/kg
+    nitrogen: float  # g/kg
+    source: str = "soilgrids"
+
+    def to_vector(self) -> np.ndarray:
+        """Compact float32 vector in SOIL_PROPERTIES order"""
+        return np.array([self.ph, self.organic_carbon, self.sand, self.silt,
+                         self.clay, self.cec, self.nitrogen], dtype=np.float32)
+
+    @classmethod
+    def from_vector(cls, vector: np.ndarray, source: str = "soilgrids") -> "SoilProfile":
+        """Rebuild a profile from a soil vector"""
+        return cls(*[float(value) for value in vector[:len(SOIL_PROPERTIES)]], source=source)
+
+    @property
+    def organic_matter(self) -> float:
+        """Organic matter (%) from organic carbon (g/kg) with the van Bemmelen factor"""
+        return self.organic_carbon * 1.724 / 10
+
+    @property
+    def texture(self) -> str:
+        """Simplified USDA texture class from the sand/silt/clay split"""
+        if np.isnan(self.sand) or np.isnan(self.clay):
+            return "Unknown"
+        if self.clay >= 40:
+            return "Clay"
+        if self.clay >= 27:
+            return "Clay loam"
+        if self.sand >= 70:
+            return "Sandy" if self.clay < 10 else "Sandy loam"
+        if self.sand >= 50:
+            return "Sandy loam"
+        if self.silt >= 50:
+            return "Silt loam"
+        return "Loam"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly view with rounded values and the texture class"""
+        data = {key: (None if isinstance(value, float) and np.isnan(value) else
+                      round(value, 2) if isinstance(value, float) else value)
+                for key, value in asdict(self).items()}
+        data["texture"] = self.texture
+        return data
+
+
+def parse_soilgrids(data: Dict[str, Any]) -> Optional[SoilProfile]:
+    """Thickness-weighted topsoil means from a SoilGrids properties response"""
+    layers = {layer.get("name"): layer for layer in data.get("properties", {}).get("layers", [])}
+    values = []
+    for name in SOIL_PROPERTIES:
+        layer = layers.get(name)
+        if not layer:
+            values.append(np.nan)
+            continue
+
+        d_factor = float(layer.get("unit_measure", {}).get("d_factor", 1) or 1)
+        total, weight = 0.0, 0.0
+        for depth in layer.get("depths", []):
+            thickness = TOPSOIL_DEPTHS.get(depth.get("label"))
+            mean = depth.get("values", {}).get("mean")
+            if thickness and mean is not None:
+                total += mean / d_factor * thickness
+                weight += thickness
+        values.append(total / weight if weight else np.nan)
+
+    # Dividing by d_factor already converts to conventional units (pH, g/kg, %, cmol/kg)
+    vector = np.array(values, dtype=np.float32)
+    if np.isnan(vector).all():
+        return None
+    return SoilProfile.from_vector(vector)
+
+
+class LocalSoilGrid:
+    """Gridded topsoil properties held as NumPy arrays with a nearest-cell index.
+
+    Regular lat/lon grids are indexed by arithmetic on the cell spacing; scattered
+    points use a KD-tree (scipy) or a vectorized scan when scipy is missing.
+    Values are expected in the same units as SoilProfile.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, values: np.ndarray,
+                 max_distance_km: float = LOCAL_GRID_MAX_DISTANCE_KM, name: str = "local_grid"):
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float32).reshape(len(self.latitudes), len(SOIL_PROPERTIES))
+        self.max_distance_km = max_distance_km
+        self.name = name
+        self.regular = None
+        self.tree = None
+        self._build_index()
+
+    def _build_index(self):
+        """Use O(1) cell arithmetic for regular grids, a KD-tree otherwise"""
+        lat_axis = np.unique(self.latitudes)
+        lon_axis = np.unique(self.longitudes)
+        if (len(lat_axis) > 1 and len(lon_axis) > 1
+                and len(lat_axis) * len(lon_axis) == len(self.latitudes)
+                and np.allclose(np.diff(lat_axis), lat_axis[1] - lat_axis[0])
+                and np.allclose(np.diff(lon_axis), lon_axis[1] - lon_axis[0])):
+            cube = np.full((len(lat_axis), len(lon_axis), len(SOIL_PROPERTIES)), np.nan, dtype=np.float32)
+            cube[np.searchsorted(lat_axis, self.latitudes), np.searchsorted(lon_axis, self.longitudes)] = self.values
+            self.regular = (lat_axis[0], lat_axis[1] - lat_axis[0], lon_axis[0], lon_axis[1] - lon_axis[0], cube)
+            logger.info(f"Local soil grid {self.name}: regular {cube.shape[0]}x{cube.shape[1]} cells")
+            return
+
+        self._lon_scale = np.cos(np.radians(self.latitudes.mean())) if len(self.latitudes) else 1.0
+        self._points = np.column_stack([self.latitudes, self.longitudes * self._lon_scale])
+        if cKDTree is not None:
+            self.tree = cKDTree(self._points)
+        logger.info(f"Local soil grid {self.name}: {len(self.latitudes)} scattered points")
+
+    @classmethod
+    def from_npz(cls, path: str, **kwargs) -> "LocalSoilGrid":
+        """Load an NPZ export with latitude/longitude arrays and a values matrix or one array per property"""
+        with np.load(path) as data:
+            keys = {key.lower(): key for key in data.files}
+            latitudes = data[keys.get("latitude", keys.get("lat"))]
+            longitudes = data[keys.get("longitude", keys.get("lon"))]
+            if "values" in keys:
+                values = data[keys["values"]]
+            else:
+                values = np.column_stack([
+                    next((data[keys[alias]] for alias in aliases if alias in keys),
+                         np.full(len(latitudes), np.nan))
+                    for aliases in SOIL_COLUMN_ALIASES
+                ])
+        return cls(latitudes, longitudes, values, name=os.path.basename(path), **kwargs)
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> "LocalSoilGrid":
+        """Load a CSV export with lat/lon columns and one column per soil property"""
+        with open(path, newline="", encoding="utf-8") as handle:
+            reader = csv.DictReader(handle)
+            columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+            lat_column = columns.get("latitude") or columns.get("lat")
+            lon_column = columns.get("longitude") or columns.get("lon") or columns.get("lng")
+            property_columns = [next((columns[alias] for alias in aliases if alias in columns), None)
+                                for aliases in SOIL_COLUMN_ALIASES]
+
+            def number(row, column):
+                try:
+                    return float(row[column]) if column and row[column] not in ("", None) else np.nan
+                except ValueError:
+                    return np.nan
+
+            rows = [
+                [number(row, lat_column), number(row, lon_column)] + [number(row, column) for column in property_columns]
+                for row in reader
+            ]
+
+        table = np.array(rows, dtype=np.float64).reshape(-1, 2 + len(SOIL_PROPERTIES))
+        table = table[~np.isnan(table[:, 0]) & ~np.isnan(table[:, 1])]
+        return cls(table[:, 0], table[:, 1], table[:, 2:], name=os.path.basename(path), **kwargs)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "LocalSoilGrid":
+        """Load a CSV or NPZ soil grid export based on its extension"""
+        if path.lower().endswith(".npz"):
+            return cls.from_npz(path, **kwargs)
+        return cls.from_csv(path, **kwargs)
+
+    def lookup_many(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        """Soil vectors for many points at once; rows are NaN where no cell is close enough"""
+        latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        result = np.full((len(latitudes), len(SOIL_PROPERTIES)), np.nan, dtype=np.float32)
+
+        if self.regular is not None:
+            lat0, dlat, lon0, dlon, cube = self.regular
+            rows = np.rint((latitudes - lat0) / dlat).astype(np.int64)
+            cols = np.rint((longitudes - lon0) / dlon).astype(np.int64)
+            inside = (rows >= 0) & (rows < cube.shape[0]) & (cols >= 0) & (cols < cube.shape[1])
+            cell_lat = lat0 + rows * dlat
+            cell_lon = lon0 + cols * dlon
+            distance = KM_PER_DEGREE * np.hypot(latitudes - cell_lat,
+                                                (longitudes - cell_lon) * np.cos(np.radians(latitudes)))
+            found = inside & (distance <= self.max_distance_km)
+            result[found] = cube[rows[found], cols[found]]
+            return result
+
+        if not len(self.latitudes):
+            return result
+
+        queries = np.column_stack([latitudes, longitudes * self._lon_scale])
+        if self.tree is not None:
+            distance, index = self.tree.query(queries)
+        else:
+            squared = ((queries[:, None, :] - self._points[None, :, :]) ** 2).sum(axis=2)
+            index = squared.argmin(axis=1)
+            distance = np.sqrt(squared[np.arange(len(queries)), index])
+        found = distance * KM_PER_DEGREE <= self.max_distance_km
+        result[found] = self.values[index[found]]
+        return result
+
+    def lookup(self, latitude: float, longitude: float) -> Optional[SoilProfile]:
+        """Nearest-cell soil profile, or None outside the grid's coverage"""
+        if self.regular is not None:
+            # Scalar fast path: plain arithmetic avoids NumPy call overhead per lookup
+            lat0, dlat, lon0, dlon, cube = self.regular
+            row = int(round((latitude - lat0) / dlat))
+            col = int(round((longitude - lon0) / dlon))
+            if not (0 <= row < cube.shape[0] and 0 <= col < cube.shape[1]):
+                return None
+            distance = KM_PER_DEGREE * math.hypot(latitude - (lat0 + row * dlat),
+                                                  (longitude - (lon0 + col * dlon)) * math.cos(math.radians(latitude)))
+            vector = cube[row, col] if distance <= self.max_distance_km else None
+        else:
+            vector = self.lookup_many(latitude, longitude)[0]
+
+        if vector is None or np.isnan(vector).all():
+            return None
+        return SoilProfile.from_vector(vector, source=self.name)
+
+
+class SoilService:
+    """SoilGrids client with a permanent geohash-tile cache"""
+
+    def __init__(self, db_path: str = "soil_cache.db", base_url: str = SOILGRIDS_URL,
+                 precision: int = GEOHASH_PRECISION, local_grid: Optional[LocalSoilGrid] = None):
+        self.db_path = db_path
+        self.base_url = base_url
+        self.precision = precision
+        self.session = None
+        self._session_loop = None
+        self.memory_cache: Dict[str, SoilProfile] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._request_slots: Optional[asyncio.Semaphore] = None
+        self.stats = {"hits": 0, "misses": 0, "requests": 0, "local": 0}
+        self.local_grid = local_grid
+        self._init_database()
+
+    def _init_database(self):
+        """Create the soil tile cache table"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS soil_tiles (
+                    geohash TEXT PRIMARY KEY,
+                    latitude REAL,
+                    longitude REAL,
+                    vector BLOB,
+                    source TEXT,
+                    fetched_at REAL
+                )
+            """)
+            conn.commit()
+            conn.close()
+            logger.info("Soil cache database initialized")
+        except Exception as e:
+            logger.error(f"Error initializing soil cache database: {e}")
+
+    def _load_tile(self, tile: str) -> Optional[SoilProfile]:
+        """Read one cached tile from SQLite"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            row = conn.execute("SELECT vector, source FROM soil_tiles WHERE geohash = ?", (tile,)).fetchone()
+            conn.close()
+            if row:
+                return SoilProfile.from_vector(np.frombuffer(row[0], dtype=np.float32), source=row[1])
+        except Exception as e:
+            logger.error(f"Error reading soil tile {tile}: {e}")
+        return None
+
+    def _store_tile(self, tile: str, latitude: float, longitude: float, profile: SoilProfile):
+        """Persist a tile; entries never expire"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute(
+                "INSERT OR REPLACE INTO soil_tiles VALUES (?, ?, ?, ?, ?, ?)",
+                (tile, latitude, longitude, profile.to_vector().tobytes(), profile.source, time.time())
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Error storing soil tile {tile}: {e}")
+
+    async def get_session(self):
+        """Get or create the aiohttp session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.closed or self._session_loop is not loop:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=SOILGRIDS_TIMEOUT))
+            self._session_loop = loop
+            self._inflight.clear()
+            self._request_slots = asyncio.Semaphore(MAX_CONCURRENT_SOIL_REQUESTS)
+        return self.session
+
+    async def _fetch(self, latitude: float, longitude: float) -> Dict[str, Any]:
+        """Query SoilGrids for the topsoil properties we use"""
+        try:
+            session = await self.get_session()
+            params = [("lat", latitude), ("lon", longitude), ("value", "mean")]
+            params += [("property", name) for name in SOIL_PROPERTIES]
+            params += [("depth", depth) for depth in TOPSOIL_DEPTHS]
+            async with self._request_slots:
+                self.stats["requests"] += 1
+                async with session.get(self.base_url, params=params) as response:
+                    if response.status != 200:
+                        return {"success": False, "error": f"SoilGrids returned {response.status}"}
+                    data = await response.json()
+            profile = parse_soilgrids(data)
+            if profile is None:
+                return {"success": False, "error": "No soil data for this location"}
+            return {"success": True, "profile": profile}
+
+        except Exception as e:
+            logger.error(f"Error fetching soil data for ({latitude}, {longitude}): {e}")
+            return {"success": False, "error": str(e)}
+
+    def set_local_grid(self, local_grid: Optional[LocalSoilGrid]):
+        """Use (or stop using) a local soil grid ahead of the tile cache and SoilGrids"""
+        self.local_grid = local_grid
+
+    def lookup_local(self, latitude: float, longitude: float) -> Optional[SoilProfile]:
+        """Offline nearest-cell lookup in the local soil grid, if one is loaded"""
+        if self.local_grid is None:
+            return None
+        return self.local_grid.lookup(latitude, longitude)
+
+    async def get_soil_profile(self, latitude: float, longitude: float) -> Dict[str, Any]:
+        """Soil profile for a coordinate: local grid, then tile cache, then SoilGrids"""
+        tile = geohash_encode(latitude, longitude, self.precision)
+
+        profile = self.lookup_local(latitude, longitude)
+        if profile is not None:
+            self.stats["local"] += 1
+            return {"success": True, "profile": profile, "tile": tile, "cached": True}
+
+        profile = self.memory_cache.get(tile) or self._load_tile(tile)
+        if profile is not None:
+            self.stats["hits"] += 1
+            self.memory_cache[tile] = profile
+            return {"success": True, "profile": profile, "tile": tile, "cached": True}
+
+        task = self._inflight.get(tile)
+        if task is None or task.done():
+            self.stats["misses"] += 1
+            await self.get_session()
+            task = asyncio.ensure_future(self._fetch(latitude, longitude))
+            self._inflight[tile] = task
+            try:
+                result = await asyncio.shield(task)
+            finally:
+                if self._inflight.get(tile) is task:
+                    del self._inflight[tile]
+
+            if result["success"]:
+                self.memory_cache[tile] = result["profile"]
+                self._store_tile(tile, latitude, longitude, result["profile"])
+        else:
+            result = await asyncio.shield(task)
+
+        return {**result, "tile": tile, "cached": False}
+
+    async def close_session(self):
+        """Close aiohttp session"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+            self._session_loop = None
+
+
+# Global soil service instance
+soil_service = None
+
+def get_soil_service() -> SoilService:
+    """Get or create the global soil service"""
+    global soil_service
+    if soil_service is None:
+        soil_service = SoilService()
+        grid_path = os.getenv("SOIL_GRID_PATH")
+        if grid_path:
+            try:
+                soil_service.set_local_grid(LocalSoilGrid.load(grid_path))
+            except Exception as e:
+                logger.error(f"Error loading local soil grid {grid_path}: {e}")
+    return soil_service
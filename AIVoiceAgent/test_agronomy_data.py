@@ -0,0 +1,94 @@
+"""
+Test script for the agronomy reference data registry
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agronomy_data import AgronomyData, DEFAULT_DATA_PATH, REQUIRED_TABLES, get_agronomy_data
+
+
+def test_registry_lookups():
+    """Test keyed lookups and their defaults"""
+    print("🚀 Testing Agronomy Data Registry...")
+
+    data = get_agronomy_data()
+    assert data is get_agronomy_data()
+    assert data.version and all(name in data.tables for name in REQUIRED_TABLES)
+    print(f"✅ Loaded version {data.version} with {len(data.tables)} tables")
+
+    assert data.water_needs("Rice")["summer"] == 2000
+    assert data.water_needs("millet")["monsoon"] == 300
+    assert data.soil_water_factor("Sandy") == 1.3 and data.soil_water_factor("peat") == 1.0
+    assert dict(data.npk("potato", "flowering")) == {"N": 25, "P": 15, "K": 45}
+    assert dict(data.npk("potato", "fruiting")) == {"N": 25, "P": 20, "K": 20}
+    assert data.soil_nutrient_factors("clay")["P"] == 0.8
+    assert data.maturity_days("Cotton") == 180 and data.maturity_days("kale") == 100
+    assert data.yield_per_acre("sugarcane") == 35000 and data.yield_per_acre("kale") == 2000
+    assert data.equipment_cost("tractor 45+ HP") == 12.0
+    assert data.equipment_cost("drone sprayer") == 1.0 and data.equipment_cost("drone sprayer", 0) == 0
+    assert data.lookup("government_schemes", "kisan_credit_card")["name"]
+    print("✅ Keyed lookups and defaults")
+
+    assert data.crop_family("Potato") == "solanaceae"
+    assert data.crop_family("chickpeas") == "legumes"
+    assert data.crop_family("saffron") is None
+    print("✅ Crop family index")
+
+    assert data.nearest_city(30.95, 75.8)["city"] == "Ludhiana"
+    assert data.nearest_city(19.1, 74.7)["state"] == "Maharashtra"
+    assert data.nearest_city(51.5, -0.1) is None
+    print("✅ Nearest reference city")
+
+
+def test_immutability():
+    """Test that shared tables cannot be modified by a tool"""
+    data = get_agronomy_data()
+    for mutate in (
+        lambda: data.tables["crop_pests"].__setitem__("okra", ["aphids"]),
+        lambda: data.water_needs("wheat").__setitem__("summer", 0),
+        lambda: data.table("crop_pests")["tomato"].append("mites"),
+    ):
+        try:
+            mutate()
+        except (TypeError, AttributeError):
+            continue
+        raise AssertionError("agronomy table was mutated")
+    print("✅ Tables are read-only")
+
+
+def test_versioned_file():
+    """Test loading an alternative data file and rejecting incomplete ones"""
+    with open(DEFAULT_DATA_PATH, encoding="utf-8") as handle:
+        raw = json.load(handle)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "agronomy.json")
+        raw["version"] = "test-2"
+        raw["tables"]["maturity_days"]["kale"] = 60
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(raw, handle)
+        custom = AgronomyData.load(path)
+        assert custom.version == "test-2" and custom.maturity_days("kale") == 60
+        print("✅ Alternative data file loaded")
+
+        del raw["tables"]["crop_pests"]
+        try:
+            AgronomyData(raw)
+        except ValueError as e:
+            assert "crop_pests" in str(e)
+        else:
+            raise AssertionError("incomplete data file accepted")
+        print("✅ Incomplete data file rejected")
+
+
+if __name__ == "__main__":
+    test_registry_lookups()
+    test_immutability()
+    test_versioned_file()
+    print("\n🎉 All agronomy data tests completed successfully!")
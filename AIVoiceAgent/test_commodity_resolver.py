@@ -0,0 +1,98 @@
+"""
+Test script for the commodity name resolver
+"""
+
+import sys
+import os
+import time
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from commodity_resolver import CommodityResolver, COMMODITY_ALIASES
+
+
+def test_resolver():
+    """Test English, Hindi, transliterated and misspelled commodity names"""
+    print("🚀 Testing Commodity Resolver...")
+
+    resolver = CommodityResolver()
+    cases = {
+        "Wheat": "wheat",
+        "gehun": "wheat",
+        "गेहूं": "wheat",
+        "gehoon ka bhav": "wheat",
+        "whaet": "wheat",
+        "sarson": "mustard",
+        "tamatar": "tomato",
+        "tomatoe": "tomato",
+        "pyaaz": "onion",
+        "Tur/Arhar": "tur",
+        "arhar dal price": "tur",
+        "soyabeen": "soybean",
+        "phool gobhi": "cauliflower",
+    }
+
+    for text, expected in cases.items():
+        match = resolver.resolve(text)
+        assert match and match.commodity_id == expected, (text, match)
+        print(f"✅ {text!r} -> {match.commodity_id} ({match.method}, {match.score:.2f})")
+
+    assert resolver.resolve("tractor") is None
+    assert resolver.resolve("price") is None
+    assert resolver.resolve("") is None
+    print("✅ Unknown names are not forced onto a commodity")
+
+
+def test_distinct_products():
+    """Test that products and unknown crops are never folded into a base crop"""
+    print("🚀 Testing distinct commodity names...")
+
+    resolver = CommodityResolver()
+    for text in ["Castor Seed", "Green Peas", "Wheat Atta", "Rice Bran", "Cotton Seed", "Mustard Oil"]:
+        assert resolver.resolve(text) is None, (text, resolver.resolve(text))
+        assert resolver.resolve(text, fuzzy=False) is None, text
+    for text, expected in {"Ragi": "ragi", "Ragi (Finger Millet)": "ragi", "Gur": "jaggery",
+                           "Guar": "guar", "Cummin Seed(Jeera)": "cumin"}.items():
+        assert resolver.canonical(text) == expected, text
+    print("✅ Atta, oil, seed, bran and peas stay separate from their base crop")
+
+    # Scraped market names are matched as a whole name or one bracketed part
+    for text, expected in {"Sweet Potato": None, "Coriander(Leaves)": None, "Paddy(Dhan)(Common)": "paddy",
+                           "Rice": "rice", "Potato": "potato", "Coriander": "coriander",
+                           "Cummin Seed(Jeera)": "cumin", "Arhar (Tur/Red Gram)(Whole)": "tur",
+                           "Bhindi(Ladies Finger)": "okra"}.items():
+        assert resolver.canonical(text) == expected, (text, resolver.canonical(text))
+    assert resolver.resolve("sweet potato") is None and resolver.resolve("dhan ka bhav").commodity_id == "paddy"
+    print("✅ Sweet potato, coriander leaves and paddy get their own ids")
+
+    # Without their own entries, short names must not slip onto a neighbour either
+    base = {key: value for key, value in COMMODITY_ALIASES.items() if key not in ("ragi", "guar", "jaggery")}
+    resolver = CommodityResolver(base)
+    for text in ["Ragi", "Ragi (Finger Millet)", "Gur", "Guar"]:
+        assert resolver.resolve(text) is None, (text, resolver.resolve(text))
+    assert resolver.resolve("whaet").commodity_id == "wheat"
+    assert resolver.resolve("whaet", fuzzy=False) is None
+    print("✅ Low-confidence fuzzy matches are rejected; spoken misspellings still resolve")
+
+
+def test_resolver_speed():
+    """Resolution must stay well under a millisecond per lookup"""
+    print("🚀 Testing Commodity Resolver speed...")
+
+    resolver = CommodityResolver()
+    queries = ["gehun", "tomatoe", "sarson ka rate", "whaet", "unknown crop name"] * 200
+    start = time.perf_counter()
+    for query in queries:
+        resolver.resolve(query)
+    per_lookup_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    assert per_lookup_ms < 1.0, per_lookup_ms
+    print(f"✅ {per_lookup_ms:.3f} ms per lookup")
+
+
+if __name__ == "__main__":
+    test_resolver()
+    test_distinct_products()
+    test_resolver_speed()
+    print("\n🎉 All commodity resolver tests completed successfully!")
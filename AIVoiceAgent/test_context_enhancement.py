@@ -6,6 +6,7 @@ Verifies intelligent web scraping and location-based recommendations
 import asyncio
 import sys
 import os
+import time
 
 # Add the AIVoiceAgent directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -13,8 +14,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from context_enhancement import (
     enhance_context_with_web_search,
     get_user_location_context,
-    provide_comprehensive_answer_with_context
+    provide_comprehensive_answer_with_context,
+    gather_web_results,
+    search_web_cached
 )
+from session_context import SessionContext, request_scope
 
 # Mock RunContext for testing
 class MockRunContext:
@@ -97,6 +101,66 @@ async def test_location_specific_advice():
         print(f"Contains Web Results: {'Web Search' in result}")
         print(f"Contains Action Steps: {'Action Steps' in result}")
 
+class DelayedScraper:
+    """Web search double whose queries answer after fixed delays"""
+    
+    def __init__(self, delays):
+        self.delays = delays
+        self.web_scraper = self
+        self.finished = []
+        self.cancelled = []
+    
+    async def search_agricultural_web(self, query, max_results=10):
+        try:
+            await asyncio.sleep(self.delays[query])
+        except asyncio.CancelledError:
+            self.cancelled.append(query)
+            raise
+        self.finished.append(query)
+        # Every query also finds the same top article
+        return {"success": True, "results": [
+            {"title": "Shared", "description": "", "url": "https://shared.example", "relevance_score": 0.95}
+        ] + [
+            {"title": f"{query} {i}", "description": "", "url": f"https://{query}.example/{i}", "relevance_score": 0.9 - i / 10}
+            for i in range(max_results - 1)
+        ]}
+
+def test_web_fanout():
+    """Test concurrent web searches with early completion and a deadline"""
+    print("🚀 Testing Web Search Fan-out...")
+    
+    async def run():
+        scraper = DelayedScraper({"fast": 0.05, "medium": 0.1, "slow": 3.0})
+        start = time.perf_counter()
+        results = await gather_web_results(SessionContext(), scraper, ["slow", "fast", "medium"], enough=3)
+        elapsed = time.perf_counter() - start
+        assert elapsed < 0.5 and scraper.finished == ["fast", "medium"], (elapsed, scraper.finished)
+        assert [result["title"] for result in results] == ["Shared", "fast 0", "medium 0"]
+        # The search itself stops, not just the wait for it
+        await asyncio.sleep(0.01)
+        assert scraper.cancelled == ["slow"], scraper.cancelled
+        print(f"✅ Enough relevant results after {elapsed * 1000:.0f} ms, slow search cancelled, repeats merged")
+        
+        scraper = DelayedScraper({"slow": 1.0, "slower": 2.0})
+        start = time.perf_counter()
+        with request_scope():
+            assert await gather_web_results(SessionContext(), scraper, ["slow", "slower"], deadline=0.1) == []
+        assert time.perf_counter() - start < 0.3
+        await asyncio.sleep(0.01)
+        assert sorted(scraper.cancelled) == ["slow", "slower"] and not scraper.finished, scraper.cancelled
+        print("✅ Deadline bounds the wait; searches past it are cancelled inside a request scope too")
+        
+        # A search another tool is still waiting for keeps running
+        scraper = DelayedScraper({"fast": 0.05, "shared": 0.2})
+        session = SessionContext()
+        other_tool = asyncio.ensure_future(search_web_cached(session, scraper, "shared", max_results=3))
+        await asyncio.sleep(0.01)
+        await gather_web_results(session, scraper, ["shared", "fast"], enough=1)
+        assert (await other_tool)["success"] and scraper.finished == ["fast", "shared"] and not scraper.cancelled
+        print("✅ Searches shared with another tool are left to finish")
+    
+    asyncio.run(run())
+
 async def main():
     """Run all context enhancement tests"""
     print("🧠 INTELLIGENT CONTEXT ENHANCEMENT SYSTEM - COMPREHENSIVE TEST\n")
@@ -145,4 +209,5 @@ async def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
+    test_web_fanout()
     asyncio.run(main())
\ No newline at end of file
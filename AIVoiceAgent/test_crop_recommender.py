@@ -0,0 +1,73 @@
+"""
+Test script for the vectorized crop strategy recommendation engine
+"""
+
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from crop_recommender import CropStrategyEngine, current_season
+
+# Soil vectors: ph, organic carbon g/kg, sand %, silt %, clay %, cec cmol/kg, nitrogen g/kg
+HEAVY_CLAY = np.array([7.0, 8.0, 20.0, 30.0, 50.0, 35.0, 1.0])
+SANDY_LOAM = np.array([7.8, 15.0, 62.0, 25.0, 13.0, 12.0, 1.0])
+
+
+def test_recommendations():
+    """Test soil and season driven ranking with filters"""
+    print("🚀 Testing Crop Strategy Engine...")
+
+    engine = CropStrategyEngine.from_json()
+    clay = engine.recommend(HEAVY_CLAY, season="Kharif", top_k=3)
+    assert clay[0]["strategy_id"] == "pcf-001", clay
+    print(f"✅ Heavy clay, Kharif: {[r['strategy_name'] for r in clay]}")
+
+    sandy = engine.recommend(SANDY_LOAM, season="Rabi", top_k=2)
+    assert [r["strategy_id"] for r in sandy] == ["hv-006", "hv-003"], sandy
+    print(f"✅ Sandy loam, Rabi: {[r['strategy_name'] for r in sandy]}")
+
+    budget = engine.recommend(SANDY_LOAM, season="Rabi", top_k=6, max_investment=100000)
+    assert budget and all(r["investment_cost"] <= 100000 for r in budget)
+    integrated = engine.recommend(None, top_k=6, farming_type="integrated")
+    assert {r["strategy_id"] for r in integrated} == {"pcf-001", "if-004"}
+    print("✅ Investment and farming type filters applied")
+
+    assert current_season(7) == "Kharif" and current_season(11) == "Rabi" and current_season(4) == "Zaid"
+
+
+def test_batch_scoring():
+    """Thousands of strategies scored for many farms in one pass"""
+    print("🚀 Testing batch scoring...")
+
+    base = CropStrategyEngine.from_json().strategies
+    catalog = [{**base[i % len(base)], "strategy_id": f"s-{i}", "roi_percentage": 40 + i % 80}
+               for i in range(3000)]
+    engine = CropStrategyEngine(catalog)
+
+    rng = np.random.default_rng(7)
+    farms = np.column_stack([
+        rng.uniform(5.5, 8.5, 500), rng.uniform(2, 20, 500), rng.uniform(10, 80, 500),
+        rng.uniform(10, 40, 500), rng.uniform(5, 60, 500), rng.uniform(5, 40, 500), rng.uniform(0.5, 2, 500)
+    ])
+    farms[0] = np.nan  # a farm without soil data still gets recommendations
+
+    start = time.perf_counter()
+    results = engine.recommend_batch(farms, ["Rabi"], top_k=5, min_roi=60)
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 500 and all(len(r) == 5 for r in results)
+    assert all(r["roi_percentage"] >= 60 for farm in results for r in farm)
+    single = engine.recommend(farms[1], season="Rabi", top_k=5, min_roi=60)
+    assert [r["strategy_id"] for r in single] == [r["strategy_id"] for r in results[1]]
+    print(f"✅ 500 farms x 3000 strategies in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    test_recommendations()
+    test_batch_scoring()
+    print("\n🎉 All crop recommender tests completed successfully!")
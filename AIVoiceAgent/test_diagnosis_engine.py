@@ -0,0 +1,74 @@
+"""
+Test script for the symptom-indexed crop disease diagnosis engine
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from diagnosis_engine import TermAutomaton, get_diagnosis_engine
+import tools
+
+
+def test_term_automaton():
+    """Test whole-word, longest-first matching"""
+    print("🚀 Testing Diagnosis Engine...")
+
+    automaton = TermAutomaton({"white": "white", "white fly": "whitefly", "rot": "rot", "spots": "spots"})
+    found = [term for _, _, term in automaton.find("white fly near rotten root spots")]
+    assert found == ["whitefly", "spots"], found
+    print("✅ Whole-word longest matches")
+
+
+def test_differential_diagnosis():
+    """Test ranking, crop weighting and multilingual aliases"""
+    engine = get_diagnosis_engine()
+
+    blight = engine.diagnose("leaves yellowing with brown spots in rings", crop="tomato")
+    assert blight[0].condition_id == "early_blight", blight
+    assert blight[0].matched_symptoms == ["brown_spots", "concentric_rings"]
+    print(f"✅ Tomato: {[d.name for d in blight]}")
+
+    rice = engine.diagnose("dead heart and holes in stem", crop="dhan")
+    assert rice[0].condition_id == "stem_borer" and rice[0].kind == "pest"
+    print("✅ Crop aliases resolve (dhan -> rice)")
+
+    assert engine.match_symptoms("पत्ते पीले और सफेद मक्खी") == ["yellowing", "whiteflies_seen"]
+    assert engine.match_symptoms("safed powder on leaves") == ["powdery_coating"]
+    assert engine.diagnose("patte murjha rahe hain")[0].condition_id == "wilt_disease"
+    print("✅ Hindi and Hinglish symptom aliases")
+
+    # Crop priors reorder the same evidence
+    cotton = [d.condition_id for d in engine.diagnose("holes and caterpillars in bolls", crop="cotton")]
+    assert cotton[0] == "bollworm", cotton
+    assert engine.diagnose("the plant looks sad") == []
+    print("✅ Crop-weighted ranking")
+
+    transcript = "the lower leaves are yellow with brown spots, some white powder and a few sticky leaves " * 4
+    start = time.perf_counter()
+    for _ in range(200):
+        engine.diagnose(transcript, crop="tomato")
+    per_call = (time.perf_counter() - start) / 200
+    assert per_call < 0.01
+    print(f"✅ {len(transcript)}-char transcript diagnosed in {per_call * 1e6:.0f} µs")
+
+
+def test_diagnose_tool():
+    """Test the function tool output"""
+    response = asyncio.run(tools.diagnose_crop_disease(None, "white powdery coating on leaves", "okra"))
+    assert "Powdery mildew" in response and "Recommended Actions" in response
+    assert "Apply sulfur-based fungicide" in response
+    vague = asyncio.run(tools.diagnose_crop_disease(None, "something is wrong"))
+    assert vague.startswith("I need more specific symptoms")
+    print("✅ diagnose_crop_disease tool output")
+
+
+if __name__ == "__main__":
+    test_term_automaton()
+    test_differential_diagnosis()
+    test_diagnose_tool()
+    print("\n🎉 All diagnosis engine tests completed successfully!")
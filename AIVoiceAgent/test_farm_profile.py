@@ -0,0 +1,107 @@
+"""
+Test script for the farm profile RPC over the LiveKit data channel
+"""
+
+import sys
+import os
+import asyncio
+import json
+
+from livekit import rtc
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import farm_profile
+from farm_profile import FarmDataClient
+import tools
+
+FARMS = [
+    {"id": "f1", "name": "North Field", "cropType": "Wheat", "totalArea": 2.5, "soilType": "Loamy",
+     "center": {"lat": 30.9, "lng": 75.85}, "coordinates": [{"lat": 30.9, "lng": 75.85}], "isActive": True},
+    {"id": "f2", "name": "River Plot", "cropType": "Rice", "areaInSquareMeters": 8093.72,
+     "center": {"lat": 30.95, "lng": 75.8}, "coordinates": [], "isActive": True},
+]
+
+
+class FakeParticipant:
+    """Local participant whose published requests are answered by a fake web client"""
+
+    def __init__(self, room):
+        self.room = room
+        self.published = []
+
+    async def publish_data(self, payload, reliable=True, destination_identities=[], topic=""):
+        request = json.loads(payload)
+        self.published.append(request)
+        if self.room.respond:
+            # A stale reply for another request must not resolve this one
+            self.room.reply({"type": "farm_data_response", "request_id": "stale", "farms": []}, delay=0.01)
+            self.room.reply({"type": "farm_data_response", "request_id": request["request_id"],
+                             "farms": FARMS, "selected_farm_id": "f2"}, delay=0.05)
+
+
+class FakeRoom:
+    """Minimal room with data_received events"""
+
+    def __init__(self, respond=True):
+        self.respond = respond
+        self.handlers = {}
+        self.local_participant = FakeParticipant(self)
+
+    def on(self, event, callback):
+        self.handlers[event] = callback
+
+    def reply(self, message, delay):
+        packet = rtc.DataPacket(data=json.dumps(message).encode(), kind=0, participant=None, topic="farm_data")
+        asyncio.get_running_loop().call_later(delay, self.handlers["data_received"], packet)
+
+
+def test_farm_rpc():
+    """Test correlation, coalescing and caching of farm profiles"""
+    print("🚀 Testing Farm Profile RPC...")
+
+    async def run():
+        room = FakeRoom()
+        client = FarmDataClient(room, timeout=1.0)
+        first, second = await asyncio.gather(client.get_snapshot(), client.get_snapshot())
+        assert first is second and len(room.local_participant.published) == 1
+        assert first.selected.name == "River Plot" and first.selected.area_acres == 2.0
+        assert first.farms[0].latitude == 30.9 and first.farms[0].boundary == ((30.9, 75.85),)
+        print("✅ Concurrent tools share one correlated round trip")
+
+        assert await client.get_selected_farm() is first.selected
+        assert len(room.local_participant.published) == 1 and client.stats["cache_hits"] == 1
+        print("✅ Later tools read the profile from memory")
+
+        silent = FarmDataClient(FakeRoom(respond=False), timeout=0.1)
+        assert await silent.get_snapshot() is None and silent.stats["timeouts"] == 1
+        assert not silent.pending
+        print("✅ Missing web client times out cleanly")
+
+    asyncio.run(run())
+
+
+def test_farm_tools():
+    """Test the farm tools with and without a connected web client"""
+
+    async def run():
+        farm_profile.farm_client = FarmDataClient(FakeRoom(), timeout=1.0)
+        info = await tools.get_user_farm_info(None)
+        assert "North Field" in info and "River Plot** (selected)" in info and "4.50 acres" in info
+        crop = await tools.get_farm_for_crop_recommendations(None)
+        assert "River Plot" in crop and "latitude 30.95000" in crop
+        assert len(farm_profile.farm_client.room.local_participant.published) == 1
+
+        farm_profile.farm_client = FarmDataClient(FakeRoom(respond=False), timeout=0.1)
+        assert "Go to 'My Farm' page" in await tools.get_farm_for_crop_recommendations(None)
+        farm_profile.farm_client = None
+
+    asyncio.run(run())
+    print("✅ Farm tools use the web client's profile")
+
+
+if __name__ == "__main__":
+    test_farm_rpc()
+    test_farm_tools()
+    print("\n🎉 All farm profile tests completed successfully!")
@@ -0,0 +1,129 @@
+"""
+Test script for the camera frame sampler used in crop diagnosis
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+import numpy as np
+from livekit import rtc
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from frame_sampler import CameraFeed, FrameSampler, leaf_features, perceptual_hash, hamming, to_gray
+from session_context import SessionContext
+import tools
+
+HEIGHT, WIDTH = 240, 320
+
+
+class MockRunContext:
+    """RunContext stand-in carrying the session's userdata"""
+
+    def __init__(self, userdata):
+        self.userdata = userdata
+
+
+def make_leaf(seed: int, yellow: float = 0.0, brown: float = 0.0) -> np.ndarray:
+    """Textured green leaf with optional yellow band and brown lesions"""
+    rng = np.random.default_rng(seed)
+    shade = np.kron(rng.uniform(0.6, 1.0, (6, 8)), np.ones((HEIGHT // 6, WIDTH // 8)))
+    rgb = np.stack([40 * shade, 170 * shade, 50 * shade], axis=-1)
+    rgb += rng.normal(0, 12, rgb.shape)
+    if yellow:
+        rgb[:int(HEIGHT * yellow)] = [220, 200, 40]
+    if brown:
+        rows = int(HEIGHT * np.sqrt(brown))
+        rgb[-rows:, -rows:] = [120, 70, 30]
+    return np.clip(rgb, 0, 255).astype(np.uint8)
+
+
+def test_features():
+    """Test colour/lesion features and perceptual hashing"""
+    print("🚀 Testing Frame Sampler...")
+
+    healthy = leaf_features(make_leaf(1))
+    assert healthy["leaf_area"] > 0.9 and healthy["chlorosis_share"] < 0.02 and healthy["lesion_share"] < 0.02
+    sick = leaf_features(make_leaf(1, yellow=0.3, brown=0.1))
+    assert 0.25 < sick["chlorosis_share"] < 0.35 and 0.05 < sick["lesion_share"] < 0.12, sick
+    print(f"✅ Leaf features: yellowing {sick['chlorosis_share']:.0%}, lesions {sick['lesion_share']:.0%}")
+
+    gray = to_gray(make_leaf(2).astype(np.float32))
+    assert hamming(perceptual_hash(gray), perceptual_hash(gray + np.random.default_rng(0).normal(0, 4, gray.shape))) <= 6
+    assert hamming(perceptual_hash(gray), perceptual_hash(to_gray(make_leaf(3).astype(np.float32)))) > 10
+    print("✅ Perceptual hash is stable under noise and separates views")
+
+
+def feed(sampler: FrameSampler, views, seconds_per_view: float, fps: int = 30, start: float = 1000.0):
+    """Simulate a steady camera that switches view every seconds_per_view"""
+    timestamp = start
+    for rgb in views:
+        gray = to_gray(rgb.astype(np.float32))
+        for _ in range(int(seconds_per_view * fps)):
+            sampler.offer(gray, lambda rgb=rgb: rgb, timestamp)
+            timestamp += 1.0 / fps
+    return timestamp
+
+
+def test_sampling_budget():
+    """Test that motion, blur, duplicates and the per-minute cap bound the work"""
+    sampler = FrameSampler()
+    feed(sampler, [make_leaf(1)], seconds_per_view=20)
+    assert sampler.stats["received"] == 600 and sampler.stats["inspected"] <= 41
+    assert sampler.stats["analyzed"] == 1 and sampler.stats["duplicate"] >= 30
+    print(f"✅ Steady view: 600 frames -> {sampler.stats['analyzed']} analyzed")
+
+    sampler = FrameSampler()
+    feed(sampler, [make_leaf(seed) for seed in range(10, 30)], seconds_per_view=3)
+    assert sampler.stats["analyzed"] == 6 and sampler.stats["throttled"] > 0
+    assert sampler.stats["moving"] >= 19
+    print(f"✅ 20 views in 60 s -> {sampler.stats['analyzed']} analyzed (cap), {sampler.stats['moving']} moving")
+
+    sampler = FrameSampler()
+    flat = np.full((HEIGHT, WIDTH, 3), [60, 150, 60], dtype=np.uint8)
+    feed(sampler, [flat], seconds_per_view=5)
+    assert sampler.stats["analyzed"] == 0 and sampler.stats["blurry"] > 0
+    print("✅ Featureless (blurry) frames rejected")
+
+
+def test_livekit_frames_and_diagnosis():
+    """Test LiveKit frame input and the observation reaching diagnose_crop_disease"""
+    rgb = make_leaf(5, yellow=0.3, brown=0.1)
+    rgba = np.concatenate([rgb, np.full((HEIGHT, WIDTH, 1), 255, dtype=np.uint8)], axis=-1)
+    frame = rtc.VideoFrame(WIDTH, HEIGHT, rtc.VideoBufferType.RGBA, rgba.tobytes())
+
+    session = SessionContext()
+    session.camera = CameraFeed()
+    sampler = session.camera.sampler_for("TR_phone")
+    observation = sampler.offer_frame(frame.convert(rtc.VideoBufferType.I420), timestamp=time.monotonic())
+    assert observation is not None and set(observation.symptoms()) == {"yellowing", "brown_spots"}, observation
+    assert sampler.latest() is observation and session.camera.latest() is observation
+    print(f"✅ I420 frame observed: {observation.summary()}")
+
+    response = asyncio.run(tools.diagnose_crop_disease(MockRunContext(session), "please check this leaf", "tomato"))
+    assert "📷 Camera:" in response and "Early blight" in response, response
+    print("✅ Camera observation used by diagnose_crop_disease")
+
+    # The next caller (a new session in the same worker) never sees this frame
+    other = SessionContext()
+    other.camera = CameraFeed()
+    response = asyncio.run(tools.diagnose_crop_disease(MockRunContext(other), "please check this leaf", "tomato"))
+    assert "📷 Camera:" not in response, response
+    assert "📷 Camera:" not in asyncio.run(tools.diagnose_crop_disease(None, "please check this leaf", "tomato"))
+    print("✅ Observations stay with their own session")
+
+    # Each track compares motion against its own previous frame
+    second = session.camera.sampler_for("TR_drone")
+    assert second is not sampler and second.previous_thumbnail is None
+    assert session.camera.sampler_for("TR_phone") is sampler
+    print("✅ One sampler per video track")
+
+
+if __name__ == "__main__":
+    test_features()
+    test_sampling_budget()
+    test_livekit_frames_and_diagnosis()
+    print("\n🎉 All frame sampler tests completed successfully!")
@@ -0,0 +1,134 @@
+"""
+Test script for the bulk knowledge import command
+"""
+
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag_system import KnowledgeBase
+from knowledge_import import build_parser, import_corpus, parse_file, document_id
+from test_web_rerank import HashingEncoder
+
+ADVISORIES = [
+    {"id": "kvk-101", "title": "Wheat sowing advisory", "text": "Sow wheat varieties HD 3086 and PBW 725 by 15 November in Punjab.",
+     "category": "crop_info", "date": "2025-11-01", "district": "Ludhiana"},
+    {"title": "Mustard aphid alert", "text": "Spray neem oil when aphid colonies appear on mustard inflorescence.",
+     "source": "KVK Bharatpur"},
+    {"text": "short"},
+]
+
+
+def write_corpus(root: Path):
+    (root / "bulletins").mkdir()
+    with open(root / "advisories.jsonl", "w", encoding="utf-8") as f:
+        for record in ADVISORIES:
+            f.write(json.dumps(record) + "\n")
+        f.write("{not json\n")
+    (root / "bulletins" / "schemes.csv").write_text(
+        "Title,Content,Category\n"
+        "PM-KISAN,\"Eligible farmer families receive 6000 rupees a year in three instalments.\",government\n"
+        "Soil Health Card,\"Every farm gets a soil health card with nutrient status every two years.\",government\n",
+        encoding="utf-8")
+    (root / "bulletins" / "rice.md").write_text(
+        "# Rice nursery\nRaise the nursery on raised beds and keep it moist for 21 days.\n\n"
+        "## Transplanting\nTransplant two seedlings per hill at 20 by 15 centimetre spacing.\n",
+        encoding="utf-8")
+    (root / "bulletins" / "cotton.txt").write_text(
+        "Cotton pink bollworm\nUse pheromone traps at five per acre and destroy rosette flowers early.\n",
+        encoding="utf-8")
+    (root / "bulletins" / "notes.pdf").write_bytes(b"%PDF")
+
+
+def test_parsing():
+    """Test the record mapping of each format"""
+    print("🚀 Testing Knowledge Import...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_corpus(root)
+        advisories = parse_file(str(root / "advisories.jsonl"))
+        assert [doc["id"] for doc in advisories] == ["kvk-101", document_id(ADVISORIES[1]["text"])]
+        assert advisories[0]["category"] == "crop_info" and advisories[0]["timestamp"].startswith("2025-11-01")
+        assert advisories[0]["metadata"]["district"] == "Ludhiana" and advisories[1]["source"] == "KVK Bharatpur"
+        schemes = parse_file(str(root / "bulletins" / "schemes.csv"))
+        assert [doc["metadata"]["title"] for doc in schemes] == ["PM-KISAN", "Soil Health Card"]
+        rice = parse_file(str(root / "bulletins" / "rice.md"))
+        assert [doc["metadata"]["title"] for doc in rice] == ["Rice nursery", "Transplanting"]
+        cotton = parse_file(str(root / "bulletins" / "cotton.txt"))
+        assert cotton[0]["metadata"]["title"] == "Cotton pink bollworm"
+    print("✅ JSONL, CSV, Markdown and text records mapped (bad lines and stubs skipped)")
+
+    args = build_parser().parse_args(["import", "corpus/", "--db", "kb.db", "--workers", "2"])
+    assert args.command == "import" and args.paths == ["corpus/"] and args.workers == 2 and not args.restart
+    print("✅ Command line parsed")
+
+
+def test_import():
+    """Test the pooled import, batching and resume"""
+
+    async def run(root: Path):
+        db_path = str(root / "kb.db")
+        encoder = HashingEncoder()
+        knowledge_base = KnowledgeBase(db_path=db_path, model=encoder)
+        lines = []
+        stats = await import_corpus([str(root / "advisories.jsonl"), str(root / "bulletins")], knowledge_base,
+                                    workers=2, batch_size=3, progress=lines.append)
+        assert stats["files"] == 4 and stats["imported"] == 7 and stats["failed_files"] == 0, stats
+        assert len(lines) == 4 and lines[-1].startswith("[4/4 files]")
+        batches = [call for call in encoder.calls if not isinstance(call, str)]
+        assert all(len(batch) <= 3 for batch in batches) and len(batches) >= 3
+        hits = await knowledge_base.search_similar("pheromone traps for pink bollworm", k=1)
+        assert hits[0]["source"] == "import:cotton.txt" and hits[0]["category"] == "techniques"
+        scheme = next(m for m in knowledge_base.document_metadata if m["metadata"]["title"] == "PM-KISAN")
+        assert scheme["category"] == "government"
+        print(f"✅ 4 files imported as 7 documents in {len(batches)} batches")
+
+        # A rerun only reads what changed
+        again = await import_corpus([str(root)], KnowledgeBase(db_path=db_path, model=HashingEncoder()),
+                                    workers=2, progress=lines.append)
+        assert again["skipped_files"] == 4 and again["imported"] == 0, again
+        time.sleep(0.01)
+        with open(root / "advisories.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps({"text": "Irrigate wheat at crown root initiation, 21 days after sowing."}) + "\n")
+        resumed = KnowledgeBase(db_path=db_path, model=HashingEncoder())
+        again = await import_corpus([str(root)], resumed, workers=2, progress=lines.append)
+        assert again["skipped_files"] == 3 and again["imported"] == 1 and again["duplicates"] == 2, again
+        print("✅ Rerun skips imported files and stores only new records")
+
+        # An import that dies mid-way keeps what it committed and resumes from there
+        class FailingKnowledgeBase(KnowledgeBase):
+            async def add_documents(self, docs):
+                if self.index.ntotal >= 2:
+                    return 0
+                return await super().add_documents(docs)
+
+        fresh = str(root / "fresh.db")
+        failing = FailingKnowledgeBase(db_path=fresh, model=HashingEncoder())
+        try:
+            await import_corpus([str(root)], failing, workers=1, batch_size=2, progress=lines.append)
+            assert False, "the failed batch should stop the import"
+        except RuntimeError:
+            pass
+        recovered = await import_corpus([str(root)], KnowledgeBase(db_path=fresh, model=HashingEncoder()),
+                                        workers=2, progress=lines.append)
+        assert recovered["duplicates"] == 2 and recovered["imported"] == 6, recovered
+        print("✅ Interrupted import resumes without duplicating documents")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_corpus(root)
+        asyncio.run(run(root))
+
+
+if __name__ == "__main__":
+    test_parsing()
+    test_import()
+    print("\n🎉 All knowledge import tests completed successfully!")
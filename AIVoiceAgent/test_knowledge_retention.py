@@ -0,0 +1,189 @@
+"""
+Test script for knowledge base retention and compaction
+"""
+
+import sys
+import os
+import asyncio
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import rag_system
+from rag_system import KnowledgeBase, RAGDocument
+from test_web_rerank import HashingEncoder
+
+
+def price(commodity, rupees, age_hours, doc_id=None):
+    return RAGDocument(
+        id=doc_id or f"market_{commodity}_{age_hours}",
+        content=f"{commodity} price at Khanna mandi is {rupees} rupees per quintal",
+        metadata={"commodity": commodity, "summary": f"{commodity} price"},
+        timestamp=datetime.now() - timedelta(hours=age_hours),
+        source="market_prices",
+        category="market_data",
+    )
+
+
+def test_expiry():
+    """Test that expired prices stop matching and are compacted away, static knowledge stays"""
+    print("🚀 Testing Knowledge Retention...")
+
+    async def run(tmp):
+        db_path = os.path.join(tmp, "kb.db")
+        knowledge_base = KnowledgeBase(db_path=db_path, model=HashingEncoder())
+        static = RAGDocument(id="static_wheat", content="Wheat needs four to six irrigations in the rabi season",
+                             metadata={}, timestamp=datetime.now() - timedelta(days=400),
+                             source="static_knowledge", category="crop_info")
+        await knowledge_base.add_documents([price("wheat", 2200, 72), price("wheat", 2425, 2), static])
+
+        hits = await knowledge_base.search_similar("wheat price", k=5)
+        assert [hit["document_id"] for hit in hits] == ["market_wheat_2", "static_wheat"], hits
+        print("✅ Prices older than 48h no longer match before compaction")
+
+        stats = await knowledge_base.compact()
+        assert stats == {"deleted_rows": 1, "removed_vectors": 1, "vectors": 2}, stats
+        conn = sqlite3.connect(db_path)
+        ids = {row[0] for row in conn.execute("SELECT id FROM knowledge_documents")}
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        conn.close()
+        assert ids == {"market_wheat_2", "static_wheat"} and auto_vacuum == 2
+        reloaded = KnowledgeBase(db_path=db_path, model=HashingEncoder())
+        assert reloaded.index.ntotal == 2 and not reloaded.has_document("market_wheat_72")
+        print("✅ Expired row deleted, vector dropped, static knowledge kept")
+
+        custom = KnowledgeBase(db_path=db_path, model=HashingEncoder(), retention={"crop_info": timedelta(days=365)})
+        await custom.compact()
+        assert not custom.has_document("static_wheat") and custom.has_document("market_wheat_2")
+        print("✅ Retention policies are configurable per category")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+def test_legacy_database_conversion():
+    """Test that an older database is opened without a full VACUUM and converted by compaction"""
+
+    async def run(tmp):
+        db_path = os.path.join(tmp, "legacy.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE filler (data BLOB)")
+        conn.executemany("INSERT INTO filler VALUES (?)", [(b"x" * 4000,)] * 50)
+        conn.commit()
+        conn.close()
+
+        knowledge_base = KnowledgeBase(db_path=db_path, model=HashingEncoder())
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+        conn.close()
+        await knowledge_base.compact()
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+        print("✅ Older database opens and compacts without being rewritten")
+
+        conn.execute("DROP TABLE filler")
+        conn.commit()
+        conn.close()
+        previous = rag_system.AUTO_VACUUM_CONVERT_PAGES
+        rag_system.AUTO_VACUUM_CONVERT_PAGES = 20
+        try:
+            await knowledge_base.compact()
+        finally:
+            rag_system.AUTO_VACUUM_CONVERT_PAGES = previous
+        conn = sqlite3.connect(db_path)
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.close()
+        assert auto_vacuum == 2 and free_pages == 0, (auto_vacuum, free_pages)
+        print("✅ Compaction converts it once enough pages are free")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+def test_flat_over_months():
+    """Test that index size and search latency stay flat under continuous scraping"""
+
+    async def run(tmp):
+        db_path = os.path.join(tmp, "kb.db")
+        knowledge_base = KnowledgeBase(db_path=db_path, model=HashingEncoder())
+        start_time = datetime.now() - timedelta(days=90)
+        commodities = [f"crop{i}" for i in range(40)]
+        sizes, latencies = [], []
+        # 90 days of scraping every 6 hours: the same ids are re-scraped and new lots appear
+        for cycle in range(360):
+            now = start_time + timedelta(hours=6 * cycle)
+            knowledge_base.clock = lambda now=now: now
+            documents = [price(name, 2000 + cycle, 0, doc_id=f"market_{name}") for name in commodities[:20]]
+            documents += [price(name, 2000 + cycle, 0, doc_id=f"market_{name}_{cycle}") for name in commodities[20:22]]
+            for document in documents:
+                document.timestamp = now
+            await knowledge_base.add_documents(documents)
+            if cycle % 4 == 3:
+                await knowledge_base.compact()
+                sizes.append(knowledge_base.index.ntotal)
+                start = time.perf_counter()
+                await knowledge_base.search_similar("crop7 price", k=5)
+                latencies.append(time.perf_counter() - start)
+
+        assert max(sizes[10:]) <= 20 + 2 * 12, sizes[-5:]
+        assert max(sizes[-10:]) <= max(sizes[10:20]), (sizes[10:20], sizes[-10:])
+        hits = await knowledge_base.search_similar("crop7 price", k=1)
+        assert hits[0]["document_id"] == "market_crop7" and "2359" in hits[0]["snippet"]
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT COUNT(*) FROM knowledge_documents").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.close()
+        assert rows == knowledge_base.index.ntotal and free_pages < 1000
+        print(f"✅ After 90 simulated days: {knowledge_base.index.ntotal} vectors, {rows} rows, "
+              f"{free_pages} free pages, search {latencies[-1] * 1000:.1f} ms")
+
+        knowledge_base.clock = datetime.now
+        knowledge_base.start_compaction(interval=0.05)
+        await knowledge_base.add_documents([price("wheat", 2000, 100, doc_id="market_old")])
+        await asyncio.sleep(0.2)
+        assert not knowledge_base.has_document("market_old")
+        knowledge_base.stop_compaction()
+        print("✅ Background compaction job expires documents on its own")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+def test_replaced_documents():
+    """Test that a replaced document answers with its new text before compaction"""
+
+    async def run(tmp):
+        knowledge_base = KnowledgeBase(db_path=os.path.join(tmp, "kb.db"), model=HashingEncoder())
+        await knowledge_base.add_documents([price("wheat", 2200, 1, doc_id="market_khanna")])
+        replacement = RAGDocument(id="market_khanna", content="Mustard price at Khanna mandi is 5650 rupees per quintal",
+                                  metadata={"summary": "mustard price"}, timestamp=datetime.now(),
+                                  source="market_prices", category="market_data")
+        await knowledge_base.add_documents([replacement])
+
+        # The old wheat vector is still the closest to the query but is no longer current
+        hits = await knowledge_base.search_similar("wheat price", k=5)
+        assert [hit["document_id"] for hit in hits] == ["market_khanna"], hits
+        assert "5650" in hits[0]["snippet"] and "2200" not in hits[0]["snippet"], hits
+        print("✅ Replaced document's old vectors stop matching before compaction")
+
+        stats = await knowledge_base.compact()
+        assert stats == {"deleted_rows": 0, "removed_vectors": 1, "vectors": 1}, stats
+        hits = await knowledge_base.search_similar("wheat price", k=5)
+        assert "5650" in hits[0]["snippet"], hits
+        print("✅ Compaction drops the replaced vectors")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+if __name__ == "__main__":
+    test_expiry()
+    test_replaced_documents()
+    test_legacy_database_conversion()
+    test_flat_over_months()
+    print("\n🎉 All knowledge retention tests completed successfully!")
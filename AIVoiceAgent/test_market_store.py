@@ -0,0 +1,157 @@
+"""
+Test script for the market price time-series store
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from market_store import MarketPriceStore
+
+
+def make_records(days: int = 20):
+    """Build a rising wheat series in Punjab and a flat one in Haryana"""
+    records = []
+    for offset in range(days):
+        day = (date.today() - timedelta(days=days - 1 - offset)).strftime("%d/%m/%Y")
+        records.append({
+            "commodity": "Wheat", "market": "Punjab APMC", "state": "Punjab",
+            "currentPrice": 2200 + offset * 10, "unit": "₹/quintal",
+            "arrivalDate": day, "scrapedFrom": "agmarknet"
+        })
+        records.append({
+            "commodity": "Wheat", "market": "Haryana Mandi", "state": "Haryana",
+            "currentPrice": 2300, "unit": "₹/quintal",
+            "arrivalDate": day, "scrapedFrom": "agmarknet"
+        })
+    return records
+
+
+def test_price_store():
+    """Test ingest, aggregates and trend detection"""
+    print("🚀 Testing Market Price Store...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MarketPriceStore(db_path=os.path.join(tmp, "prices.db"))
+        stored = store.ingest_records(make_records())
+        print(f"✅ Stored {stored} records")
+
+        # Re-ingesting the same scrape must not duplicate history
+        store.ingest_records(make_records())
+        stats = store.price_stats("wheat")
+        assert stats["count"] == 40, stats
+        print(f"✅ Stats: min ₹{stats['min']:.0f}, max ₹{stats['max']:.0f}, median ₹{stats['median']:.0f}")
+
+        punjab = store.price_trend("Wheat", state="Punjab")
+        haryana = store.price_trend("wheat", state="haryana")
+        assert punjab["direction"] == "rising", punjab
+        assert haryana["direction"] == "stable", haryana
+        print(f"✅ Punjab trend: {punjab['direction']} ({punjab['change_percent']:+.1f}%)")
+        print(f"✅ Haryana trend: {haryana['direction']} ({haryana['change_percent']:+.1f}%)")
+
+        rolling = store.rolling_average("wheat", window_days=7, state="Punjab")
+        assert abs(rolling["prices"][-1] - (2200 + 16 * 10)) < 1e-6, rolling["prices"][-1]
+        print(f"✅ 7-day rolling average today: ₹{rolling['prices'][-1]:.0f}")
+
+        by_state = store.compare_states("wheat")
+        assert by_state[0]["state"] == "Punjab", by_state
+        print(f"✅ Cheapest state: {by_state[0]['state']}")
+
+        # A fresh store must see the persisted history
+        reloaded = MarketPriceStore(db_path=os.path.join(tmp, "prices.db"))
+        assert reloaded.list_commodities() == ["Wheat"]
+        print("✅ History reloaded from SQLite")
+
+
+def test_aggregates():
+    """Test precomputed commodity x state summaries and incremental refresh"""
+    print("🚀 Testing Market Aggregates...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MarketPriceStore(db_path=os.path.join(tmp, "prices.db"))
+        store.ingest_records(make_records(days=35))
+
+        punjab = store.get_aggregate("Wheat", "Punjab")
+        assert punjab.latest_price == 2200 + 34 * 10, punjab
+        assert abs(punjab.change_7d - 70 / 2470 * 100) < 1e-6, punjab
+        print(f"✅ Punjab: ₹{punjab.latest_price:.0f}, 7d {punjab.change_7d:+.1f}%, 30d {punjab.change_30d:+.1f}%")
+
+        overall = store.get_aggregate("wheat")
+        assert overall.cheapest_market == "Haryana Mandi", overall
+        assert overall.costliest_market == "Punjab APMC", overall
+        print(f"✅ All India: cheapest {overall.cheapest_market}, costliest {overall.costliest_market}")
+
+        # A new scrape for one market must update only that commodity's summaries
+        store.ingest_records([{
+            "commodity": "Wheat", "market": "Haryana Mandi", "state": "Haryana",
+            "currentPrice": 2100, "arrivalDate": date.today().strftime("%d/%m/%Y"),
+            "scrapedFrom": "nafed"
+        }])
+        haryana = store.get_aggregate("wheat", "haryana")
+        assert haryana.latest_price == 2200, haryana
+        # Two sources quoting one market on one day count as one averaged quote
+        assert store.get_aggregate("wheat").cheapest_price == 2200
+        assert haryana.markets == 1 and haryana.cheapest_price == haryana.costliest_price == 2200
+        print(f"✅ Incremental refresh: Haryana latest ₹{haryana.latest_price:.0f}")
+
+        # A market whose sources disagree is ranked once, not as both extremes
+        today = date.today().strftime("%d/%m/%Y")
+        store.ingest_records([
+            {"commodity": "Maize", "market": "Karnal", "state": "Haryana", "currentPrice": price,
+             "arrivalDate": today, "scrapedFrom": source}
+            for price, source in ((1000, "nafed"), (3000, "agmarknet"))
+        ] + [{"commodity": "Maize", "market": "Kaithal", "state": "Haryana", "currentPrice": 2500,
+              "arrivalDate": today, "scrapedFrom": "agmarknet"}])
+        maize = store.get_aggregate("maize")
+        assert (maize.cheapest_market, maize.cheapest_price) == ("Karnal", 2000), maize
+        assert (maize.costliest_market, maize.costliest_price) == ("Kaithal", 2500), maize
+        assert maize.markets == 2 and maize.latest_price == 2250, maize
+        print(f"✅ Multi-source market collapsed: cheapest {maize.cheapest_market}, costliest {maize.costliest_market}")
+
+
+def test_distinct_series():
+    """Test that products and unknown crops get their own price series"""
+    print("🚀 Testing distinct commodity series...")
+
+    names = {"Wheat": 2400, "Wheat Atta": 3200, "Mustard": 5600, "Mustard Oil": 14000, "Ragi": 3800,
+             "Castor Seed": 6200, "Cotton Seed": 3500, "Rice Bran": 1900, "Green Peas": 4200,
+             "Gur": 4000, "Guar": 5100, "Potato": 1200, "Sweet Potato": 2100, "Rice": 3900,
+             "Paddy(Dhan)(Common)": 2300, "Coriander": 7000, "Coriander(Leaves)": 1500}
+    today = date.today().strftime("%d/%m/%Y")
+    records = [{"commodity": name, "market": "Jaipur" if name in ("Wheat", "Mustard") else "Kota",
+                "state": "Rajasthan", "currentPrice": price,
+                "arrivalDate": today, "scrapedFrom": "agmarknet"} for name, price in names.items()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "prices.db")
+        store = MarketPriceStore(db_path=db_path)
+        store.ingest_records(records)
+        assert len(store.series) == len(names), sorted(store.series)
+        for name, price in names.items():
+            stats = store.price_stats(name)
+            assert stats["count"] == 1 and stats["max"] == price, (name, stats)
+        assert store.price_stats("gehun")["max"] == 2400 and store.price_stats("whaet")["max"] == 2400
+        assert store.price_stats("dhan")["max"] == 2300 and store.price_stats("chawal")["max"] == 3900
+        print(f"✅ {len(names)} names kept in {len(store.series)} series; spoken names still find wheat")
+
+        # History keyed by the old fuzzy resolver is split back out on open
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE market_prices SET commodity = 'wheat' WHERE commodity_name = 'Wheat Atta'")
+        conn.execute("UPDATE market_prices SET commodity = 'mustard' WHERE commodity_name = 'Ragi'")
+        conn.commit()
+        conn.close()
+        reopened = MarketPriceStore(db_path=db_path)
+        assert reopened.price_stats("wheat")["count"] == 1 and reopened.price_stats("ragi")["max"] == 3800
+        print("✅ Merged history re-keyed when the store is opened")
+
+
+if __name__ == "__main__":
+    test_price_store()
+    test_aggregates()
+    test_distinct_series()
+    print("\n🎉 All market store tests completed successfully!")
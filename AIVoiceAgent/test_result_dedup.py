@@ -0,0 +1,87 @@
+"""
+Test script for near-duplicate elimination of web search results
+"""
+
+import sys
+import os
+import random
+import time
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from result_dedup import canonicalize_url, simhash, tokenize, hamming, dedupe_results, ResultDeduplicator
+
+ARTICLE = ("Wheat sowing in Punjab should be completed between 25 October and 15 November. "
+           "Use 40 kg seed per acre, treat seed with fungicide and apply half the nitrogen at sowing.")
+
+
+def result(url, description=ARTICLE, title="Wheat sowing guide for Punjab farmers", score=0.6):
+    return {"title": title, "description": description, "url": url, "relevance_score": score}
+
+
+def test_canonical_urls():
+    """Test that trivially different links to one page compare equal"""
+    print("🚀 Testing Result Deduplication...")
+
+    canonical = canonicalize_url("https://www.agri.example/crops/wheat/")
+    for variant in (
+        "http://agri.example/crops/wheat",
+        "https://m.agri.example/crops/wheat/index.html",
+        "https://www.agri.example/crops/wheat/?utm_source=ddg&utm_medium=web#sowing",
+        "https://agri.example//crops/wheat/amp/?fbclid=abc",
+        "HTTPS://WWW.AGRI.EXAMPLE/crops/wheat",
+    ):
+        assert canonicalize_url(variant) == canonical, variant
+    assert canonicalize_url("https://agri.example/crops?id=2&page=1") == canonicalize_url("https://agri.example/crops?page=1&id=2")
+    assert canonicalize_url("https://agri.example/crops?id=2") != canonicalize_url("https://agri.example/crops?id=3")
+    assert canonicalize_url("https://agri.example/crops/Wheat") != canonicalize_url("https://agri.example/crops/rice")
+    print("✅ Tracking parameters, mirrors and fragments canonicalized")
+
+
+def test_simhash():
+    """Test that near-identical snippets get close fingerprints and different ones do not"""
+    base = simhash(tokenize(ARTICLE))
+    edited = simhash(tokenize(ARTICLE.replace("40 kg", "40kg") + " Read more"))
+    other = simhash(tokenize("Rice transplanting in Kerala needs standing water and 21 day old seedlings "
+                             "from a well managed nursery bed with organic manure."))
+    assert hamming(base, edited) <= 7 and hamming(base, other) > 14, (hamming(base, edited), hamming(base, other))
+    print(f"✅ SimHash distance: edited copy {hamming(base, edited)} bits, other article {hamming(base, other)} bits")
+
+
+def test_dedupe():
+    """Test collapsing of URL variants and syndicated copies"""
+    results = [
+        result("https://agri.example/wheat?utm_source=ddg", score=0.5),
+        result("https://www.agri.example/wheat", score=0.7),
+        result("https://news.example/syndicated/wheat-sowing", title="Punjab: when to sow wheat this rabi"),
+        result("https://other.example/rice", description="Rice transplanting in Kerala needs standing water "
+               "and 21 day old seedlings from a nursery bed.", title="Rice transplanting"),
+        result("https://blog.example/home", description="Short", title="Home"),
+        result("https://shop.example/home", description="Short", title="Home"),
+    ]
+    kept = dedupe_results(results)
+    assert [r["url"] for r in kept] == [
+        "https://www.agri.example/wheat", "https://other.example/rice",
+        "https://blog.example/home", "https://shop.example/home",
+    ], [r["url"] for r in kept]
+    print(f"✅ {len(results)} results -> {len(kept)} (best-scored copy kept, generic titles not merged)")
+
+    rng = random.Random(7)
+    vocabulary = tokenize(ARTICLE + " rice maize cotton mustard gram soil water pest yield market price "
+                          "Kerala Bihar Gujarat monsoon drip tractor subsidy loan seed nursery organic")
+    deduplicator = ResultDeduplicator()
+    start = time.perf_counter()
+    for i in range(2000):
+        deduplicator.add(result(f"https://site{i}.example/page", title=f"Article {i}",
+                                description=" ".join(rng.choices(vocabulary, k=20))))
+    elapsed = time.perf_counter() - start
+    assert len(deduplicator.results) > 1950 and elapsed < 2.0, (len(deduplicator.results), elapsed)
+    print(f"✅ 2000 distinct results processed in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    test_canonical_urls()
+    test_simhash()
+    test_dedupe()
+    print("\n🎉 All result deduplication tests completed successfully!")
@@ -0,0 +1,106 @@
+"""
+Test script for freshness-aware knowledge base search
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag_system import KnowledgeBase, RAGDocument, FRESHNESS_WEIGHT
+from test_web_rerank import HashingEncoder
+
+
+def document(doc_id, content, age, category="market_data"):
+    return RAGDocument(id=doc_id, content=content, metadata={"summary": doc_id},
+                       timestamp=datetime.now() - age, source="market_prices", category=category)
+
+
+OLD_PRICE = "Wheat price at Khanna mandi is 2200 rupees per quintal"
+NEW_PRICE = "Wheat price at Khanna mandi is 2425 rupees per quintal as of this morning"
+
+
+def test_freshness_ranking():
+    """Test that newer prices outrank slightly closer old ones and static knowledge is untouched"""
+    print("🚀 Testing Freshness-Aware Search...")
+
+    async def run(tmp):
+        # Keep old prices around so decay alone decides
+        knowledge_base = KnowledgeBase(db_path=os.path.join(tmp, "kb.db"), model=HashingEncoder(),
+                                       retention={"market_data": None})
+        await knowledge_base.add_documents([
+            document("price_old", OLD_PRICE, timedelta(days=21)),
+            document("price_today", NEW_PRICE, timedelta(hours=1)),
+            document("wheat_guide", "Wheat procurement support guide for farmers", timedelta(days=365), "government"),
+        ])
+
+        plain = await knowledge_base.search_similar("wheat price Khanna mandi quintal", k=3)
+        assert plain[0]["document_id"] == "price_old", [hit["document_id"] for hit in plain]
+        print("✅ Similarity alone ranks by wording unless freshness is asked for")
+        hits = await knowledge_base.search_similar("wheat price Khanna mandi quintal", k=3, freshness=True)
+        ranked = {hit["document_id"]: hit for hit in hits}
+        assert hits[0]["document_id"] == "price_today", [hit["document_id"] for hit in hits]
+        assert ranked["price_old"]["similarity_score"] > ranked["price_today"]["similarity_score"]
+        assert ranked["price_old"]["freshness"] < 0.01 and ranked["price_today"]["freshness"] > 0.9
+        assert abs(ranked["price_old"]["ranking_score"] - (1 - FRESHNESS_WEIGHT) * ranked["price_old"]["similarity_score"]) < 1e-6
+        guide = ranked["wheat_guide"]
+        assert guide["freshness"] == 1.0 and guide["ranking_score"] == guide["similarity_score"]
+        scores = [hit["ranking_score"] for hit in hits]
+        assert scores == sorted(scores, reverse=True)
+        print(f"✅ Today's price ranks first ({ranked['price_today']['ranking_score']:.2f} vs "
+              f"{ranked['price_old']['ranking_score']:.2f}); year-old static knowledge not decayed")
+
+        # Within the default retention window the decay still orders prices by age
+        default = KnowledgeBase(db_path=os.path.join(tmp, "default.db"), model=HashingEncoder())
+        await default.add_documents([document("price_yesterday", OLD_PRICE, timedelta(hours=36)),
+                                     document("price_today", NEW_PRICE, timedelta(hours=1))])
+        hits = await default.search_similar("wheat price Khanna mandi quintal", k=2, freshness=True)
+        assert [hit["document_id"] for hit in hits] == ["price_today", "price_yesterday"]
+        print("✅ Half-day half-life reorders prices inside the retention window")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+def test_vector_arrays():
+    """Test that the freshness arrays follow the index through reloads and compaction, at scale"""
+
+    async def run(tmp):
+        db_path = os.path.join(tmp, "kb.db")
+        knowledge_base = KnowledgeBase(db_path=db_path, model=HashingEncoder())
+        documents = [document(f"market_{i}", f"Mandi {i} quotes crop{i % 50} at {1500 + i} rupees", timedelta(hours=i % 60))
+                     for i in range(5000)]
+        await knowledge_base.add_documents(documents)
+        assert len(knowledge_base._timestamps) == knowledge_base.index.ntotal == 5000
+
+        start = time.perf_counter()
+        for _ in range(20):
+            hits = await knowledge_base.search_similar("crop7 rupees mandi", k=5, freshness=True)
+        elapsed = (time.perf_counter() - start) / 20
+        assert len(hits) == 5 and len({hit["document_id"] for hit in hits}) == 5
+        assert all(hit["timestamp"] > datetime.now() - timedelta(hours=48) for hit in hits)
+        print(f"✅ 5000 vectors: search with freshness re-ranking in {elapsed * 1000:.1f} ms")
+
+        stats = await knowledge_base.compact()
+        assert stats["removed_vectors"] > 0
+        assert len(knowledge_base._timestamps) == len(knowledge_base._parent_codes) == knowledge_base.index.ntotal
+        reloaded = KnowledgeBase(db_path=db_path, model=HashingEncoder())
+        assert len(reloaded._half_life_seconds) == reloaded.index.ntotal == knowledge_base.index.ntotal
+        again = await reloaded.search_similar("crop7 rupees mandi", k=5, freshness=True)
+        assert [hit["document_id"] for hit in again] == [hit["document_id"] for hit in
+                                                          await knowledge_base.search_similar("crop7 rupees mandi", k=5, freshness=True)]
+        print("✅ Per-vector arrays stay aligned through compaction and reload")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+if __name__ == "__main__":
+    test_freshness_ranking()
+    test_vector_arrays()
+    print("\n🎉 All freshness search tests completed successfully!")
@@ -0,0 +1,218 @@
+"""
+Test script for the per-session context store shared across tools
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from session_context import SessionContext, get_session_context, request_scope, current_request_memo
+from farm_profile import FarmDataClient
+from test_farm_profile import FakeRoom
+import weather_service
+import rag_system
+import tools
+import context_enhancement
+
+
+class MockRunContext:
+    """RunContext stand-in carrying the session's userdata"""
+
+    def __init__(self, userdata):
+        self.userdata = userdata
+
+
+class NoUserdataContext:
+    """Mirrors RunContext when the AgentSession was created without userdata"""
+
+    @property
+    def userdata(self):
+        raise ValueError("AgentSession userdata is not set")
+
+
+class CountingWeather:
+    """Weather service double that counts API lookups"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def is_configured(self):
+        return True
+
+    async def get_current_weather(self, city):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if city == "Atlantis":
+            return {"success": False, "status": 404}
+        record = weather_service.WeatherRecord(
+            city=city, description="clear sky", condition_id=800, condition="Clear", temperature=24.0,
+            feels_like=24.0, humidity=50.0, pressure=1012.0, wind_speed=2.0, wind_gust=0.0,
+            rain_1h=0.0, clouds=0.0, observed_at=0.0,
+        )
+        return {"success": True, "record": record}
+
+
+class CountingRAG:
+    """RAG system double that counts knowledge base passes and web searches"""
+
+    def __init__(self):
+        self.kb_calls = []
+        self.web_calls = []
+        self.web_scraper = self
+
+    async def query_comprehensive(self, query, include_web_search=True, owner=None):
+        self.kb_calls.append((query, include_web_search))
+        await asyncio.sleep(0.01)
+        result = {
+            "query": query,
+            "knowledge_base_results": [{"metadata": {"summary": "Sow wheat in November"}, "source": "kb", "category": "crops"}],
+            "web_search_results": [],
+            "recommendations": [],
+        }
+        if include_web_search:
+            result["web_search_results"] = await self.search_agricultural_web(query)
+        return result
+
+    async def search_agricultural_web(self, query, max_results=10):
+        self.web_calls.append(query)
+        return {"success": True, "results": [
+            {"title": f"Guide {len(self.web_calls)}", "description": "Wheat sowing guide", "url": "https://example.org", "relevance_score": 0.8}
+        ]}
+
+
+def test_store():
+    """Test TTLs, coalescing and failure handling of the store"""
+    print("🚀 Testing Session Context Store...")
+
+    async def run():
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        session = SessionContext(ttls={"retrieval": 0.05})
+        values = await asyncio.gather(*(session.get_or_load("retrieval", "Wheat  Sowing", loader) for _ in range(5)))
+        assert values == [1] * 5 and len(calls) == 1
+        assert await session.get_or_load("retrieval", "wheat sowing", loader) == 1
+        print("✅ Parallel tools share one load; keys ignore case and spacing")
+
+        await asyncio.sleep(0.06)
+        assert await session.get_or_load("retrieval", "wheat sowing", loader) == 2
+        session.invalidate("retrieval")
+        assert await session.get_or_load("retrieval", "wheat sowing", loader) == 3
+        print("✅ Entries expire after their field TTL or on invalidation")
+
+        async def failing():
+            calls.append(1)
+            return None
+
+        before = len(calls)
+        await session.get_or_load("farm", "snapshot", failing)
+        await session.get_or_load("farm", "snapshot", failing)
+        assert len(calls) == before + 2
+        print("✅ Failed loads are retried")
+
+    asyncio.run(run())
+
+    session = SessionContext()
+    assert get_session_context(MockRunContext(session)) is session
+    assert isinstance(get_session_context(NoUserdataContext()), SessionContext)
+    assert get_session_context(None) is not get_session_context(None)
+    print("✅ Store found on the RunContext, throwaway store outside a session")
+
+
+def test_tools_share_context():
+    """Test that the farm and location tools of a turn share one data-channel request"""
+
+    async def run():
+        room = FakeRoom()
+        context = MockRunContext(SessionContext(farm_client=FarmDataClient(room, timeout=1.0)))
+
+        location, info, crop = await asyncio.gather(
+            context_enhancement.get_user_location_context(context),
+            tools.get_user_farm_info(context),
+            tools.get_farm_for_crop_recommendations(context),
+        )
+        assert location["has_farm_profile"] and location["location"] == "Ludhiana, Punjab"
+        assert location["state"] == "Punjab" and location["farm_size"] == "2.00 acres"
+        assert "River Plot" in info and "River Plot" in crop
+        assert len(room.local_participant.published) == 1
+        print(f"✅ Three tools, one farm request: {location['location']}")
+
+        silent = MockRunContext(SessionContext(farm_client=FarmDataClient(FakeRoom(respond=False), timeout=0.1)))
+        fallback = await context_enhancement.get_user_location_context(silent)
+        assert not fallback["has_farm_profile"] and fallback["location"] == "India"
+        print("✅ Falls back to India without a farm profile")
+
+    asyncio.run(run())
+
+
+def test_weather_snapshot():
+    """Test that weather is fetched once per city per session"""
+    previous = weather_service.weather_service
+    weather_service.weather_service = CountingWeather()
+    try:
+        async def run():
+            context = MockRunContext(SessionContext())
+            first = await tools.get_weather(context, "Pune")
+            advice = await tools.get_weather_farming_advice(context, " pune ")
+            assert "clear sky" in first and "Farming Advice" in advice
+            assert weather_service.weather_service.calls == 1
+            await tools.get_weather(context, "Atlantis")
+            await tools.get_weather(context, "Atlantis")
+            assert weather_service.weather_service.calls == 3
+
+        asyncio.run(run())
+    finally:
+        weather_service.weather_service = previous
+    print("✅ Weather snapshot reused across tools; failures retried")
+
+
+def test_request_scope():
+    """Test that nested helpers of one tool invocation share identical lookups"""
+    previous = rag_system.rag_system
+    rag_system.rag_system = fake = CountingRAG()
+    try:
+        async def run():
+            calls = []
+
+            async def loader():
+                calls.append(1)
+                return None
+
+            with request_scope() as memo:
+                with request_scope() as nested:
+                    assert nested is memo
+                # Throwaway session stores in one request still share the load, failures included
+                await SessionContext().get_or_load("retrieval", "q", loader)
+                await SessionContext().get_or_load("retrieval", "Q ", loader)
+            assert len(calls) == 1 and current_request_memo() is None
+
+            answer = await context_enhancement.provide_comprehensive_answer_with_context(
+                None, "when should I sow wheat", "low")
+            assert "Enhanced Answer" in answer
+            assert fake.kb_calls == [("when should I sow wheat", False)], fake.kb_calls
+            assert len(fake.web_calls) == len(set(fake.web_calls)) == 3
+            print(f"✅ Low confidence: {len(fake.kb_calls)} KB pass, {len(fake.web_calls)} distinct web searches")
+
+            fake.kb_calls.clear()
+            await context_enhancement.provide_comprehensive_answer_with_context(None, "when should I sow wheat")
+            assert fake.kb_calls == [("when should I sow wheat", True)], fake.kb_calls
+            print("✅ Enhanced path reuses the knowledge base half of the first query")
+
+        asyncio.run(run())
+    finally:
+        rag_system.rag_system = previous
+
+
+if __name__ == "__main__":
+    test_store()
+    test_tools_share_context()
+    test_weather_snapshot()
+    test_request_scope()
+    print("\n🎉 All session context tests completed successfully!")
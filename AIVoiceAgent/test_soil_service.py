@@ -0,0 +1,177 @@
+"""
+Test script for the cached SoilGrids soil service
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import time
+
+import numpy as np
+
+from aiohttp import web
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from soil_service import SoilService, LocalSoilGrid, geohash_encode, parse_soilgrids, MAX_CONCURRENT_SOIL_REQUESTS
+
+# SoilGrids-shaped layers: mapped values are scaled by d_factor
+SOILGRIDS_LAYERS = {
+    "phh2o": (10, 72), "soc": (10, 85), "sand": (10, 420), "silt": (10, 330),
+    "clay": (10, 250), "cec": (10, 180), "nitrogen": (100, 110)
+}
+
+
+def make_soilgrids_response():
+    return {"properties": {"layers": [
+        {
+            "name": name,
+            "unit_measure": {"d_factor": d_factor},
+            "depths": [{"label": label, "values": {"mean": mean}}
+                       for label in ("0-5cm", "5-15cm", "15-30cm")]
+        }
+        for name, (d_factor, mean) in SOILGRIDS_LAYERS.items()
+    ]}}
+
+
+async def run_soil_service_checks(db_path):
+    calls = []
+
+    async def query(request):
+        calls.append(dict(request.query))
+        await asyncio.sleep(0.05)
+        return web.json_response(make_soilgrids_response())
+
+    app = web.Application()
+    app.router.add_get("/query", query)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/query"
+
+    service = SoilService(db_path=db_path, base_url=base_url)
+    try:
+        # Two points in the same village share a tile and one request
+        first, second = await asyncio.gather(
+            service.get_soil_profile(30.9010, 75.8573),
+            service.get_soil_profile(30.9012, 75.8575)
+        )
+        assert first["success"] and second["success"]
+        assert first["tile"] == second["tile"] and len(calls) == 1, calls
+        print(f"✅ Tile {first['tile']}: {first['profile'].to_dict()}")
+
+        repeat = await service.get_soil_profile(30.9011, 75.8574)
+        assert repeat["cached"] and len(calls) == 1
+        print("✅ Repeat lookup served from cache")
+    finally:
+        await service.close_session()
+        await runner.cleanup()
+
+    # A new process must not touch the network for a cached tile
+    restarted = SoilService(db_path=db_path, base_url="http://127.0.0.1:9/unreachable")
+    result = await restarted.get_soil_profile(30.9010, 75.8573)
+    assert result["cached"] and result["profile"].ph == first["profile"].ph
+    print("✅ Tile reloaded from SQLite without a network call")
+
+
+async def run_batch_limit_checks(db_path):
+    active, peak = [0], [0]
+
+    async def query(request):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.02)
+        active[0] -= 1
+        return web.json_response(make_soilgrids_response())
+
+    app = web.Application()
+    app.router.add_get("/query", query)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/query"
+
+    service = SoilService(db_path=db_path, base_url=base_url)
+    try:
+        # 30 farms in different villages: all answered, never more than the cap in flight
+        results = await asyncio.gather(*[service.get_soil_profile(29.0 + i * 0.1, 75.0) for i in range(30)])
+        assert all(result["success"] for result in results) and service.stats["requests"] == 30
+        assert peak[0] <= MAX_CONCURRENT_SOIL_REQUESTS, peak
+        print(f"✅ 30-farm batch: at most {peak[0]} SoilGrids requests in flight")
+    finally:
+        await service.close_session()
+        await runner.cleanup()
+
+
+def test_soil_service():
+    """Test parsing, tile caching and persistence"""
+    print("🚀 Testing Soil Service...")
+
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    profile = parse_soilgrids(make_soilgrids_response())
+    assert abs(profile.ph - 7.2) < 1e-5 and abs(profile.clay - 25.0) < 1e-5
+    assert abs(profile.nitrogen - 1.1) < 1e-5 and profile.texture == "Loam"
+    print(f"✅ Parsed profile: pH {profile.ph:.1f}, clay {profile.clay:.0f}%, {profile.texture}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run_soil_service_checks(os.path.join(tmp, "soil.db")))
+        asyncio.run(run_batch_limit_checks(os.path.join(tmp, "batch.db")))
+
+
+def test_local_soil_grid():
+    """Test offline nearest-cell lookups from NPZ and CSV exports"""
+    print("🚀 Testing Local Soil Grid...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Regular 0.05° grid over part of Punjab; pH rises west to east
+        lats, lons = np.meshgrid(np.arange(29.5, 32.5, 0.05), np.arange(74.0, 77.0, 0.05), indexing="ij")
+        values = np.zeros(lats.shape + (7,), dtype=np.float32)
+        values[..., 0] = 6.0 + (lons - 74.0) / 2
+        values[..., 1:] = [6.0, 40.0, 35.0, 25.0, 15.0, 0.9]
+        npz_path = os.path.join(tmp, "punjab.npz")
+        np.savez(npz_path, latitude=lats.ravel(), longitude=lons.ravel(), values=values.reshape(-1, 7))
+
+        grid = LocalSoilGrid.load(npz_path)
+        assert grid.regular is not None
+        profile = grid.lookup(30.9012, 75.8573)
+        assert abs(profile.ph - (6.0 + 1.85 / 2)) < 1e-4, profile
+        assert grid.lookup(20.0, 75.0) is None
+        print(f"✅ Regular grid: pH {profile.ph:.2f} at Ludhiana, none outside coverage")
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            grid.lookup(30.9012, 75.8573)
+        per_lookup_us = (time.perf_counter() - start) * 1e6 / 1000
+        batch = grid.lookup_many(np.full(10000, 30.9), np.linspace(74.1, 76.9, 10000))
+        assert batch.shape == (10000, 7) and not np.isnan(batch).any()
+        print(f"✅ {per_lookup_us:.0f} µs per lookup, 10000 farms in one batch")
+
+        # Scattered points from a CSV export with alternate column names
+        csv_path = os.path.join(tmp, "samples.csv")
+        with open(csv_path, "w") as handle:
+            handle.write("lat,lng,ph,organic_carbon,sand,silt,clay,cec,n\n")
+            handle.write("30.90,75.85,7.8,4.1,55,25,20,12,0.6\n")
+            handle.write("31.63,74.87,8.2,3.2,60,25,15,9,0.5\n")
+            handle.write("bad,row,,,,,,,\n")
+        scattered = LocalSoilGrid.load(csv_path)
+        assert scattered.regular is None and len(scattered.latitudes) == 2
+        assert scattered.lookup(31.60, 74.90).ph == np.float32(8.2)
+        scattered.tree = None  # NumPy scan fallback must agree with the KD-tree
+        assert scattered.lookup(30.91, 75.86).texture == "Sandy loam"
+        print("✅ Scattered CSV grid resolves nearest samples")
+
+        service = SoilService(db_path=os.path.join(tmp, "soil.db"), base_url="http://127.0.0.1:9/unreachable",
+                              local_grid=grid)
+        result = asyncio.run(service.get_soil_profile(30.9012, 75.8573))
+        assert result["success"] and result["profile"].source == "punjab.npz" and service.stats["requests"] == 0
+        print("✅ Soil service answers from the local grid without network")
+
+
+if __name__ == "__main__":
+    test_soil_service()
+    test_local_soil_grid()
+    print("\n🎉 All soil service tests completed successfully!")
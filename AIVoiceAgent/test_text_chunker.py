@@ -0,0 +1,169 @@
+"""
+Test script for chunking long knowledge entries
+"""
+
+import sys
+import os
+import asyncio
+import pickle
+import sqlite3
+import tempfile
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag_system import ComprehensiveRAGSystem, KnowledgeBase, RAGDocument
+from text_chunker import DocumentChunker, split_sentences
+from test_web_rerank import HashingEncoder
+
+TOPICS = [
+    "Wheat sowing in Punjab is best done in early November with treated seed",
+    "Drip irrigation saves water in sugarcane and raises yield",
+    "Yellow rust of wheat is controlled with a propiconazole spray",
+    "Neem oil keeps aphids and whiteflies off vegetable crops",
+    "Soil testing every three years guides fertilizer doses",
+    "Paddy straw should be mixed into the soil instead of burnt",
+]
+
+
+def long_entry():
+    """About 400 words, each topic repeated in several sentences"""
+    sentences = []
+    for topic in TOPICS:
+        for detail in ("according to the state agriculture department", "as advised by the local Krishi Vigyan Kendra",
+                       "which many farmers in the district have adopted", "and the practice is simple to follow"):
+            sentences.append(f"{topic} {detail}.")
+    return " ".join(sentences)
+
+
+def test_chunker():
+    """Test sentence alignment, size limits and overlap"""
+    print("🚀 Testing Document Chunking...")
+
+    assert split_sentences("Sow early. Irrigate at crown root stage!\nHarvest in April") == [
+        "Sow early.", "Irrigate at crown root stage!", "Harvest in April"]
+    assert split_sentences("गेहूं की बुवाई नवंबर में करें। सिंचाई समय पर करें।") == [
+        "गेहूं की बुवाई नवंबर में करें।", "सिंचाई समय पर करें।"]
+    assert split_sentences("Apply 2.5 kg per acre, e.g. at sowing.") == ["Apply 2.5 kg per acre, e.g. at sowing."]
+
+    chunker = DocumentChunker(chunk_size=60, overlap=15)
+    text = long_entry()
+    chunks = chunker.split(text)
+    sentences = set(split_sentences(text))
+    assert len(chunks) > 5 and all(len(chunk.split()) <= 60 for chunk in chunks)
+    for chunk in chunks:
+        # Only the carried-over opening may be a sentence fragment
+        assert set(split_sentences(chunk)[1:]) <= sentences, chunk
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous.endswith(split_sentences(current)[0]), "chunks should overlap"
+    print(f"✅ {len(text.split())} words -> {len(chunks)} sentence-aligned, overlapping chunks of <= 60 words")
+
+    run_on = " ".join(f"word{i}" for i in range(150))
+    windows = chunker.split(run_on)
+    assert all(len(window.split()) <= 60 for window in windows) and windows[-1].endswith("word149")
+    assert chunker.split("Short note.") == ["Short note."] and chunker.split("") == []
+    try:
+        DocumentChunker(chunk_size=50, overlap=50)
+        assert False, "overlap must be smaller than the chunk size"
+    except ValueError:
+        pass
+    print("✅ Run-on text windowed, short text kept whole, bad settings rejected")
+
+
+def test_knowledge_base_chunks():
+    """Test chunk rows, batched embedding and collapsing hits back to the parent"""
+
+    async def run(tmp):
+        db_path = os.path.join(tmp, "kb.db")
+        encoder = HashingEncoder()
+        knowledge_base = KnowledgeBase(db_path=db_path, model=encoder, chunker=DocumentChunker(60, 15))
+        entry = RAGDocument(id="guide", content=long_entry(), metadata={"summary": "Farming guide"},
+                            source="user_input", category="techniques")
+        note = RAGDocument(id="note", content="Store wheat grain below 12 percent moisture.",
+                           metadata={"summary": "Storage"}, source="user_input", category="techniques")
+        assert await knowledge_base.add_documents([entry, note]) == 2
+        batches = [call for call in encoder.calls if not isinstance(call, str)]
+        assert len(batches) == 1 and len(batches[0]) == knowledge_base.index.ntotal > 3
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT id, parent_id, embedding IS NULL FROM knowledge_documents ORDER BY rowid").fetchall()
+        conn.close()
+        assert ("guide", None, 1) in rows and ("note", None, 0) in rows
+        chunk_rows = [row for row in rows if row[1] == "guide"]
+        assert len(chunk_rows) == knowledge_base.index.ntotal - 1 and chunk_rows[0][0] == "guide#0"
+        print(f"✅ Long entry stored as {len(chunk_rows)} chunk rows under its parent, one embedding batch")
+
+        hits = await knowledge_base.search_similar("propiconazole spray for yellow rust", k=5)
+        assert [hit["document_id"] for hit in hits] == ["guide", "note"], hits
+        assert "propiconazole" in hits[0]["snippet"] and hits[0]["chunk_index"] > 0
+        assert hits[0]["metadata"]["summary"] == "Farming guide"
+        assert await knowledge_base.get_document_content("guide") == long_entry()
+        print(f"✅ Late-text question found (chunk {hits[0]['chunk_index']}), hits collapsed to the parent")
+
+        shorter = RAGDocument(id="guide", content=" ".join(long_entry().split()[:100]), metadata={},
+                              source="user_input", category="techniques")
+        await knowledge_base.add_document(shorter)
+        reloaded = KnowledgeBase(db_path=db_path, model=HashingEncoder(), chunker=DocumentChunker(60, 15))
+        assert reloaded.index.ntotal == len(knowledge_base.chunker.split(shorter.content)) + 1
+        assert reloaded.has_document("guide") and reloaded.has_document("note")
+        print("✅ Replacing an entry drops its old chunks")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+def test_legacy_database():
+    """Test that databases from before chunking are migrated and still searchable"""
+
+    async def run(tmp):
+        db_path = os.path.join(tmp, "legacy.db")
+        encoder = HashingEncoder()
+        conn = sqlite3.connect(db_path)
+        conn.execute('''CREATE TABLE knowledge_documents (id TEXT PRIMARY KEY, content TEXT NOT NULL, metadata TEXT,
+                        embedding BLOB, timestamp DATETIME, source TEXT, category TEXT)''')
+        conn.execute("INSERT INTO knowledge_documents VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     ("old", "Mustard sowing in October", "{}", pickle.dumps(encoder.encode("Mustard sowing in October")),
+                      "2025-01-01", "static", "crop_info"))
+        conn.commit()
+        conn.close()
+
+        knowledge_base = KnowledgeBase(db_path=db_path, model=encoder)
+        hits = await knowledge_base.search_similar("mustard sowing", k=2)
+        assert hits[0]["document_id"] == "old" and hits[0]["snippet"] == "Mustard sowing in October"
+        assert await knowledge_base.add_document(RAGDocument(id="new", content="Gram needs little water", metadata={}))
+        print("✅ Pre-chunking database migrated in place")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+def test_website_data_batch():
+    """Test that website data and static knowledge are each stored with one encode call"""
+
+    async def run(tmp):
+        encoder = HashingEncoder()
+        # Only the knowledge base is needed; the full system would load the real model
+        rag = ComprehensiveRAGSystem.__new__(ComprehensiveRAGSystem)
+        rag.knowledge_base = KnowledgeBase(db_path=os.path.join(tmp, "kb.db"), model=encoder)
+        tasks = [{"id": i, "title": f"Irrigate plot {i}", "priority": "high"} for i in range(6)]
+        tasks.append({"id": 5, "title": "Irrigate plot 5 after the rain", "priority": "low"})
+        await rag._process_and_store_data("tasks", {"active_tasks": tasks})
+        await rag._add_static_farming_knowledge()
+
+        batches = [call for call in encoder.calls if not isinstance(call, str)]
+        assert [len(batch) for batch in batches] == [6, 3], [len(batch) for batch in batches]
+        assert rag.knowledge_base.index.ntotal == 9
+        hits = await rag.knowledge_base.search_similar("irrigate plot 5 rain", k=1)
+        assert hits[0]["document_id"] == "task_5" and "after the rain" in hits[0]["snippet"], hits
+        print("✅ 7 tasks and 3 static entries stored in two batches; a repeated id keeps its last copy")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+if __name__ == "__main__":
+    test_chunker()
+    test_knowledge_base_chunks()
+    test_legacy_database()
+    test_website_data_batch()
+    print("\n🎉 All document chunking tests completed successfully!")
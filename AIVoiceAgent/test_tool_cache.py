@@ -0,0 +1,95 @@
+"""
+Test script for the memoization layer of deterministic function tools
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from livekit.agents.llm.utils import function_arguments_to_pydantic_model
+
+from tool_cache import memoize_tool, normalize_argument, ToolCache, get_tool_cache_stats, clear_tool_caches
+import tools
+
+
+def test_cache_primitives():
+    """Test argument normalization, LRU eviction and TTL expiry"""
+    print("🚀 Testing Tool Cache...")
+
+    assert normalize_argument("  Wheat  Crop ") == normalize_argument("wheat crop")
+    assert normalize_argument(2.0) == normalize_argument(2) and normalize_argument(0.1 + 0.2) == 0.3
+    assert normalize_argument(["A", {"b": 1}]) == ("a", (("b", 1),))
+    print("✅ Argument normalization")
+
+    cache = ToolCache("demo", max_entries=2)
+    cache.put(("a",), 1)
+    cache.put(("b",), 2)
+    assert cache.get(("a",)) == (True, 1)
+    cache.put(("c",), 3)
+    assert cache.get(("b",)) == (False, None) and cache.get(("a",)) == (True, 1)
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2
+    print("✅ Bounded LRU eviction")
+
+    expiring = ToolCache("expiring", ttl=0.05)
+    expiring.put(("a",), 1)
+    assert expiring.get(("a",))[0]
+    time.sleep(0.06)
+    assert not expiring.get(("a",))[0]
+    print("✅ TTL expiry")
+
+
+def test_memoized_function():
+    """Test that calls differing only in formatting share one result"""
+    calls = []
+
+    @memoize_tool(bucket="month", max_entries=8)
+    async def plan(context, crop: str, acres: float = 1.0) -> str:
+        calls.append(crop)
+        if crop == "fail":
+            return "Sorry, something went wrong."
+        return f"plan for {crop} on {acres}"
+
+    async def run():
+        first = await plan(None, "Wheat")
+        assert await plan(object(), " wheat ", acres=1.0) == first
+        assert await plan(None, crop="WHEAT", acres=1) == first
+        await plan(None, "wheat", 2.0)
+        await plan(None, "fail")
+        await plan(None, "fail")
+
+    asyncio.run(run())
+    assert calls == ["Wheat", "wheat", "fail", "fail"], calls
+    assert plan.cache.stats()["hits"] == 2 and plan.cache.stats()["misses"] == 4
+    print("✅ Normalized keys hit the cache; failures are not cached")
+
+
+def test_function_tools():
+    """Test that memoized tools keep their schema and serve repeated calls"""
+    clear_tool_caches()
+    model = function_arguments_to_pydantic_model(tools.get_fertilizer_recommendations)
+    assert {"crop", "growth_stage", "soil_type", "area_acres"} <= set(model.model_fields)
+    print("✅ Tool schema preserved under @function_tool")
+
+    async def run():
+        first = await tools.get_fertilizer_recommendations(None, crop="Rice", growth_stage="flowering", area_acres=2)
+        start = time.perf_counter()
+        again = await tools.get_fertilizer_recommendations(None, "rice", "flowering", area_acres=2.0)
+        elapsed = time.perf_counter() - start
+        assert again == first and "Fertilizer Recommendations for Rice" in first
+        return elapsed
+
+    elapsed = asyncio.run(run())
+    stats = get_tool_cache_stats()["get_fertilizer_recommendations"]
+    assert stats["hits"] == 1 and stats["misses"] == 1, stats
+    print(f"✅ Retried tool call served from cache in {elapsed * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    test_cache_primitives()
+    test_memoized_function()
+    test_function_tools()
+    print("\n🎉 All tool cache tests completed successfully!")
@@ -0,0 +1,159 @@
+"""
+Test script for the cached async weather service
+"""
+
+import sys
+import os
+import asyncio
+
+from aiohttp import web
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from weather_service import WeatherService, WeatherWindows, normalize_city
+
+
+async def start_fake_api(calls):
+    """Serve OpenWeatherMap-shaped answers on a local port and count calls"""
+    async def current(request):
+        calls.append(request.query["q"])
+        await asyncio.sleep(0.05)
+        if request.query["q"].lower() == "atlantis":
+            return web.json_response({"message": "city not found"}, status=404)
+        return web.json_response({
+            "weather": [{"id": 500, "main": "Rain", "description": "light rain"}],
+            "main": {"temp": 28.4, "feels_like": 31.0, "humidity": 78},
+            "wind": {"speed": 3.2}
+        })
+
+    app = web.Application()
+    app.router.add_get("/weather", current)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def run_weather_service_checks():
+    calls = []
+    runner, base_url = await start_fake_api(calls)
+    service = WeatherService(api_key="test", base_url=base_url)
+    try:
+        # Concurrent lookups for the same city share one API call
+        results = await asyncio.gather(*[
+            service.get_current_weather(city) for city in ["Pune", " pune ", "PUNE", "Pune"]
+        ])
+        assert all(result["success"] for result in results)
+        assert len(calls) == 1, calls
+        print(f"✅ 4 concurrent lookups -> {len(calls)} API call")
+
+        # Results carry the parsed record, shared by every caller
+        record = results[0]["record"]
+        assert record is results[1]["record"]
+        assert record.temperature == 28.4 and record.humidity == 78
+        assert record.is_raining and not record.is_windy and not record.is_heavy_rain
+        print(f"✅ Record: {record.description}, {record.temperature}°C, wind {record.wind_speed} m/s")
+
+        # Later lookups inside the TTL come from the cache
+        await service.get_current_weather("pune")
+        assert len(calls) == 1 and service.stats["hits"] == 1, service.stats
+        print(f"✅ Cache stats: {service.stats}")
+
+        # Failures are not cached
+        failed = await service.get_current_weather("Atlantis")
+        assert not failed["success"] and failed["status"] == 404
+        await service.get_current_weather("Atlantis")
+        assert len(calls) == 3, calls
+        print("✅ Failed lookups are retried, not cached")
+
+        # An expired entry is refreshed
+        service.ttl = 0
+        service.clear_cache()
+        await service.get_current_weather("Pune")
+        await service.get_current_weather("Pune")
+        assert len(calls) == 5, calls
+        print("✅ Expired entries are refreshed")
+
+        # The cache stays bounded however many places are asked about
+        service.ttl = 600
+        service.max_entries = 3
+        for city in ["Nashik", "Satara", "Latur", "Akola", "Pune"]:
+            await service.get_current_weather(city)
+        assert len(service._cache) == 3 and ("weather", normalize_city("Nashik")) not in service._cache
+        await service.get_current_weather("Pune")
+        assert len(calls) == 10, calls
+        print(f"✅ Cache capped at {service.max_entries} entries, oldest dropped first")
+    finally:
+        await service.close_session()
+        await runner.cleanup()
+
+
+def test_weather_service():
+    """Test TTL caching and request coalescing against a local fake API"""
+    print("🚀 Testing Weather Service...")
+    assert normalize_city(" Pune , IN ") == normalize_city("pune,in")
+    asyncio.run(run_weather_service_checks())
+
+
+def make_forecast():
+    """Two rainy days, a windy afternoon, then dry calm weather with one frost night"""
+    start = 1_760_000_400  # a 3-hour aligned UTC timestamp
+    items = []
+    for slot in range(40):
+        rainy = slot < 16
+        items.append({
+            "dt": start + slot * 3 * 3600,
+            "main": {"temp": 1.0 if slot == 30 else 18.0, "temp_min": 1.0 if slot == 30 else 16.0},
+            "wind": {"speed": 9.0 if slot == 17 else 2.0},
+            "pop": 0.9 if rainy else 0.0,
+            "rain": {"3h": 2.5} if rainy else {},
+            "weather": [{"id": 500 if rainy else 800}]
+        })
+    return {"list": items, "city": {"name": "Pune", "timezone": 19800}}
+
+
+def test_weather_windows():
+    """Test precomputed dry spells, spray windows and frost nights"""
+    print("🚀 Testing Weather Windows...")
+
+    windows = WeatherWindows.from_forecast("pune", make_forecast())
+    start = int(windows.times[0])
+    windows.clock = lambda: start
+    assert windows.rain_within(24) == 8 * 2.5
+    assert windows.rain_within(5 * 24) == 16 * 2.5
+    assert windows.dry_hours_from(0) == 0 and windows.dry_hours_from(16) == 24 * 3
+    print(f"✅ Rain in 24h: {windows.rain_within(24):.1f} mm, dry run from slot 16: {windows.dry_hours_from(16)} h")
+
+    assert windows.next_dry_spell(48) == windows.local_time(16)
+    assert windows.next_dry_spell(100) is None
+    # Slot 17 is windy and slot 16 is the first dry slot, so spraying can start at 16
+    assert windows.next_spray_window() == windows.local_time(16)
+    assert windows.next_spray_window(17) == windows.local_time(18)
+    print(f"✅ Next 48h dry spell: {windows.next_dry_spell(48)}, spray slot: {windows.next_spray_window()}")
+
+    assert windows.frost_nights() == [windows.local_time(30).date()]
+    print(f"✅ Frost nights: {windows.frost_nights()}")
+
+    # Served from the cache hours later, windows are measured from now, not from slot 0
+    now = start + 16 * 3 * 3600 + 3600
+    windows.clock = lambda: now
+    assert windows.next_spray_window() == windows.next_dry_spell(48) == windows._local(now)
+    assert windows.next_spray_window() > windows.local_time(16)
+    assert windows.dry_hours_from() == 24 * 3 - 1 and windows.rain_within(24) == 0
+    assert windows.summary()["rain_mm"] == 0 and windows.summary()["hours"] == 24 * 3
+    windows.clock = lambda: start + 17 * 3 * 3600 + 600
+    assert windows.next_spray_window() == windows.local_time(18)
+    windows.clock = lambda: start + 31 * 3 * 3600
+    assert windows.frost_nights() == [] and windows.next_dry_spell(48) is None
+    windows.clock = lambda: start + 40 * 3 * 3600
+    assert windows.next_spray_window() is None and windows.dry_hours_from() == 0
+    print("✅ Stale forecasts never offer a window that has already passed")
+
+
+if __name__ == "__main__":
+    test_weather_service()
+    test_weather_windows()
+    print("\n🎉 All weather service tests completed successfully!")
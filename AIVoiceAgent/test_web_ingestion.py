@@ -0,0 +1,185 @@
+"""
+Test script for fetching web pages into the knowledge base
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+
+from aiohttp import web
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag_system import KnowledgeBase
+from web_ingestion import WebIngestionPipeline, extract_main_text, page_id, page_category
+from test_web_rerank import HashingEncoder
+
+PARAGRAPH = ("Yellow rust of wheat appears as bright yellow stripes of pustules on the leaves "
+             "during cool and humid weather in January and February. ")
+
+MANDI_PARAGRAPH = ("Potato arrivals at Agra mandi rose this week and the modal price fell to "
+                   "nine hundred rupees per quintal for cold store stock. ")
+
+ARTICLE = f"""<!DOCTYPE html>
+<html><head><title>Managing yellow rust in wheat</title>
+<script>var tracking = "Subscribe to our newsletter for the latest offers and deals";</script>
+<style>.menu {{ color: red; }}</style></head>
+<body>
+<nav><a href="/">Home</a> <a href="/crops">Crops and farming news from across the country</a></nav>
+<article>
+<h1>Yellow rust</h1>
+<p>{PARAGRAPH * 3}</p>
+<h2>Control</h2>
+<p>Spray propiconazole 25 EC at 0.1 percent as soon as the first stripes appear and repeat after fifteen days if the disease persists.</p>
+<p>Grow resistant varieties such as PBW 725 and HD 3086 and avoid excess nitrogen &amp; late sowing in the rust prone districts.</p>
+</article>
+<footer>Copyright Agri News. All rights reserved. Privacy policy and terms of use apply.</footer>
+</body></html>"""
+
+
+async def start_server():
+    async def article(request):
+        return web.Response(text=ARTICLE, content_type="text/html")
+
+    async def huge(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/html; charset=utf-8"})
+        await response.prepare(request)
+        await response.write(f"<html><body><p>{PARAGRAPH * 5}</p>".encode())
+        for _ in range(200):
+            await response.write(b"<p>" + b"padding text " * 100 + b"</p>")
+        return response
+
+    async def slow(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/html"})
+        await response.prepare(request)
+        await response.write(f"<html><body><p>{PARAGRAPH * 4}</p>".encode())
+        await asyncio.sleep(5)
+        try:
+            await response.write(b"</body></html>")
+        except ConnectionResetError:
+            pass  # the client gave up, as it should
+        return response
+
+    flaky_calls = []
+
+    async def flaky(request):
+        flaky_calls.append(1)
+        if len(flaky_calls) == 1:
+            return web.Response(status=503, text="try later")
+        return web.Response(text=f"<html><head><title>Potato prices</title></head><body><p>{MANDI_PARAGRAPH * 4}</p></body></html>",
+                            content_type="text/html")
+
+    async def pdf(request):
+        return web.Response(body=b"%PDF-1.4 " + PARAGRAPH.encode() * 5, content_type="application/pdf")
+
+    app = web.Application()
+    app.router.add_get("/article", article)
+    app.router.add_get("/huge", huge)
+    app.router.add_get("/slow", slow)
+    app.router.add_get("/report.pdf", pdf)
+    app.router.add_get("/flaky", flaky)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_extraction():
+    """Test that navigation, scripts and footers are dropped and paragraphs kept"""
+    print("🚀 Testing Web Page Ingestion...")
+
+    page = extract_main_text(ARTICLE)
+    assert page["title"] == "Managing yellow rust in wheat"
+    lines = page["text"].split("\n")
+    assert lines[0] == "Yellow rust" and "Control" in lines and "nitrogen & late sowing" in page["text"]
+    for noise in ("newsletter", "color: red", "Crops and farming news", "All rights reserved"):
+        assert noise not in page["text"], noise
+    print(f"✅ Main text extracted ({len(lines)} paragraphs, boilerplate dropped)")
+
+    assert page_id("https://www.agri.example/rust?utm_source=ddg") == page_id("http://agri.example/rust")
+    print("✅ Page ids follow canonical URLs")
+
+    assert page_category("wheat price in Khanna mandi") == "market_data"
+    assert page_category("when to sow", "Rain forecast for Punjab this week") == "weather"
+    assert page_category("wheat yellow rust", "Managing yellow rust in wheat") == "web"
+    print("✅ Pages for price and weather questions take those categories")
+
+
+def test_ingestion():
+    """Test fetch limits, batch embedding, provenance and re-ingest skipping"""
+
+    async def run(tmp):
+        runner, base = await start_server()
+        encoder = HashingEncoder()
+        knowledge_base = KnowledgeBase(db_path=os.path.join(tmp, "kb.db"), model=encoder)
+        pipeline = WebIngestionPipeline(knowledge_base, max_bytes=20_000, timeout=1.0)
+        try:
+            results = [
+                {"title": "Yellow rust", "url": f"{base}/article", "relevance_score": 0.8},
+                {"title": "Big page", "url": f"{base}/huge", "relevance_score": 0.7},
+                {"title": "Slow page", "url": f"{base}/slow", "relevance_score": 0.6},
+                {"title": "Report", "url": f"{base}/report.pdf", "relevance_score": 0.9},
+                {"title": "Off topic", "url": f"{base}/other", "relevance_score": 0.2},
+            ]
+            assert [r["title"] for r in pipeline.select(results)] == ["Report", "Yellow rust", "Big page"]
+            pipeline._pending.clear()
+
+            encoder.calls.clear()
+            stored = await pipeline.ingest_results(results[:3], "wheat yellow rust")
+            assert stored == 3 and pipeline.stats["fetched"] == 3, (stored, pipeline.stats)
+            batches = [call for call in encoder.calls if not isinstance(call, str)]
+            assert len(batches) == 3 and len(knowledge_base.documents) > 3
+            print(f"✅ 3 pages stored as {len(knowledge_base.documents)} chunks (size cap and timeout keep partial text), "
+                  "one encode per page")
+
+            await pipeline.ingest_results(results[3:4])
+            assert pipeline.stats["skipped"] == 1
+            print("✅ Non-HTML page skipped")
+
+            first = next(entry for entry in knowledge_base.document_metadata
+                         if entry["id"] == page_id(f"{base}/article"))
+            assert first["source"] == "web:127.0.0.1"
+            assert first["metadata"]["url"] == f"{base}/article" and first["metadata"]["fetched_at"]
+            assert first["metadata"]["title"] == "Managing yellow rust in wheat" and first["category"] == "web"
+            assert knowledge_base.has_document(first["id"])
+            assert (await knowledge_base.get_document_content(first["id"])).startswith("Yellow rust")
+            print("✅ Pages stored with source, URL and fetch time")
+
+            fresh = WebIngestionPipeline(knowledge_base)
+            assert fresh.select(results[:1]) == []
+            pipeline._pending.clear()
+            assert await pipeline.ingest_results(results[:1]) == 0
+            print("✅ Stored pages are not fetched again")
+
+            flaky = [{"title": "Flaky", "url": f"{base}/flaky", "relevance_score": 0.8}]
+            assert await pipeline.ingest_results(flaky, "potato price agra") == 0 and not pipeline._pending
+            assert await pipeline.ingest_results(flaky, "potato price agra") == 1
+            stored_flaky = next(entry for entry in knowledge_base.document_metadata
+                                if entry["id"] == page_id(f"{base}/flaky"))
+            assert stored_flaky["category"] == "market_data"
+            print("✅ A page that failed once is fetched again by a later search")
+
+            hits = await knowledge_base.search_similar("yellow rust propiconazole spray", k=3)
+            assert hits and hits[0]["metadata"]["url"] == f"{base}/article", hits
+            reloaded = KnowledgeBase(db_path=os.path.join(tmp, "kb.db"), model=HashingEncoder())
+            assert reloaded.has_document(first["id"]) and reloaded.index.ntotal == knowledge_base.index.ntotal
+            print("✅ Ingested text answers later questions and survives a restart")
+
+            pipeline.schedule(results[:1], "wheat yellow rust")
+            await pipeline.close_session()
+        finally:
+            await pipeline.close_session()
+            await runner.cleanup()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+if __name__ == "__main__":
+    test_extraction()
+    test_ingestion()
+    print("\n🎉 All web ingestion tests completed successfully!")
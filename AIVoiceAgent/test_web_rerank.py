@@ -0,0 +1,96 @@
+"""
+Test script for embedding-based reranking of web search results
+"""
+
+import sys
+import os
+import asyncio
+import hashlib
+import tempfile
+
+import numpy as np
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag_system import KnowledgeBase, WebScrapingService, RAGDocument, RERANK_WEIGHT
+from result_dedup import tokenize
+
+
+class HashingEncoder:
+    """Bag-of-words stand-in for the sentence transformer that records its calls"""
+
+    def __init__(self, dimension: int = 256):
+        self.dimension = dimension
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in tokenize(text):
+            vector[int(hashlib.md5(token.encode()).hexdigest(), 16) % self.dimension] += 1
+        return vector / max(np.linalg.norm(vector), 1e-9)
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.calls.append(texts)
+        if isinstance(texts, str):
+            return self._embed(texts)
+        return np.stack([self._embed(text) for text in texts])
+
+
+SEARCH_RESULTS = [
+    {"title": "Farmers trust wheat control board", "body": "The wheat control board met farmers to build trust in procurement.", "href": "https://news.example/board"},
+    {"title": "Yellow rust in wheat", "body": "Control yellow rust in wheat with timely fungicide spray and resistant varieties.", "href": "https://agri.example/rust"},
+    {"title": "Soil health card", "body": "Farming agriculture crop soil irrigation fertilizer pest yield advice.", "href": "https://agri.example/soil"},
+]
+
+
+def make_scraper(tmp):
+    encoder = HashingEncoder()
+    knowledge_base = KnowledgeBase(db_path=os.path.join(tmp, "kb.db"), model=encoder)
+    scraper = WebScrapingService(knowledge_base=knowledge_base)
+    scraper._ddgs_text = lambda query, max_results: [dict(result) for result in SEARCH_RESULTS]
+    return scraper, encoder
+
+
+def test_rerank():
+    """Test blended scores, one snippet batch per search and the cached query embedding"""
+    print("🚀 Testing Web Result Reranking...")
+
+    async def run(tmp):
+        scraper, encoder = make_scraper(tmp)
+        result = await scraper.search_agricultural_web("wheat rust control")
+        ranked = result["results"]
+        assert ranked[0]["url"] == "https://agri.example/rust", [r["url"] for r in ranked]
+        board = next(r for r in ranked if r["url"] == "https://news.example/board")
+        rust = ranked[0]
+        # "rust" matches inside "trust" lexically, but not semantically
+        assert board["lexical_score"] == rust["lexical_score"] and board["semantic_score"] < rust["semantic_score"]
+        for r in ranked:
+            expected = RERANK_WEIGHT * r["semantic_score"] + (1 - RERANK_WEIGHT) * r["lexical_score"]
+            assert abs(r["relevance_score"] - expected) < 1e-9 and 0 <= r["relevance_score"] <= 1
+        batches = [call for call in encoder.calls if not isinstance(call, str)]
+        assert len(batches) == 1 and len(batches[0]) == 3 and encoder.calls.count("wheat rust control") == 1
+        print(f"✅ Relevant article ranked first ({rust['relevance_score']:.2f} vs {board['relevance_score']:.2f}), one batch")
+
+        await scraper.search_agricultural_web("Wheat  rust control")
+        await scraper.knowledge_base.add_document(RAGDocument(
+            id="rust", content="Yellow rust of wheat", metadata={}, source="test", category="crop_info"))
+        hits = await scraper.knowledge_base.search_similar("wheat rust control", k=1)
+        assert hits and len([call for call in encoder.calls if isinstance(call, str) and "rust control" in call.lower()]) == 1
+        print("✅ Query embedding encoded once and shared with KB search")
+
+        scraper.rerank = False
+        plain = await scraper.search_agricultural_web("wheat rust control")
+        assert "semantic_score" not in plain["results"][0]
+        print("✅ Lexical-only mode still available")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+if __name__ == "__main__":
+    test_rerank()
+    print("\n🎉 All web rerank tests completed successfully!")
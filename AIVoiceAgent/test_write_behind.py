@@ -0,0 +1,190 @@
+"""
+Test script for the knowledge base write-behind queue
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import time
+
+# Add the AIVoiceAgent directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import context_enhancement
+import rag_system
+import tools
+from rag_system import KnowledgeBase, RAGDocument
+from session_context import SessionContext
+from test_web_rerank import HashingEncoder
+
+
+class SlowEncoder(HashingEncoder):
+    """Encoder that takes as long as the real model on a busy CPU"""
+
+    def __init__(self, delay: float = 0.3, fail: bool = False):
+        super().__init__()
+        self.delay = delay
+        self.fail = fail
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        if not isinstance(texts, str):
+            time.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("model crashed")
+        return super().encode(texts, batch_size, **kwargs)
+
+
+class FakeRAG:
+    def __init__(self, knowledge_base):
+        self.knowledge_base = knowledge_base
+
+    async def query_comprehensive(self, query, include_web_search=True, owner=None):
+        hits = await self.knowledge_base.search_similar(query, k=3, owner=owner)
+        return {"query": query, "knowledge_base_results": hits, "web_search_results": [], "recommendations": []}
+
+
+class MockRunContext:
+    """RunContext stand-in carrying the session's userdata"""
+
+    def __init__(self, userdata):
+        self.userdata = userdata
+
+
+def tip(i):
+    return RAGDocument(id=f"tip{i}", content=f"Tip {i}: mulch tomato beds with straw to keep soil moist",
+                       metadata={"summary": f"Tip {i}"}, source="user_input", category="techniques")
+
+
+def test_write_behind():
+    """Test that writes return at once, batch together and are visible to the next read"""
+    print("🚀 Testing Write-Behind Knowledge Queue...")
+
+    async def run(tmp):
+        encoder = SlowEncoder()
+        knowledge_base = KnowledgeBase(db_path=os.path.join(tmp, "kb.db"), model=encoder)
+
+        start = time.perf_counter()
+        futures = [knowledge_base.enqueue_document(tip(i)) for i in range(10)]
+        elapsed = time.perf_counter() - start
+        assert elapsed < 0.05 and all(future is not None for future in futures), elapsed
+        assert knowledge_base.has_document("tip3") and knowledge_base.index.ntotal == 0
+        print(f"✅ 10 documents queued in {elapsed * 1000:.1f} ms")
+
+        hits = await knowledge_base.search_similar("mulch tomato straw", k=3)
+        assert len(hits) == 3 and all(future.done() and future.result() for future in futures)
+        batches = [call for call in encoder.calls if not isinstance(call, str)]
+        assert len(batches) == 1 and len(batches[0]) == 10
+        assert await knowledge_base.get_document_content("tip9") == tip(9).content
+        print("✅ Next search sees the queued documents; all 10 embedded in one batch")
+
+        future = knowledge_base.enqueue_document(tip(10))
+        await knowledge_base.flush_writes()
+        reloaded = KnowledgeBase(db_path=os.path.join(tmp, "kb.db"), model=HashingEncoder())
+        assert future.result() and reloaded.has_document("tip10") and reloaded.index.ntotal == 11
+        print("✅ Flushed writes are on disk")
+
+        broken = KnowledgeBase(db_path=os.path.join(tmp, "broken.db"), model=SlowEncoder(0.0, fail=True))
+        failed = broken.enqueue_document(tip(1))
+        await broken.flush_writes()
+        assert failed.result() is False and not broken.has_document("tip1")
+        print("✅ Failed writes are reported on their future")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+def test_tool_returns_immediately():
+    """Test that add_farming_knowledge confirms without waiting for the model"""
+
+    async def run(tmp):
+        knowledge_base = KnowledgeBase(db_path=os.path.join(tmp, "kb.db"), model=SlowEncoder(0.5))
+        previous = rag_system.rag_system
+        rag_system.rag_system = FakeRAG(knowledge_base)
+        try:
+            start = time.perf_counter()
+            reply = await tools.add_farming_knowledge(
+                None, "Intercrop chickpea with mustard in a 4:1 row ratio for extra income.", "techniques")
+            elapsed = time.perf_counter() - start
+            assert reply.startswith("✅") and elapsed < 0.2, (reply, elapsed)
+            hits = await knowledge_base.search_similar("chickpea mustard intercrop", k=1)
+            assert hits and hits[0]["source"] == "user_input"
+            print(f"✅ Tool confirmed in {elapsed * 1000:.0f} ms; the next question finds the tip")
+        finally:
+            rag_system.rag_system = previous
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+def test_cached_query_sees_new_knowledge():
+    """Test that a question asked before and after adding knowledge in one session finds it the second time"""
+
+    async def run(tmp):
+        knowledge_base = KnowledgeBase(db_path=os.path.join(tmp, "kb.db"), model=SlowEncoder(0.1))
+        fake = FakeRAG(knowledge_base)
+        session = SessionContext()
+        previous = rag_system.rag_system
+        rag_system.rag_system = fake
+        try:
+            query = "chickpea mustard intercrop"
+            before = await context_enhancement.search_knowledge(session, fake, query, include_web_search=False)
+            assert before["knowledge_base_results"] == []
+            reply = await tools.add_farming_knowledge(
+                MockRunContext(session), "Intercrop chickpea with mustard in a 4:1 row ratio for extra income.", "techniques")
+            assert reply.startswith("✅"), reply
+            after = await context_enhancement.search_knowledge(session, fake, query, include_web_search=False)
+            assert after["knowledge_base_results"] and after["knowledge_base_results"][0]["source"] == "user_input", after
+            print("✅ Query, add, query in one session: the cached empty answer is not reused")
+        finally:
+            rag_system.rag_system = previous
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+def test_session_scoped_flush():
+    """Test that a search waits only for its own session's writes, with a timeout, and survives a dead writer"""
+
+    async def run(tmp):
+        knowledge_base = KnowledgeBase(db_path=os.path.join(tmp, "kb.db"), model=SlowEncoder(0.5))
+        farmer_a, farmer_b = object(), object()
+        queued = [knowledge_base.enqueue_document(tip(i), owner=farmer_a) for i in range(5)]
+
+        start = time.perf_counter()
+        hits = await knowledge_base.search_similar("mulch tomato straw", k=3, owner=farmer_b)
+        elapsed = time.perf_counter() - start
+        assert hits == [] and elapsed < 0.1 and not any(future.done() for future in queued), elapsed
+        print(f"✅ Another session's search answered in {elapsed * 1000:.0f} ms without waiting for the batch")
+
+        # Kill the writer in the middle of encoding the batch
+        await asyncio.sleep(0.1)
+        knowledge_base._writer.cancel()
+        await asyncio.sleep(0)
+        assert knowledge_base._writer.cancelled()
+        start = time.perf_counter()
+        hits = await asyncio.wait_for(knowledge_base.search_similar("mulch tomato straw", k=3, owner=farmer_a), 2)
+        elapsed = time.perf_counter() - start
+        assert len(hits) == 3 and all(future.result() for future in queued), hits
+        assert knowledge_base.index.ntotal == 5
+        print(f"✅ Search restarted the cancelled writer and saw its own writes after {elapsed * 1000:.0f} ms")
+
+        knowledge_base.write_flush_timeout = 0.1
+        late = knowledge_base.enqueue_document(tip(5), owner=farmer_a)
+        start = time.perf_counter()
+        hits = await knowledge_base.search_similar("mulch tomato straw", k=10, owner=farmer_a)
+        elapsed = time.perf_counter() - start
+        assert len(hits) == 5 and elapsed < 0.3 and not late.done(), (len(hits), elapsed)
+        assert await knowledge_base.flush_writes(timeout=2) and late.result()
+        print(f"✅ A slow write delays its own session's search by at most the timeout ({elapsed * 1000:.0f} ms)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+if __name__ == "__main__":
+    test_write_behind()
+    test_tool_returns_immediately()
+    test_cached_query_sees_new_knowledge()
+    test_session_scoped_flush()
+    print("\n🎉 All write-behind queue tests completed successfully!")
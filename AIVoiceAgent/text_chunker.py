@@ -0,0 +1,86 @@
+"""
+Document Chunking for AI Farm Care Assistant
+Splits long knowledge entries into overlapping, sentence-aligned chunks that fit
+the embedding model's input window, so every part of a document is retrievable
+instead of only its first few hundred words
+"""
+
+import logging
+import re
+from typing import List, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Words per chunk; all-MiniLM-L6-v2 reads at most 256 word pieces (about 190 words)
+CHUNK_WORDS = 160
+# Words repeated from the end of one chunk at the start of the next
+CHUNK_OVERLAP_WORDS = 30
+
+# Sentence ends (including the Devanagari danda) followed by a likely sentence start, or line breaks
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?।])\s+(?=[^a-z\s])|\s*\n+\s*")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences and lines of a text, whitespace-normalized"""
+    sentences = []
+    for sentence in _SENTENCE_BREAK.split(text or ""):
+        sentence = " ".join(sentence.split())
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+class DocumentChunker:
+    """Packs whole sentences into chunks of at most chunk_size words with overlap"""
+
+    def __init__(self, chunk_size: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP_WORDS):
+        if chunk_size <= 0 or not 0 <= overlap < chunk_size:
+            raise ValueError("chunk_size must be positive and overlap smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    def _pieces(self, text: str) -> List[Tuple[str, int]]:
+        """Sentences with their word counts; sentences longer than a chunk are cut into windows"""
+        pieces = []
+        step = self.chunk_size - self.overlap
+        for sentence in split_sentences(text):
+            words = sentence.split()
+            if len(words) <= self.chunk_size:
+                pieces.append((sentence, len(words)))
+                continue
+            for start in range(0, len(words), step):
+                window = words[start:start + self.chunk_size]
+                pieces.append((" ".join(window), len(window)))
+                if start + self.chunk_size >= len(words):
+                    break
+        return pieces
+
+    def split(self, text: str) -> List[str]:
+        """Chunks of a text; a short text is a single chunk"""
+        chunks = []
+        current: List[Tuple[str, int]] = []
+        count = 0
+        for piece in self._pieces(text):
+            if current and count + piece[1] > self.chunk_size:
+                chunks.append(" ".join(sentence for sentence, _ in current))
+                # Carry the trailing sentences that fit in the overlap
+                carried: List[Tuple[str, int]] = []
+                carried_count = 0
+                for previous in reversed(current):
+                    if carried_count + previous[1] > self.overlap:
+                        break
+                    carried.insert(0, previous)
+                    carried_count += previous[1]
+                # A last sentence longer than the overlap lends its closing words instead
+                if not carried and self.overlap:
+                    tail = current[-1][0].split()[-self.overlap:]
+                    carried, carried_count = [(" ".join(tail), len(tail))], len(tail)
+                current, count = carried, carried_count
+                if count + piece[1] > self.chunk_size:
+                    current, count = [], 0
+            current.append(piece)
+            count += piece[1]
+        if current:
+            chunks.append(" ".join(sentence for sentence, _ in current))
+        return chunks
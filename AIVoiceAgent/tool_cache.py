@@ -0,0 +1,168 @@
+"""
+Tool Result Cache for AI Farm Care Assistant
+Memoizes deterministic function tools so repeated or retried LLM tool calls
+return the already formatted answer instead of rebuilding it
+"""
+
+import functools
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+
+# Date buckets for tools whose answer depends on the current date
+DATE_BUCKETS = {
+    "day": "%Y-%m-%d",
+    "month": "%Y-%m",
+}
+
+# Arguments that identify the caller rather than the question
+IGNORED_ARGUMENTS = {"context"}
+
+
+def normalize_argument(value: Any) -> Hashable:
+    """Hashable, case- and whitespace-insensitive form of a tool argument"""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, (list, tuple, set)):
+        items = tuple(normalize_argument(item) for item in value)
+        return tuple(sorted(items, key=repr)) if isinstance(value, set) else items
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), normalize_argument(v)) for k, v in value.items()))
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def is_cacheable(result: Any) -> bool:
+    """Tools report failures as apology strings; those are never cached"""
+    return isinstance(result, str) and not result.startswith("Sorry")
+
+
+class ToolCache:
+    """Bounded LRU of one tool's results with optional TTL"""
+
+    def __init__(self, name: str, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: Optional[float] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[Tuple, Tuple[Optional[float], Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """(found, value) for a key, refreshing its LRU position"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self.entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key: Tuple, value: Any):
+        """Store a result, evicting the least recently used one when full"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached result"""
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Cache of every memoized tool, by tool name
+tool_caches: Dict[str, ToolCache] = {}
+
+
+def memoize_tool(ttl: Optional[float] = None, bucket: Optional[str] = None,
+                 max_entries: int = DEFAULT_MAX_ENTRIES) -> Callable:
+    """Cache an async tool's result per normalized arguments.
+
+    Apply below @function_tool(); functools.wraps keeps the signature and
+    docstring the tool schema is built from. ``bucket`` ("day" or "month")
+    adds the current date to the key for tools that depend on it.
+    """
+    if bucket is not None and bucket not in DATE_BUCKETS:
+        raise ValueError(f"Unknown date bucket: {bucket}")
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        cache = ToolCache(func.__name__, max_entries=max_entries, ttl=ttl)
+        tool_caches[func.__name__] = cache
+
+        def make_key(args, kwargs) -> Optional[Tuple]:
+            try:
+                bound = signature.bind(*args, **kwargs)
+            except TypeError:
+                return None
+            bound.apply_defaults()
+            key = tuple(
+                (name, normalize_argument(value))
+                for name, value in bound.arguments.items()
+                if name not in IGNORED_ARGUMENTS
+            )
+            if bucket:
+                key += (("date", datetime.now().strftime(DATE_BUCKETS[bucket])),)
+            return key
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            if key is None:
+                return await func(*args, **kwargs)
+
+            found, value = cache.get(key)
+            if found:
+                logger.debug(f"Tool cache hit for {cache.name}")
+                return value
+
+            value = await func(*args, **kwargs)
+            if is_cacheable(value):
+                cache.put(key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def get_tool_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss metrics of every memoized tool"""
+    return {name: cache.stats() for name, cache in tool_caches.items()}
+
+
+def clear_tool_caches():
+    """Drop the cached results of every memoized tool"""
+    for cache in tool_caches.values():
+        cache.clear()
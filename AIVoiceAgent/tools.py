@@ -6,10 +6,25 @@ import os
 import smtplib
 from email.mime.multipart import MIMEMultipart  
 from email.mime.text import MIMEText
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
 import json
 from datetime import datetime, timedelta
 import asyncio
+import math
+
+from market_store import get_price_store, commodity_key
+from commodity_resolver import resolve_commodity_id
+from weather_service import get_weather_service, WeatherRecord
+from soil_service import get_soil_service
+from crop_recommender import get_crop_engine, current_season
+from agronomy_data import get_agronomy_data
+from tool_cache import memoize_tool
+from diagnosis_engine import get_diagnosis_engine
+from farm_profile import FarmProfile
+from session_context import SessionContext, get_session_context
+
+# Reference tables are loaded once at import and shared read-only by every tool
+agronomy = get_agronomy_data()
 
 # Backend API base URL
 BACKEND_API_URL = "http://localhost:5000/api"
@@ -32,6 +47,75 @@ NAVIGATION_URLS = {
     'voice assistant': '/voice-ai'
 }
 
+async def fetch_weather_record(city: str, session: Optional[SessionContext] = None) -> Tuple[Optional[WeatherRecord], str]:
+    """Current weather record for a city, or None with a user-facing error message"""
+    weather = get_weather_service()
+    logging.info(f"API key present: {weather.is_configured()}")
+    if not weather.is_configured():
+        return None, "Weather API key not configured."
+
+    # Within a session the snapshot is shared by every tool that needs it
+    result = await (session.get_weather(city) if session else weather.get_current_weather(city))
+    if result["success"]:
+        return result["record"], ""
+    elif "status" in result:
+        logging.error(f"Failed to get weather for {city}: {result['status']}")
+        return None, f"Could not retrieve weather for {city}."
+    return None, f"An error occurred while retrieving weather for {city}."
+
+
+def format_weather(record: WeatherRecord, city: str) -> str:
+    """Render a weather record for the voice response"""
+    weather_info = f"Weather in {city}: {record.description}, Temperature: {record.temperature:.1f}°C, Feels like: {record.feels_like:.1f}°C"
+    weather_info += f", Humidity: {record.humidity:.0f}%, Wind: {record.wind_speed * 3.6:.0f} km/h"
+    if record.rain_1h:
+        weather_info += f", Rain: {record.rain_1h:.1f} mm in the last hour"
+    return weather_info
+
+
+def weather_farming_advice(record: WeatherRecord) -> List[str]:
+    """Farming advice rules evaluated on the structured weather record"""
+    advice = []
+
+    if record.temperature > 35:
+        advice.extend([
+            "🌡️ High temperature alert - increase irrigation frequency",
+            "🌿 Apply mulch to protect crops from heat stress",
+            "⏰ Schedule farming activities for early morning or evening"
+        ])
+    elif record.temperature < 10:
+        advice.extend([
+            "❄️ Cold weather - protect sensitive crops with covers",
+            "💧 Reduce irrigation frequency",
+            "🔥 Consider frost protection measures"
+        ])
+
+    if record.is_heavy_rain:
+        advice.extend([
+            f"⛈️ Heavy rain ({record.rain_1h:.1f} mm/hour) - clear field drainage channels now",
+            "🚫 Avoid pesticide/fungicide application during rain",
+            "📅 Postpone harvesting activities if possible"
+        ])
+    elif record.is_raining:
+        advice.extend([
+            "🌧️ Rain expected - check drainage systems",
+            "🚫 Avoid pesticide/fungicide application during rain",
+            "💧 Skip the next irrigation if the field is already moist"
+        ])
+
+    if record.is_windy:
+        advice.extend([
+            f"💨 Windy conditions ({record.wind_speed * 3.6:.0f} km/h) - postpone spraying to avoid drift",
+            "🏠 Secure greenhouse covers",
+            "🌾 Check tall crops for support needs"
+        ])
+
+    if record.humidity >= 85 and not record.is_raining:
+        advice.append("🍄 High humidity - scout for fungal diseases like blight and mildew")
+
+    return advice
+
+
 @function_tool()
 async def get_weather(
     context: RunContext,  # type: ignore
@@ -41,22 +125,13 @@ async def get_weather(
     """
     logging.info(f"get_weather function called with city: {city}")  # Add this
     try:
-        api_key = os.getenv("OPENWEATHER_API_KEY")
-        logging.info(f"API key present: {bool(api_key)}")  # Add this
-        if not api_key:
-            return "Weather API key not configured."
-            
-        response = requests.get(
-            f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric")
-        
-        if response.status_code == 200:
-            data = response.json()
-            weather_info = f"Weather in {city}: {data['weather'][0]['description']}, Temperature: {data['main']['temp']}°C, Feels like: {data['main']['feels_like']}°C"
-            logging.info(f"Weather for {city}: {weather_info}")
-            return weather_info
-        else:
-            logging.error(f"Failed to get weather for {city}: {response.status_code}")
-            return f"Could not retrieve weather for {city}."
+        record, error = await fetch_weather_record(city, get_session_context(context))
+        if record is None:
+            return error
+
+        weather_info = format_weather(record, city)
+        logging.info(f"Weather for {city}: {weather_info}")
+        return weather_info
     except Exception as e:
         logging.error(f"Error retrieving weather for {city}: {e}")
         return f"An error occurred while retrieving weather for {city}." 
@@ -185,70 +260,30 @@ async def show_recommended_crop(
     try:
         import json
         
-        # Fetch soil data from SoilGrids API
-        soil_url = f"https://rest.isric.org/soilgrids/v2.0/properties/query?lon={longitude}&lat={latitude}"
-        soil_response = requests.get(soil_url)
+        # Fetch soil data from SoilGrids (cached per geohash tile, never expires)
+        soil_result = await get_soil_service().get_soil_profile(latitude, longitude)
         
-        soil_data = {}
-        if soil_response.status_code == 200:
-            soil_data = soil_response.json()
-            logging.info(f"Soil data fetched for coordinates ({latitude}, {longitude})")
+        soil_profile = None
+        if soil_result["success"]:
+            soil_profile = soil_result["profile"]
+            logging.info(f"Soil data for coordinates ({latitude}, {longitude}) from tile {soil_result['tile']} (cached: {soil_result['cached']})")
         else:
-            logging.warning(f"Could not fetch soil data: {soil_response.status_code}")
-        
-        # Create crop recommendations based on soil data
-        # This is a simplified logic - you can enhance it based on actual soil analysis
-        crop_recommendations = [
-            {
-                "strategy_id": "rec-001",
-                "strategy_name": "Paddy-cum-Fish Culture",
-                "farming_type": "Integrated Farming",
-                "crops_main": ["Paddy", "Rice"],
-                "crops_secondary": ["Rohu Fish", "Catla Fish", "Mrigal Fish"],
-                "investment_cost": 150000,
-                "estimated_profit_net": 85000,
-                "roi_percentage": 56.7,
-                "key_risk_factors": ["Water management", "Fish disease", "Market price fluctuation"],
-                "ideal_soil_types": ["Clay loam", "Heavy clay", "Waterlogged soil"],
-                "suitability_score": 85,
-                "season": "Kharif"
-            },
-            {
-                "strategy_id": "rec-002",
-                "strategy_name": "Wheat-Mustard with Mango Boundary Planting",
-                "farming_type": "Boundary Planting",
-                "crops_main": ["Wheat", "Mustard"],
-                "crops_secondary": ["Mango"],
-                "investment_cost": 85000,
-                "estimated_profit_net": 62000,
-                "roi_percentage": 72.9,
-                "key_risk_factors": ["Weather dependency", "Pest attacks", "Soil fertility decline"],
-                "ideal_soil_types": ["Loamy soil", "Sandy loam", "Well-drained soil"],
-                "suitability_score": 78,
-                "season": "Rabi"
-            },
-            {
-                "strategy_id": "rec-003",
-                "strategy_name": "Organic Vegetable Farming with Drip Irrigation",
-                "farming_type": "High-Value",
-                "crops_main": ["Tomato", "Capsicum", "Cucumber"],
-                "crops_secondary": ["Basil", "Mint"],
-                "investment_cost": 200000,
-                "estimated_profit_net": 180000,
-                "roi_percentage": 90.0,
-                "key_risk_factors": ["High initial investment", "Technical expertise needed", "Market access"],
-                "ideal_soil_types": ["Sandy loam", "Well-drained soil", "Rich organic matter"],
-                "suitability_score": 92,
-                "season": "Year-round"
-            }
-        ]
+            logging.warning(f"Could not fetch soil data: {soil_result['error']}")
+        
+        # Score the strategy catalog against the farm's soil and the upcoming season
+        season = current_season()
+        crop_recommendations = get_crop_engine().recommend(
+            soil_profile.to_vector() if soil_profile else None, season=season, top_k=3
+        )
         
         result = {
             "location": {
                 "latitude": latitude,
                 "longitude": longitude
             },
-            "soil_analysis_available": bool(soil_data),
+            "soil_analysis_available": soil_profile is not None,
+            "soil_profile": soil_profile.to_dict() if soil_profile else None,
+            "planning_season": season,
             "recommendations": crop_recommendations,
             "total_recommendations": len(crop_recommendations)
         }
@@ -256,14 +291,37 @@ async def show_recommended_crop(
         logging.info(f"Generated {len(crop_recommendations)} crop recommendations")
         return json.dumps(result, indent=2)
         
-    except requests.RequestException as e:
-        logging.error(f"Error fetching soil data: {e}")
-        return json.dumps({"error": f"Failed to fetch soil data: {str(e)}"})
     except Exception as e:
         logging.error(f"Error generating crop recommendations: {e}")
         return json.dumps({"error": f"An error occurred: {str(e)}"})
 
 
+def format_market_aggregates(aggregates: List[Any]) -> str:
+    """Render precomputed market summaries (MarketAggregate) for the agent"""
+    response = ""
+    for agg in aggregates:
+        unit = agg.unit.split("/")[-1]
+        if agg.change_7d is None or abs(agg.change_7d) < 1:
+            trend_icon = "➡️"
+        else:
+            trend_icon = "📈" if agg.change_7d > 0 else "📉"
+        
+        changes = []
+        if agg.change_7d is not None:
+            changes.append(f"7d: {agg.change_7d:+.1f}%")
+        if agg.change_30d is not None:
+            changes.append(f"30d: {agg.change_30d:+.1f}%")
+        
+        response += f"{trend_icon} {agg.commodity}: ₹{agg.latest_price:,.0f}/{unit}"
+        response += f" | 📍 {agg.state} | {agg.latest_date}\n"
+        if changes:
+            response += f"   {' | '.join(changes)}\n"
+        if agg.markets > 1:
+            response += f"   Cheapest: {agg.cheapest_market} ₹{agg.cheapest_price:,.0f} | "
+            response += f"Costliest: {agg.costliest_market} ₹{agg.costliest_price:,.0f}\n"
+        response += "\n"
+    return response
+
 @function_tool()
 async def get_market_prices(
     context: RunContext,  # type: ignore
@@ -274,6 +332,18 @@ async def get_market_prices(
     Get current market prices for crops. Can filter by crop name and location.
     """
     try:
+        # Serve precomputed summaries from scraped price history when available
+        price_store = get_price_store()
+        if crop_name:
+            aggregate = price_store.get_aggregate(crop_name, location) or price_store.get_aggregate(crop_name)
+            aggregates = [aggregate] if aggregate else []
+        else:
+            aggregates = price_store.latest_aggregates(location) or price_store.latest_aggregates()
+        
+        if aggregates:
+            logging.info(f"Retrieved market price summaries for {len(aggregates)} crops")
+            return "📊 Current Market Prices:\n\n" + format_market_aggregates(aggregates)
+        
         # Mock market prices - replace with actual API call to backend
         backend_url = os.getenv("BACKEND_URL", "http://localhost:5000")
         
@@ -288,7 +358,8 @@ async def get_market_prices(
         
         # Filter by crop name if provided
         if crop_name:
-            market_prices = [p for p in market_prices if crop_name.lower() in p["crop"].lower()]
+            crop_key = resolve_commodity_id(crop_name) or commodity_key(crop_name)
+            market_prices = [p for p in market_prices if commodity_key(p["crop"]) == crop_key]
         
         if not market_prices:
             return f"No market price data found for {crop_name or 'requested crops'}."
@@ -318,55 +389,56 @@ async def diagnose_crop_disease(
     Diagnose crop diseases and pests based on symptoms description.
     """
     try:
-        symptoms_lower = symptoms.lower()
-        diagnosis = {
-            "possible_diseases": [],
-            "possible_pests": [],
-            "recommendations": []
-        }
-        
-        # Disease detection logic
-        if any(word in symptoms_lower for word in ["yellow", "yellowing", "chlorosis"]):
-            diagnosis["possible_diseases"].extend(["Nutrient deficiency (Nitrogen)", "Viral infection", "Root rot"])
-            diagnosis["recommendations"].extend(["Apply balanced fertilizer", "Improve drainage", "Test soil pH"])
+        engine = get_diagnosis_engine()
+        matched = engine.match_symptoms(symptoms)
         
-        if any(word in symptoms_lower for word in ["spots", "lesions", "patches"]):
-            diagnosis["possible_diseases"].extend(["Leaf spot disease", "Fungal infection", "Bacterial blight"])
-            diagnosis["recommendations"].extend(["Apply fungicide spray", "Remove affected leaves", "Improve air circulation"])
+        # Add what this farmer's camera showed in the last couple of minutes
+        camera = get_session_context(context).camera
+        observation = camera.latest() if camera else None
+        if observation:
+            matched += [s for s in observation.symptoms() if s not in matched]
         
-        if any(word in symptoms_lower for word in ["holes", "eaten", "chewed"]):
-            diagnosis["possible_pests"].extend(["Caterpillars", "Beetles", "Grasshoppers"])
-            diagnosis["recommendations"].extend(["Use neem oil spray", "Install pheromone traps", "Introduce beneficial insects"])
+        candidates = engine.rank(matched, crop=crop_type, top_k=8)
         
-        if any(word in symptoms_lower for word in ["wilting", "drooping", "sagging"]):
-            diagnosis["possible_diseases"].extend(["Wilt disease", "Root damage", "Water stress"])
-            diagnosis["recommendations"].extend(["Check irrigation schedule", "Inspect root system", "Apply organic matter"])
-        
-        if any(word in symptoms_lower for word in ["white", "powdery", "mildew"]):
-            diagnosis["possible_diseases"].extend(["Powdery mildew", "Downy mildew"])
-            diagnosis["recommendations"].extend(["Apply sulfur-based fungicide", "Reduce humidity", "Improve spacing"])
+        diseases = [c for c in candidates if c.kind != "pest"]
+        pests = [c for c in candidates if c.kind == "pest"]
         
         # Format response
         response = "🔍 Crop Diagnosis Results:\n\n"
         
-        if diagnosis["possible_diseases"]:
+        if crop_type:
+            response += f"🌱 Crop: {crop_type.title()}\n"
+        if observation:
+            response += f"📷 Camera: {observation.summary()}\n"
+        if matched:
+            response += f"🩺 Symptoms recognized: {', '.join(engine.symptom_labels[s] for s in matched)}\n\n"
+        
+        if diseases:
             response += "🦠 Possible Diseases:\n"
-            for disease in diagnosis["possible_diseases"][:3]:  # Limit to top 3
-                response += f"• {disease}\n"
+            for candidate in diseases[:3]:  # Limit to top 3
+                response += f"• {candidate.name} ({candidate.confidence:.0%} symptom match)\n"
             response += "\n"
         
-        if diagnosis["possible_pests"]:
+        if pests:
             response += "🐛 Possible Pests:\n"
-            for pest in diagnosis["possible_pests"][:3]:
-                response += f"• {pest}\n"
+            for candidate in pests[:3]:
+                response += f"• {candidate.name} ({candidate.confidence:.0%} symptom match)\n"
             response += "\n"
         
-        if diagnosis["recommendations"]:
+        # Take actions round-robin from the leading candidates so advice covers the differential
+        recommendations = []
+        leading = [c.actions for c in candidates[:3]]
+        for rank in range(max((len(actions) for actions in leading), default=0)):
+            for actions in leading:
+                if rank < len(actions) and actions[rank] not in recommendations:
+                    recommendations.append(actions[rank])
+        
+        if recommendations:
             response += "💡 Recommended Actions:\n"
-            for rec in diagnosis["recommendations"][:4]:  # Limit to top 4
+            for rec in recommendations[:4]:  # Limit to top 4
                 response += f"• {rec}\n"
         
-        if not any([diagnosis["possible_diseases"], diagnosis["possible_pests"]]):
+        if not candidates:
             response = "I need more specific symptoms to provide an accurate diagnosis. Could you describe:\n• Color changes in leaves\n• Spots or lesions\n• Plant behavior (wilting, stunted growth)\n• Any visible insects or pests"
         
         logging.info(f"Diagnosed crop issue with symptoms: {symptoms[:50]}...")
@@ -455,44 +527,13 @@ async def get_weather_farming_advice(
     """
     try:
         # Get weather data first
-        weather_info = await get_weather(context, city)
-        
-        if "error" in weather_info.lower() or "could not" in weather_info.lower():
-            return weather_info
-        
-        # Extract temperature for advice (simplified parsing)
-        import re
-        temp_match = re.search(r'Temperature: ([\d.]+)°C', weather_info)
-        temp = float(temp_match.group(1)) if temp_match else 25
-        
+        record, error = await fetch_weather_record(city, get_session_context(context))
+        if record is None:
+            return error
+
         # Generate farming advice based on weather
-        advice = []
-        
-        if temp > 35:
-            advice.extend([
-                "🌡️ High temperature alert - increase irrigation frequency",
-                "🌿 Apply mulch to protect crops from heat stress",
-                "⏰ Schedule farming activities for early morning or evening"
-            ])
-        elif temp < 10:
-            advice.extend([
-                "❄️ Cold weather - protect sensitive crops with covers",
-                "💧 Reduce irrigation frequency",
-                "🔥 Consider frost protection measures"
-            ])
-        
-        if "rain" in weather_info.lower():
-            advice.extend([
-                "🌧️ Rain expected - check drainage systems",
-                "🚫 Avoid pesticide/fungicide application during rain",
-                "📅 Postpone harvesting activities if possible"
-            ])
-        
-        if "wind" in weather_info.lower():
-            advice.extend([
-                "💨 Windy conditions - secure greenhouse covers",
-                "🌾 Check tall crops for support needs"
-            ])
+        advice = weather_farming_advice(record)
+        weather_info = format_weather(record, city)
         
         # Combine weather info with farming advice
         response = weather_info + "\n\n🌾 Farming Advice:\n"
@@ -511,6 +552,7 @@ async def get_weather_farming_advice(
 
 
 @function_tool()
+@memoize_tool()
 async def calculate_farm_area(
     context: RunContext,  # type: ignore
     length_meters: float,
@@ -556,32 +598,43 @@ async def get_user_farm_info(context: RunContext) -> str:  # type: ignore
     try:
         logging.info("Getting farm info from localStorage")
         
-        # Send request to get farm data from localStorage through web client
-        farm_request = {
-            "type": "farm_data_request",
-            "action": "get_all_farms"
-        }
-        
-        try:
-            # Send request through the agent context to web client
-            if hasattr(context, 'room') and context.room:
-                await context.room.local_participant.publish_data(
-                    json.dumps(farm_request).encode(),
-                    destination_sids=None
-                )
-                logging.info("Sent farm data request to web client")
-                
-                # For now, return a response that works with localStorage data
-                return get_mock_farm_data_response()
-            
-        except Exception as data_error:
-            logging.error(f"Error requesting farm data: {data_error}")
+        # Ask the web client for its saved farms; later calls reuse the reply
+        snapshot = await get_session_context(context).get_farm_snapshot()
+        if not snapshot or not snapshot.farms:
             return get_mock_farm_data_response()
+        
+        result = "🌾 **Your Farm Information:**\n\n"
+        for i, farm in enumerate(snapshot.farms, 1):
+            selected = " (selected)" if farm is snapshot.selected else ""
+            result += f"**{i}. {farm.name}**{selected}\n"
+            result += format_farm_details(farm)
+            result += "\n"
+        
+        total_area = sum(farm.area_acres or 0 for farm in snapshot.farms)
+        result += f"**Total Area:** {total_area:.2f} acres across {len(snapshot.farms)} farm(s)\n"
+        return result
             
     except Exception as e:
         logging.error(f"Error getting farm info: {e}")
         return "Sorry, I encountered an error retrieving your farm information."
 
+def format_farm_details(farm: FarmProfile) -> str:
+    """Bullet lines describing one saved farm"""
+    result = ""
+    if farm.crop_type:
+        result += f"• Crop: {farm.crop_type}\n"
+    if farm.area_acres:
+        result += f"• Area: {farm.area_acres:.2f} acres\n"
+    if farm.soil_type:
+        result += f"• Soil Type: {farm.soil_type}\n"
+    if farm.irrigation_type:
+        result += f"• Irrigation: {farm.irrigation_type}\n"
+    if farm.has_location:
+        result += f"• Coordinates: {farm.latitude:.5f}, {farm.longitude:.5f}\n"
+    if farm.notes:
+        result += f"• Notes: {farm.notes}\n"
+    return result
+
 def get_mock_farm_data_response() -> str:
     """
     Provide a response that works with localStorage-based farm data.
@@ -624,27 +677,16 @@ async def get_farm_for_crop_recommendations(context: RunContext) -> str:  # type
     try:
         logging.info("Getting farm data for crop recommendations from localStorage")
         
-        # Send request to get farm data from localStorage through web client
-        farm_request = {
-            "type": "farm_data_request",
-            "action": "get_crop_recommendation_data"
-        }
-        
-        try:
-            # Send request through the agent context to web client
-            if hasattr(context, 'room') and context.room:
-                await context.room.local_participant.publish_data(
-                    json.dumps(farm_request).encode(),
-                    destination_sids=None
-                )
-                logging.info("Sent crop recommendation data request to web client")
-                
-                # For now, return a response that works with localStorage data
-                return get_crop_recommendation_guidance()
-            
-        except Exception as data_error:
-            logging.error(f"Error requesting farm data for crops: {data_error}")
+        farm = await get_session_context(context).get_selected_farm()
+        if not farm:
             return get_crop_recommendation_guidance()
+        
+        result = "🌾 **Farm Data for Crop Recommendations:**\n\n"
+        result += f"**{farm.name}**\n"
+        result += format_farm_details(farm)
+        if farm.has_location:
+            result += f"\nUse latitude {farm.latitude:.5f} and longitude {farm.longitude:.5f} with show_recommended_crop for soil-based suggestions.\n"
+        return result
             
     except Exception as e:
         logging.error(f"Error getting farm data for recommendations: {e}")
@@ -837,21 +879,37 @@ def get_page_description(page: str) -> str:
 # ================== COMPREHENSIVE FARMING TOOLS ==================
 
 @function_tool()
+@memoize_tool(ttl=3600)
 async def get_soil_health_analysis(
     context: RunContext,  # type: ignore
-    soil_ph: float = 7.0,
-    organic_matter: float = 3.0,
+    soil_ph: Optional[float] = None,
+    organic_matter: Optional[float] = None,
     nitrogen: float = 2.5,
     phosphorus: float = 30.0,
-    potassium: float = 150.0) -> str:
+    potassium: float = 150.0,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None) -> str:
     """
     Analyze soil health parameters and provide comprehensive recommendations.
     Parameters: soil_ph (6.0-8.0), organic_matter (%), nitrogen (%), phosphorus (ppm), potassium (ppm)
+    Without a soil test, pass latitude/longitude to estimate pH and organic matter from soil map data.
     """
     try:
         analysis = []
         recommendations = []
         
+        # Fill untested values from the local soil grid / cached soil map
+        mapped = None
+        if latitude is not None and longitude is not None and (soil_ph is None or organic_matter is None):
+            soil_result = await get_soil_service().get_soil_profile(latitude, longitude)
+            if soil_result["success"]:
+                mapped = soil_result["profile"]
+        
+        if soil_ph is None:
+            soil_ph = round(mapped.ph, 1) if mapped and not math.isnan(mapped.ph) else 7.0
+        if organic_matter is None:
+            organic_matter = round(mapped.organic_matter, 1) if mapped and not math.isnan(mapped.organic_carbon) else 3.0
+        
         # pH Analysis
         if soil_ph < 6.0:
             analysis.append(f"🔴 Soil is acidic (pH {soil_ph})")
@@ -885,6 +943,11 @@ async def get_soil_health_analysis(
             recommendations.append("Apply potash or wood ash")
         
         result = "🌱 **Soil Health Analysis Report**\n\n"
+        if mapped:
+            result += f"🗺️ Estimated from soil map data ({mapped.texture} soil"
+            if not math.isnan(mapped.cec):
+                result += f", CEC {mapped.cec:.0f} cmol/kg"
+            result += ") - confirm with a lab soil test\n\n"
         result += "**Current Status:**\n" + "\n".join(f"• {item}" for item in analysis)
         
         if recommendations:
@@ -904,6 +967,7 @@ async def get_soil_health_analysis(
         return "Sorry, I couldn't complete the soil analysis. Please check your input values."
 
 @function_tool()
+@memoize_tool(bucket="month")
 async def get_irrigation_schedule(
     context: RunContext,  # type: ignore
     crop_type: str,
@@ -916,24 +980,6 @@ async def get_irrigation_schedule(
     try:
         current_month = datetime.now().month
         
-        # Seasonal water requirements (liters per day per acre)
-        crop_water_needs = {
-            "wheat": {"winter": 800, "summer": 1200, "monsoon": 400},
-            "rice": {"winter": 1500, "summer": 2000, "monsoon": 800},
-            "tomato": {"winter": 600, "summer": 1000, "monsoon": 300},
-            "potato": {"winter": 500, "summer": 800, "monsoon": 200},
-            "onion": {"winter": 400, "summer": 700, "monsoon": 150},
-            "corn": {"winter": 700, "summer": 1100, "monsoon": 500},
-            "sugarcane": {"winter": 1200, "summer": 1800, "monsoon": 600}
-        }
-        
-        # Soil adjustment factors
-        soil_factors = {
-            "sandy": 1.3,  # Needs more water
-            "clay": 0.8,   # Retains water better
-            "loamy": 1.0   # Standard
-        }
-        
         crop_lower = crop_type.lower()
         if season == "current":
             if current_month in [12, 1, 2]:
@@ -943,8 +989,8 @@ async def get_irrigation_schedule(
             else:
                 season = "summer"
         
-        base_water = crop_water_needs.get(crop_lower, {"winter": 600, "summer": 900, "monsoon": 300})[season]
-        soil_factor = soil_factors.get(soil_type.lower(), 1.0)
+        base_water = agronomy.water_needs(crop_lower)[season]
+        soil_factor = agronomy.soil_water_factor(soil_type)
         
         daily_water = base_water * soil_factor * area_acres
         weekly_water = daily_water * 7
@@ -992,40 +1038,8 @@ async def get_pest_control_guide(
     Severity levels: mild, moderate, severe
     """
     try:
-        # Common pests by crop
-        crop_pests = {
-            "tomato": ["aphids", "whiteflies", "hornworms", "cutworms", "blight"],
-            "wheat": ["aphids", "army worms", "rust", "smut"],
-            "rice": ["brown planthopper", "stem borer", "blast disease"],
-            "potato": ["colorado beetle", "late blight", "wireworms"],
-            "corn": ["corn borer", "armyworm", "rootworm", "rust"],
-            "cotton": ["bollworm", "aphids", "jassids", "thrips"]
-        }
-        
-        # Pest control methods
-        control_methods = {
-            "organic": [
-                "Neem oil spray (5ml per liter water)",
-                "Beneficial insects (ladybugs, lacewings)",
-                "Companion planting (marigolds, basil)",
-                "Diatomaceous earth for crawling insects",
-                "Garlic-chili spray for soft-bodied insects"
-            ],
-            "biological": [
-                "Release predatory insects",
-                "Use pheromone traps",
-                "Apply Bacillus thuringiensis (Bt)",
-                "Encourage birds and bats",
-                "Use parasitic wasps"
-            ],
-            "chemical": [
-                "Targeted insecticides (as last resort)",
-                "Systemic pesticides for severe infestations",
-                "Fungicides for disease control",
-                "Follow IPM principles",
-                "Rotate chemical classes"
-            ]
-        }
+        crop_pests = agronomy.table("crop_pests")
+        control_methods = agronomy.table("pest_control_methods")
         
         result = f"🐛 **Pest Control Guide for {crop.title()}**\n\n"
         
@@ -1077,6 +1091,7 @@ async def get_pest_control_guide(
         return "Sorry, I couldn't generate the pest control guide. Please try again."
 
 @function_tool()
+@memoize_tool()
 async def get_fertilizer_recommendations(
     context: RunContext,  # type: ignore
     crop: str,
@@ -1088,50 +1103,8 @@ async def get_fertilizer_recommendations(
     Growth stages: seedling, vegetative, flowering, fruiting, maturity
     """
     try:
-        # NPK requirements by crop and stage (kg per acre)
-        fertilizer_needs = {
-            "wheat": {
-                "seedling": {"N": 20, "P": 15, "K": 10},
-                "vegetative": {"N": 40, "P": 20, "K": 15},
-                "flowering": {"N": 30, "P": 25, "K": 20},
-                "maturity": {"N": 10, "P": 10, "K": 15}
-            },
-            "rice": {
-                "seedling": {"N": 15, "P": 20, "K": 15},
-                "vegetative": {"N": 50, "P": 25, "K": 20},
-                "flowering": {"N": 35, "P": 15, "K": 25},
-                "maturity": {"N": 15, "P": 5, "K": 20}
-            },
-            "tomato": {
-                "seedling": {"N": 10, "P": 12, "K": 8},
-                "vegetative": {"N": 25, "P": 15, "K": 20},
-                "flowering": {"N": 20, "P": 25, "K": 30},
-                "fruiting": {"N": 30, "P": 20, "K": 35}
-            },
-            "potato": {
-                "seedling": {"N": 15, "P": 20, "K": 25},
-                "vegetative": {"N": 35, "P": 25, "K": 40},
-                "flowering": {"N": 25, "P": 15, "K": 45},
-                "maturity": {"N": 10, "P": 5, "K": 30}
-            }
-        }
-        
-        # Soil adjustment factors
-        soil_adjustments = {
-            "sandy": {"N": 1.2, "P": 1.1, "K": 1.3},
-            "clay": {"N": 0.9, "P": 0.8, "K": 0.8},
-            "loamy": {"N": 1.0, "P": 1.0, "K": 1.0}
-        }
-        
-        crop_lower = crop.lower()
-        default_npk = {"N": 25, "P": 20, "K": 20}
-        
-        if crop_lower in fertilizer_needs and growth_stage in fertilizer_needs[crop_lower]:
-            base_npk = fertilizer_needs[crop_lower][growth_stage]
-        else:
-            base_npk = default_npk
-        
-        soil_factor = soil_adjustments.get(soil_type.lower(), {"N": 1.0, "P": 1.0, "K": 1.0})
+        base_npk = agronomy.npk(crop, growth_stage)
+        soil_factor = agronomy.soil_nutrient_factors(soil_type)
         
         # Calculate adjusted requirements
         adjusted_npk = {
@@ -1191,6 +1164,7 @@ async def get_fertilizer_recommendations(
         return "Sorry, I couldn't generate fertilizer recommendations. Please try again."
 
 @function_tool()
+@memoize_tool()
 async def get_crop_rotation_plan(
     context: RunContext,  # type: ignore
     current_crop: str,
@@ -1201,32 +1175,8 @@ async def get_crop_rotation_plan(
     Provide a comprehensive crop rotation plan to maintain soil health and maximize yields.
     """
     try:
-        # Crop families and their characteristics
-        crop_families = {
-            "legumes": ["beans", "peas", "lentils", "chickpeas", "soybeans"],
-            "cereals": ["wheat", "rice", "corn", "barley", "oats"],
-            "brassicas": ["cabbage", "broccoli", "cauliflower", "mustard", "radish"],
-            "solanaceae": ["tomato", "potato", "eggplant", "peppers"],
-            "cucurbits": ["cucumber", "squash", "pumpkin", "melon"],
-            "root_crops": ["carrot", "beet", "turnip", "onion"]
-        }
-        
-        # Benefits of crop families
-        family_benefits = {
-            "legumes": "Fix nitrogen in soil, improve soil structure",
-            "cereals": "High biomass, good for soil organic matter",
-            "brassicas": "Break pest cycles, natural biofumigation",
-            "solanaceae": "Deep rooting, nutrient uptake",
-            "cucurbits": "Ground cover, weed suppression",
-            "root_crops": "Break soil compaction, utilize deep nutrients"
-        }
-        
-        # Find current crop family
-        current_family = None
-        for family, crops in crop_families.items():
-            if current_crop.lower() in crops:
-                current_family = family
-                break
+        family_benefits = agronomy.table("family_benefits")
+        current_family = agronomy.crop_family(current_crop)
         
         result = f"🔄 **Crop Rotation Plan for {current_crop.title()}**\n\n"
         result += f"**Current Situation:**\n"
@@ -1302,81 +1252,7 @@ async def get_seasonal_calendar(
     Provide comprehensive seasonal farming calendar with planting, care, and harvest schedules.
     """
     try:
-        # Seasonal activities by month (for India - can be adapted)
-        seasonal_activities = {
-            "January": {
-                "plant": ["wheat", "barley", "mustard", "peas"],
-                "care": ["irrigation for rabi crops", "pest monitoring", "fertilizer application"],
-                "harvest": ["sugarcane", "potato (early varieties)"],
-                "general": ["soil preparation for summer crops", "equipment maintenance"]
-            },
-            "February": {
-                "plant": ["summer vegetables", "fodder crops"],
-                "care": ["continued irrigation", "weed control", "disease prevention"],
-                "harvest": ["mustard", "gram", "wheat (late varieties)"],
-                "general": ["market planning", "seed procurement for kharif"]
-            },
-            "March": {
-                "plant": ["summer corn", "sunflower", "watermelon"],
-                "care": ["increased irrigation", "mulching", "pest control"],
-                "harvest": ["wheat", "barley", "chickpea"],
-                "general": ["field preparation", "irrigation system check"]
-            },
-            "April": {
-                "plant": ["cotton", "sugarcane", "summer rice"],
-                "care": ["heat stress management", "regular watering", "shade provision"],
-                "harvest": ["mustard oil seeds", "late wheat"],
-                "general": ["equipment repair", "monsoon preparation"]
-            },
-            "May": {
-                "plant": ["early kharif preparatory work"],
-                "care": ["summer crop maintenance", "water conservation"],
-                "harvest": ["summer vegetables", "fodder crops"],
-                "general": ["soil testing", "seed treatment for kharif"]
-            },
-            "June": {
-                "plant": ["rice", "cotton", "sugarcane", "corn"],
-                "care": ["monsoon damage control", "drainage management"],
-                "harvest": ["summer crops completion"],
-                "general": ["monsoon preparedness", "field drainage"]
-            },
-            "July": {
-                "plant": ["late kharif crops", "pulses", "oilseeds"],
-                "care": ["weed control", "pest monitoring", "disease management"],
-                "harvest": ["early summer crops"],
-                "general": ["continuous monitoring", "intercropping"]
-            },
-            "August": {
-                "plant": ["late season vegetables"],
-                "care": ["nutrient management", "water logging prevention"],
-                "harvest": ["early kharif vegetables"],
-                "general": ["crop insurance", "yield estimation"]
-            },
-            "September": {
-                "plant": ["post-monsoon vegetables", "winter preparatory crops"],
-                "care": ["post-monsoon care", "disease control"],
-                "harvest": ["kharif fruits", "vegetables"],
-                "general": ["rabi preparation", "soil improvement"]
-            },
-            "October": {
-                "plant": ["rabi crops", "winter vegetables", "wheat"],
-                "care": ["reduced irrigation", "harvest preparation"],
-                "harvest": ["rice", "cotton", "sugarcane"],
-                "general": ["storage preparation", "market analysis"]
-            },
-            "November": {
-                "plant": ["late rabi crops", "winter flowers"],
-                "care": ["cold protection", "reduced watering"],
-                "harvest": ["major kharif crops", "cotton picking"],
-                "general": ["post-harvest management", "storage"]
-            },
-            "December": {
-                "plant": ["winter vegetables", "late wheat"],
-                "care": ["frost protection", "winter care"],
-                "harvest": ["late kharif", "winter vegetables"],
-                "general": ["year-end planning", "equipment winterization"]
-            }
-        }
+        seasonal_activities = agronomy.table("seasonal_activities")
         
         current_month = datetime.now().strftime("%B")
         next_month = (datetime.now().month % 12) + 1
@@ -1460,45 +1336,7 @@ async def get_government_schemes(
     Farmer types: small, marginal, medium, large
     """
     try:
-        # Major government schemes (India-focused, can be adapted)
-        schemes = {
-            "pradhan_mantri_kisan": {
-                "name": "PM-KISAN Samman Nidhi",
-                "benefit": "₹6,000 per year in 3 installments",
-                "eligibility": "All land-holding farmers",
-                "how_to_apply": "Online at pmkisan.gov.in or through CSC centers"
-            },
-            "crop_insurance": {
-                "name": "Pradhan Mantri Fasal Bima Yojana",
-                "benefit": "Crop insurance against natural calamities",
-                "eligibility": "All farmers (loanee and non-loanee)",
-                "how_to_apply": "Through banks, CSCs, or insurance companies"
-            },
-            "kisan_credit_card": {
-                "name": "Kisan Credit Card (KCC)",
-                "benefit": "Easy credit access up to ₹3 lakh at 4% interest",
-                "eligibility": "All farmers with land records",
-                "how_to_apply": "Any bank branch with land documents"
-            },
-            "soil_health_card": {
-                "name": "Soil Health Card Scheme",
-                "benefit": "Free soil testing and nutrient recommendations",
-                "eligibility": "All farmers",
-                "how_to_apply": "District agriculture office"
-            },
-            "organic_farming": {
-                "name": "Paramparagat Krishi Vikas Yojana",
-                "benefit": "₹50,000 per hectare for organic farming",
-                "eligibility": "Farmers willing to do organic farming",
-                "how_to_apply": "Through farmer producer organizations"
-            },
-            "irrigation": {
-                "name": "Per Drop More Crop",
-                "benefit": "Subsidy on drip irrigation systems",
-                "eligibility": "All categories of farmers",
-                "how_to_apply": "District horticulture department"
-            }
-        }
+        schemes = agronomy.table("government_schemes")
         
         result = f"🏛️ **Government Schemes for {farmer_type.title()} Farmers**\n\n"
         result += f"**Location:** {location}\n"
@@ -1581,6 +1419,7 @@ async def get_government_schemes(
         return "Sorry, I couldn't retrieve government schemes information. Please try again."
 
 @function_tool()
+@memoize_tool(bucket="day")
 async def get_harvest_planning(
     context: RunContext,  # type: ignore
     crop: str,
@@ -1593,26 +1432,12 @@ async def get_harvest_planning(
     try:
         from datetime import datetime, timedelta
         
-        # Crop maturity periods (days)
-        maturity_periods = {
-            "wheat": 120,
-            "rice": 140,
-            "corn": 90,
-            "tomato": 75,
-            "potato": 90,
-            "onion": 120,
-            "cotton": 180,
-            "sugarcane": 365,
-            "soybean": 100,
-            "mustard": 90
-        }
-        
         try:
             plant_date = datetime.strptime(planted_date, "%Y-%m-%d")
         except ValueError:
             plant_date = datetime.now() - timedelta(days=30)  # Default assumption
         
-        maturity_days = maturity_periods.get(crop.lower(), 100)
+        maturity_days = agronomy.maturity_days(crop)
         harvest_date = plant_date + timedelta(days=maturity_days)
         days_remaining = (harvest_date - datetime.now()).days
         
@@ -1675,17 +1500,11 @@ async def get_harvest_planning(
             result += f"• Use appropriate tools and methods\n"
             result += f"• Ensure minimal crop damage\n"
         
-        # Expected yield and economics
-        yield_per_acre = {
-            "wheat": 2000, "rice": 2500, "corn": 3000, "tomato": 15000,
-            "potato": 8000, "onion": 12000, "cotton": 400, "sugarcane": 35000
-        }
-        
-        expected_yield = yield_per_acre.get(crop.lower(), 2000) * area_acres
+        expected_yield = agronomy.yield_per_acre(crop) * area_acres
         
         result += f"\n**📊 Expected Production:**\n"
         result += f"• Estimated Yield: {expected_yield:,.0f} kg\n"
-        result += f"• Per Acre Yield: {yield_per_acre.get(crop.lower(), 2000):,.0f} kg/acre\n\n"
+        result += f"• Per Acre Yield: {agronomy.yield_per_acre(crop):,.0f} kg/acre\n\n"
         
         result += f"**📦 Post-Harvest Handling:**\n"
         result += f"• Clean and sort produce immediately\n"
@@ -1714,6 +1533,7 @@ async def get_harvest_planning(
         return "Sorry, I couldn't generate the harvest plan. Please check your input dates."
 
 @function_tool()
+@memoize_tool()
 async def get_equipment_recommendations(
     context: RunContext,  # type: ignore
     farm_size_acres: float,
@@ -1725,24 +1545,7 @@ async def get_equipment_recommendations(
     Farming types: cereals, vegetables, mixed, organic, commercial
     """
     try:
-        # Equipment categories by farm size
-        equipment_by_size = {
-            "small": {  # 1-5 acres
-                "essential": ["hand tools", "sprayer", "weeder", "small tiller"],
-                "recommended": ["power weeder", "mini tractor", "pump set"],
-                "advanced": ["small combine", "seed drill", "rotavator"]
-            },
-            "medium": {  # 5-20 acres
-                "essential": ["tractor 25-35 HP", "cultivator", "harrow", "sprayer"],
-                "recommended": ["seed drill", "thresher", "pump set", "trailer"],
-                "advanced": ["combine harvester", "rotavator", "disc harrow"]
-            },
-            "large": {  # 20+ acres
-                "essential": ["tractor 45+ HP", "combine harvester", "multiple implements"],
-                "recommended": ["laser land leveler", "boom sprayer", "multiple tractors"],
-                "advanced": ["GPS-guided equipment", "drone sprayer", "automated systems"]
-            }
-        }
+        equipment_by_size = agronomy.table("equipment_by_size")
         
         # Determine farm size category
         if farm_size_acres <= 5:
@@ -1752,26 +1555,6 @@ async def get_equipment_recommendations(
         else:
             size_category = "large"
         
-        # Budget-wise equipment costs (in INR lakhs)
-        equipment_costs = {
-            "hand tools": 0.05,
-            "sprayer": 0.15,
-            "weeder": 0.08,
-            "small tiller": 0.8,
-            "power weeder": 0.6,
-            "mini tractor": 4.5,
-            "pump set": 0.3,
-            "tractor 25-35 HP": 6.5,
-            "tractor 45+ HP": 12.0,
-            "cultivator": 0.8,
-            "harrow": 1.2,
-            "seed drill": 1.5,
-            "thresher": 2.5,
-            "combine harvester": 25.0,
-            "rotavator": 1.8,
-            "trailer": 1.0
-        }
-        
         result = f"🚜 **Equipment Recommendations for Your Farm**\n\n"
         result += f"**Farm Profile:**\n"
         result += f"• Size: {farm_size_acres} acres ({size_category} farm)\n"
@@ -1792,7 +1575,7 @@ async def get_equipment_recommendations(
         
         total_cost = 0
         for i, equipment in enumerate(focus_equipment, 1):
-            cost = equipment_costs.get(equipment, 1.0)
+            cost = agronomy.equipment_cost(equipment)
             total_cost += cost
             
             result += f"\n**{i}. {equipment.title()}**\n"
@@ -1832,9 +1615,9 @@ async def get_equipment_recommendations(
         result += f"**🤝 Custom Hiring Suggestions:**\n"
         result += f"Instead of buying, consider hiring these for occasional use:\n"
         
-        expensive_equipment = [item for item in equipment_list["advanced"] if equipment_costs.get(item, 0) > 5]
+        expensive_equipment = [item for item in equipment_list["advanced"] if agronomy.equipment_cost(item, 0) > 5]
         for equipment in expensive_equipment[:3]:
-            cost = equipment_costs.get(equipment, 0)
+            cost = agronomy.equipment_cost(equipment, 0)
             result += f"• {equipment.title()} (₹{cost:.1f} lakh) - Hire at ₹{cost*1000/10:.0f}/day\n"
         
         result += f"\n**📱 Modern Technology Options:**\n"
@@ -2114,7 +1897,8 @@ async def query_comprehensive_knowledge(
         from rag_system import get_rag_system
         
         rag_system = await get_rag_system()
-        result = await rag_system.query_comprehensive(query, include_web_search)
+        result = await rag_system.query_comprehensive(query, include_web_search,
+                                                      owner=get_session_context(context))
         
         if "error" in result:
             return f"Sorry, I encountered an error searching for information: {result['error']}"
@@ -2127,6 +1911,8 @@ async def query_comprehensive_knowledge(
             response += "📚 From my farming knowledge:\n"
             for i, kb_result in enumerate(result["knowledge_base_results"][:3], 1):
                 response += f"{i}. {kb_result['metadata'].get('summary', 'Agricultural information')}\n"
+                if kb_result.get("snippet"):
+                    response += f"   {kb_result['snippet'][:300]}\n"
                 response += f"   Source: {kb_result['source']} | Category: {kb_result['category']}\n\n"
         
         # Add web search results if available
@@ -2155,16 +1941,47 @@ async def query_comprehensive_knowledge(
         logging.error(f"Error in query_comprehensive_knowledge: {e}")
         return f"Sorry, I encountered an error while searching for information about '{query}'. Please try again."
 
+def format_price_history(price_store, commodity: str, state: Optional[str] = None, days: int = 30) -> str:
+    """Render price statistics and trend for a commodity from the price history store"""
+    stats = price_store.price_stats(commodity, state=state, days=days)
+    if not stats.get("success"):
+        return ""
+    
+    place = f" in {state.title()}" if state else ""
+    unit = stats["unit"].split("/")[-1]
+    markets = f"{stats['markets']} market{'s' if stats['markets'] != 1 else ''}"
+    trend_icons = {"rising": "📈", "falling": "📉", "stable": "➡️"}
+    
+    response = f"📈 {stats['commodity']} prices{place} (last {days} days, {markets}):\n"
+    response += f"- Latest average: ₹{stats['latest_mean']:,.0f}/{unit} ({stats['latest_date']})\n"
+    response += f"- Range: ₹{stats['min']:,.0f} - ₹{stats['max']:,.0f} | Median: ₹{stats['median']:,.0f}\n"
+    
+    trend = price_store.price_trend(commodity, state=state, days=days)
+    if trend.get("success"):
+        icon = trend_icons.get(trend["direction"], "➡️")
+        response += f"- Trend: {icon} {trend['direction'].title()} ({trend['change_percent']:+.1f}% from {trend['from_date']} to {trend['to_date']})\n"
+    
+    if not state:
+        by_state = price_store.compare_states(commodity, days=days)
+        if len(by_state) > 1:
+            response += f"- Cheapest state: {by_state[0]['state']} (₹{by_state[0]['median']:,.0f}) | "
+            response += f"Costliest: {by_state[-1]['state']} (₹{by_state[-1]['median']:,.0f})\n"
+    
+    return response
+
 @function_tool()
 async def get_live_market_data_rag(
     context: RunContext,
-    commodity: Optional[str] = None
+    commodity: Optional[str] = None,
+    state: Optional[str] = None
 ) -> str:
     """
     Get live market data using the RAG system's web scraper and update the knowledge base.
+    Also answers price trend questions (e.g. "is wheat rising in Punjab") from stored price history.
     
     Args:
         commodity: Specific commodity to look for (optional)
+        state: Restrict price statistics and trend to one state (optional)
     
     Returns:
         Fresh market data with sources and scraping information
@@ -2181,14 +1998,13 @@ async def get_live_market_data_rag(
             response += f"🌐 Sources: {', '.join(result.get('sources', []))}\n"
             response += f"⏱️ Scraping time: {result.get('scraping_time', 0):.2f} seconds\n\n"
             
-            # If specific commodity requested, search for it
+            # If specific commodity requested, answer from the price history store
             if commodity:
-                search_result = await rag_system.query_comprehensive(f"market price {commodity}")
-                if search_result.get("market_data"):
-                    response += f"📈 {commodity.title()} prices:\n"
-                    for item in search_result["market_data"]:
-                        if commodity.lower() in item.get("commodity", "").lower():
-                            response += f"- {item.get('market', 'Unknown Market')}: ₹{item.get('currentPrice', 0)} per {item.get('unit', 'unit')}\n"
+                price_summary = format_price_history(rag_system.price_store, commodity, state)
+                if price_summary:
+                    response += price_summary
+                else:
+                    response += f"No price history found for {commodity.title()}{f' in {state.title()}' if state else ''} yet.\n"
             else:
                 response += "Use the market prices page or ask me about specific commodities for detailed pricing!"
             
@@ -2280,9 +2096,19 @@ async def get_website_data_access(
             # Format based on section type
             if section.lower() == "market_prices":
                 if "data" in data and data["data"]:
-                    for item in data["data"][:5]:
-                        response += f"• {item.get('commodity', 'Unknown')}: ₹{item.get('currentPrice', 0)} per {item.get('unit', 'unit')}\n"
-                        response += f"  Market: {item.get('market', 'Unknown')} | State: {item.get('state', 'Unknown')}\n\n"
+                    price_store = rag_system.price_store
+                    if not data.get("cached"):
+                        price_store.ingest_records(data["data"], source=result.get("source", "market_prices_api"))
+                    
+                    # Summarize per commodity from the precomputed aggregates
+                    commodities = list(dict.fromkeys(item.get("commodity", "") for item in data["data"]))
+                    aggregates = [agg for agg in (price_store.get_aggregate(name) for name in commodities) if agg]
+                    if aggregates:
+                        response += format_market_aggregates(aggregates[:5])
+                    else:
+                        for item in data["data"][:5]:
+                            response += f"• {item.get('commodity', 'Unknown')}: ₹{item.get('currentPrice', 0)} per {item.get('unit', 'unit')}\n"
+                            response += f"  Market: {item.get('market', 'Unknown')} | State: {item.get('state', 'Unknown')}\n\n"
             
             elif section.lower() == "tasks":
                 if "active_tasks" in data:
@@ -2360,9 +2186,14 @@ async def add_farming_knowledge(
             category=category
         )
         
-        success = await rag_system.knowledge_base.add_document(doc)
+        # Stored by the knowledge base's background writer; the farmer need not wait for it,
+        # and this conversation's next search does
+        session = get_session_context(context)
+        queued = rag_system.knowledge_base.enqueue_document(doc, owner=session)
         
-        if success:
+        if queued is not None:
+            # Cached answers from before the write would hide it from the next question
+            session.invalidate("retrieval")
             return f"✅ Successfully added farming knowledge to the {category} category! I can now use this information to help answer questions."
         else:
             return "❌ Sorry, I couldn't add that knowledge to my database right now. Please try again."
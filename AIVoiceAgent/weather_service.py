@@ -0,0 +1,409 @@
+"""
+Weather Service for AI Farm Care Assistant
+Non-blocking OpenWeatherMap client with a pooled connection, a per-city TTL
+cache and request coalescing, so a conversation hits the API at most once per
+city per cache window. 5-day forecasts are turned into precomputed weather
+windows (dry spells, spray-safe slots, frost nights) for task planning
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, date, timezone
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OPENWEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5"
+
+# Weather changes slowly compared to a conversation; reuse answers for 10 minutes
+WEATHER_CACHE_TTL = 600
+# Locations (per endpoint) kept cached; a long-running worker hears from many villages
+WEATHER_CACHE_MAX_ENTRIES = 512
+WEATHER_REQUEST_TIMEOUT = 10
+# The 5-day forecast is only re-issued every 3 hours
+FORECAST_CACHE_TTL = 3 * 3600
+FORECAST_STEP_HOURS = 3
+
+# Wind (m/s) above which spraying drifts and tall crops need checking
+WINDY_SPEED = 5.5
+# Hourly rainfall (mm) treated as heavy rain
+HEAVY_RAIN_MM = 7.5
+# Probability of precipitation below which a forecast slot counts as dry
+DRY_MAX_POP = 0.3
+# Temperature band (°C) in which pesticide/herbicide sprays work and do not scorch
+SPRAY_MIN_TEMP = 10.0
+SPRAY_MAX_TEMP = 32.0
+# Minimum temperature (°C) at or below which a night is a frost risk
+FROST_TEMP = 2.0
+
+
+def normalize_city(city: str) -> str:
+    """Normalize a city name so "Pune", " pune " and "Pune , IN" share a cache entry"""
+    collapsed = " ".join((city or "").lower().split())
+    return ",".join(part.strip() for part in collapsed.split(","))
+
+
+@dataclass(frozen=True)
+class WeatherRecord:
+    """Current conditions for one location, parsed once from the API answer"""
+    city: str
+    description: str
+    condition_id: int
+    condition: str
+    temperature: float
+    feels_like: float
+    humidity: float
+    pressure: float
+    wind_speed: float
+    wind_gust: float
+    rain_1h: float
+    clouds: float
+    observed_at: float
+
+    @classmethod
+    def from_openweather(cls, city: str, data: Dict[str, Any]) -> "WeatherRecord":
+        """Build a record from an OpenWeatherMap /weather response"""
+        condition = (data.get("weather") or [{}])[0]
+        main = data.get("main", {})
+        wind = data.get("wind", {})
+        return cls(
+            city=data.get("name") or city,
+            description=condition.get("description", ""),
+            condition_id=int(condition.get("id", 800)),
+            condition=condition.get("main", ""),
+            temperature=float(main.get("temp", 0.0)),
+            feels_like=float(main.get("feels_like", main.get("temp", 0.0))),
+            humidity=float(main.get("humidity", 0.0)),
+            pressure=float(main.get("pressure", 0.0)),
+            wind_speed=float(wind.get("speed", 0.0)),
+            wind_gust=float(wind.get("gust", wind.get("speed", 0.0))),
+            rain_1h=float(data.get("rain", {}).get("1h", 0.0)),
+            clouds=float(data.get("clouds", {}).get("all", 0.0)),
+            observed_at=float(data.get("dt", time.time()))
+        )
+
+    @property
+    def is_raining(self) -> bool:
+        """Thunderstorm, drizzle or rain condition codes, or measured rainfall"""
+        return self.condition_id // 100 in (2, 3, 5) or self.rain_1h > 0
+
+    @property
+    def is_heavy_rain(self) -> bool:
+        """Heavy rain condition codes or hourly rainfall above HEAVY_RAIN_MM"""
+        return self.rain_1h >= HEAVY_RAIN_MM or self.condition_id in (502, 503, 504, 522, 202, 212)
+
+    @property
+    def is_windy(self) -> bool:
+        """Wind strong enough to cause spray drift"""
+        return self.wind_speed >= WINDY_SPEED
+
+
+@dataclass
+class WeatherWindows:
+    """Precomputed planning windows over a 5-day/3-hour forecast.
+
+    Per-slot arrays are aligned with ``times``; run lengths, next-slot indexes
+    and rain prefix sums are built once so every query is constant time.
+    Queries without an explicit slot start from the current time (``clock``),
+    not from the first forecast slot, so a forecast served from the cache hours
+    after it was fetched never offers a window that has already passed.
+    """
+    city: str
+    times: np.ndarray
+    utc_offset: int
+    temperature: np.ndarray
+    rain_mm: np.ndarray
+    wind_speed: np.ndarray
+    pop: np.ndarray
+    dry: np.ndarray
+    spray_safe: np.ndarray
+    frost: np.ndarray
+    dry_run: np.ndarray
+    next_spray: np.ndarray
+    first_dry_spell: np.ndarray
+    rain_prefix: np.ndarray
+    clock: Callable[[], float] = field(default=time.time, compare=False)
+
+    @classmethod
+    def from_forecast(cls, city: str, data: Dict[str, Any]) -> "WeatherWindows":
+        """Build windows from an OpenWeatherMap /forecast response"""
+        items = data.get("list", [])
+        times = np.array([item.get("dt", 0) for item in items], dtype=np.int64)
+        temperature = np.array([item.get("main", {}).get("temp", 0.0) for item in items], dtype=np.float64)
+        temp_min = np.array([item.get("main", {}).get("temp_min", item.get("main", {}).get("temp", 0.0))
+                             for item in items], dtype=np.float64)
+        rain_mm = np.array([item.get("rain", {}).get("3h", 0.0) + item.get("snow", {}).get("3h", 0.0)
+                            for item in items], dtype=np.float64)
+        wind_speed = np.array([item.get("wind", {}).get("speed", 0.0) for item in items], dtype=np.float64)
+        pop = np.array([item.get("pop", 0.0) for item in items], dtype=np.float64)
+        condition = np.array([(item.get("weather") or [{}])[0].get("id", 800) for item in items], dtype=np.int32)
+
+        wet_code = np.isin(condition // 100, (2, 3, 5, 6))
+        dry = (rain_mm == 0) & (pop < DRY_MAX_POP) & ~wet_code
+        spray_safe = dry & (wind_speed < WINDY_SPEED) & (temperature >= SPRAY_MIN_TEMP) & (temperature <= SPRAY_MAX_TEMP)
+        frost = temp_min <= FROST_TEMP
+
+        # Reverse scans: consecutive dry slots starting at i, next spray-safe slot at/after i
+        count = len(items)
+        dry_run = np.zeros(count + 1, dtype=np.int32)
+        next_spray = np.full(count + 1, -1, dtype=np.int32)
+        for i in range(count - 1, -1, -1):
+            dry_run[i] = dry_run[i + 1] + 1 if dry[i] else 0
+            next_spray[i] = i if spray_safe[i] else next_spray[i + 1]
+
+        # first_dry_spell[k]: first slot starting at least k consecutive dry slots
+        first_dry_spell = np.full(count + 1, -1, dtype=np.int32)
+        for i in range(count - 1, -1, -1):
+            first_dry_spell[1:dry_run[i] + 1] = i
+        first_dry_spell[0] = 0
+
+        return cls(
+            city=data.get("city", {}).get("name") or city,
+            times=times,
+            utc_offset=int(data.get("city", {}).get("timezone", 0)),
+            temperature=temperature,
+            rain_mm=rain_mm,
+            wind_speed=wind_speed,
+            pop=pop,
+            dry=dry,
+            spray_safe=spray_safe,
+            frost=frost,
+            dry_run=dry_run[:count],
+            next_spray=next_spray[:count],
+            first_dry_spell=first_dry_spell,
+            rain_prefix=np.concatenate(([0.0], np.cumsum(rain_mm)))
+        )
+
+    def _slots(self, hours: float) -> int:
+        return int(np.ceil(hours / FORECAST_STEP_HOURS))
+
+    def _local(self, timestamp: float) -> datetime:
+        return datetime.fromtimestamp(int(timestamp) + self.utc_offset, tz=timezone.utc).replace(tzinfo=None)
+
+    def local_time(self, index: int) -> datetime:
+        """Local wall-clock time of a forecast slot"""
+        return self._local(self.times[index])
+
+    def current_slot(self) -> Tuple[int, float]:
+        """Slot covering the current time and the hours of it already elapsed
+        (slot count once the forecast has run out)"""
+        now = self.clock()
+        index = max(0, int(np.searchsorted(self.times, now, side="right")) - 1)
+        if index >= len(self.times) or now >= self.times[index] + FORECAST_STEP_HOURS * 3600:
+            return len(self.times), 0.0
+        return index, max(0.0, (now - float(self.times[index])) / 3600)
+
+    def _start(self, index: int, current: int) -> datetime:
+        """Local start of a window, never earlier than now"""
+        return self._local(self.clock()) if index == current else self.local_time(index)
+
+    def rain_within(self, hours: float, start: Optional[int] = None) -> float:
+        """Forecast rainfall (mm) over the next ``hours`` from slot ``start`` (default now)"""
+        if start is None:
+            start = self.current_slot()[0]
+        end = min(len(self.times), start + self._slots(hours))
+        return float(self.rain_prefix[end] - self.rain_prefix[min(start, end)])
+
+    def dry_hours_from(self, index: Optional[int] = None) -> int:
+        """How long it stays dry from a slot (default now) onwards"""
+        elapsed = 0.0
+        if index is None:
+            index, elapsed = self.current_slot()
+        if index >= len(self.times) or not self.dry_run[index]:
+            return 0
+        return int(self.dry_run[index] * FORECAST_STEP_HOURS - elapsed)
+
+    def next_dry_spell(self, min_hours: float) -> Optional[datetime]:
+        """Start of the first forecast dry spell from now lasting at least ``min_hours``"""
+        current, elapsed = self.current_slot()
+        if current >= len(self.times):
+            return None
+        if self.dry_run[current] * FORECAST_STEP_HOURS - elapsed >= min_hours:
+            return self._start(current, current)
+
+        slots = self._slots(min_hours)
+        if slots >= len(self.first_dry_spell) or self.first_dry_spell[slots] < 0:
+            return None
+        start = int(self.first_dry_spell[slots])
+        if start <= current:
+            # The earliest such spell is already under way; find the next one
+            later = np.flatnonzero(self.dry_run[current + 1:] >= slots)
+            if not later.size:
+                return None
+            start = current + 1 + int(later[0])
+        return self.local_time(start)
+
+    def next_spray_window(self, index: Optional[int] = None) -> Optional[datetime]:
+        """First dry, calm, mild slot at or after ``index`` (default now)"""
+        current = self.current_slot()[0]
+        if index is None:
+            index = current
+        if index >= len(self.times) or self.next_spray[index] < 0:
+            return None
+        return self._start(int(self.next_spray[index]), current)
+
+    def frost_nights(self) -> List[date]:
+        """Dates with a forecast frost risk from now on"""
+        current = self.current_slot()[0]
+        return sorted({self.local_time(current + i).date() for i in np.flatnonzero(self.frost[current:])})
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact overview (from now on) used by task planning responses"""
+        current = self.current_slot()[0]
+        return {
+            "city": self.city,
+            "hours": (len(self.times) - current) * FORECAST_STEP_HOURS,
+            "rain_mm": float(self.rain_prefix[-1] - self.rain_prefix[current]),
+            "dry_now_hours": self.dry_hours_from(),
+            "next_dry_48h": self.next_dry_spell(48),
+            "next_spray_window": self.next_spray_window(),
+            "spray_safe_slots": int(self.spray_safe[current:].sum()),
+            "frost_nights": self.frost_nights()
+        }
+
+
+class WeatherService:
+    """Async OpenWeatherMap client with TTL cache and in-flight request sharing"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = OPENWEATHER_BASE_URL,
+                 ttl: float = WEATHER_CACHE_TTL, forecast_ttl: float = FORECAST_CACHE_TTL,
+                 max_entries: int = WEATHER_CACHE_MAX_ENTRIES):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.ttl = ttl
+        self.forecast_ttl = forecast_ttl
+        self.max_entries = max_entries
+        self.session = None
+        self._session_loop = None
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "requests": 0}
+
+    def get_api_key(self) -> Optional[str]:
+        """API key from the constructor or the environment (read lazily after load_dotenv)"""
+        return self.api_key or os.getenv("OPENWEATHER_API_KEY")
+
+    def is_configured(self) -> bool:
+        """Whether an OpenWeatherMap API key is available"""
+        return bool(self.get_api_key())
+
+    async def get_session(self):
+        """Get or create the pooled aiohttp session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.closed or self._session_loop is not loop:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=WEATHER_REQUEST_TIMEOUT)
+            )
+            self._session_loop = loop
+            self._inflight.clear()
+        return self.session
+
+    async def _request(self, endpoint: str, city: str) -> Dict[str, Any]:
+        """Call one OpenWeatherMap endpoint"""
+        try:
+            session = await self.get_session()
+            params = {"q": city, "appid": self.get_api_key(), "units": "metric"}
+            self.stats["requests"] += 1
+            async with session.get(f"{self.base_url}/{endpoint}", params=params) as response:
+                if response.status == 200:
+                    return {"success": True, "data": await response.json(), "fetched_at": time.time()}
+                return {"success": False, "status": response.status,
+                        "error": f"Weather API returned {response.status}"}
+
+        except Exception as e:
+            logger.error(f"Error calling weather API for {city}: {e}")
+            return {"success": False, "error": str(e)}
+
+    async def _cached_request(self, endpoint: str, city: str, ttl: Optional[float] = None) -> Dict[str, Any]:
+        """Serve from cache, join an in-flight request, or start a new one"""
+        key = (endpoint, normalize_city(city))
+
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            self.stats["hits"] += 1
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        self.stats["misses"] += 1
+        # Create the session before the task so the in-flight map is not reset under it
+        await self.get_session()
+        task = asyncio.ensure_future(self._request(endpoint, city))
+        self._inflight[key] = task
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+        # Only successful answers are cached; failures are retried on the next call
+        if result.get("success"):
+            self._store(key, result, self.ttl if ttl is None else ttl)
+        return result
+
+    def _store(self, key: Tuple[str, str], result: Dict[str, Any], ttl: float):
+        """Cache a result; when full, drop expired entries first, then the oldest ones"""
+        self._cache.pop(key, None)
+        self._cache[key] = (time.monotonic() + ttl, result)
+        if len(self._cache) <= self.max_entries:
+            return
+        now = time.monotonic()
+        for stale in [cached_key for cached_key, (expires_at, _) in self._cache.items() if expires_at <= now]:
+            del self._cache[stale]
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def get_current_weather(self, city: str) -> Dict[str, Any]:
+        """Current conditions for a city; successful results carry a WeatherRecord"""
+        if not self.is_configured():
+            return {"success": False, "error": "Weather API key not configured."}
+
+        result = await self._cached_request("weather", city)
+        if result["success"] and "record" not in result:
+            # Parsed once and kept on the cached result for every later caller
+            result["record"] = WeatherRecord.from_openweather(city, result["data"])
+        return result
+
+    async def get_weather_windows(self, city: str) -> Dict[str, Any]:
+        """5-day forecast for a city; successful results carry precomputed WeatherWindows"""
+        if not self.is_configured():
+            return {"success": False, "error": "Weather API key not configured."}
+
+        result = await self._cached_request("forecast", city, ttl=self.forecast_ttl)
+        if result["success"] and "windows" not in result:
+            result["windows"] = WeatherWindows.from_forecast(city, result["data"])
+        return result
+
+    def clear_cache(self):
+        """Drop all cached weather answers"""
+        self._cache.clear()
+
+    async def close_session(self):
+        """Close aiohttp session"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+            self._session_loop = None
+
+
+# Global weather service instance
+weather_service = None
+
+def get_weather_service() -> WeatherService:
+    """Get or create the global weather service"""
+    global weather_service
+    if weather_service is None:
+        weather_service = WeatherService()
+    return weather_service
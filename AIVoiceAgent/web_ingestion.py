@@ -0,0 +1,271 @@
+"""
+Web Page Ingestion for AI Farm Care Assistant
+Fetches the pages behind high-relevance web search results (asynchronously, with
+size and time limits), stream-parses the HTML down to its main text and stores
+it in the knowledge base (which chunks and batch-embeds it) with its source and
+fetch time, so repeat questions are answered from the local index
+"""
+
+import asyncio
+import codecs
+import hashlib
+import logging
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from rag_system import KnowledgeBase, RAGDocument
+from result_dedup import canonicalize_url
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pages larger than this are cut off (the main text is near the top)
+MAX_PAGE_BYTES = 1_000_000
+# Total seconds allowed per page, connection included
+FETCH_TIMEOUT = 8.0
+MAX_CONCURRENT_FETCHES = 4
+# Only results this relevant (after reranking) are worth storing
+MIN_INGEST_RELEVANCE = 0.5
+MAX_PAGES_PER_SEARCH = 3
+# Pages with less main text than this are navigation or error pages
+MIN_PAGE_TEXT = 300
+# Paragraphs shorter than this are menus, captions or buttons
+MIN_PARAGRAPH_CHARS = 40
+READ_SIZE = 16384
+# Pages found for time-sensitive questions take that category's retention and
+# freshness decay; all other pages are filed under WEB_CATEGORY
+CATEGORY_KEYWORDS = (
+    ("market_data", {"price", "prices", "rate", "rates", "mandi", "bhav", "msp"}),
+    ("weather", {"weather", "forecast", "rain", "rainfall"}),
+)
+WEB_CATEGORY = "web"
+
+# Elements whose text is never part of the article
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer",
+                "aside", "form", "button", "select", "iframe", "figure"}
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "ul", "ol", "table", "tr", "td", "th",
+              "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "br", "dd", "dt"}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class MainTextExtractor(HTMLParser):
+    """Incremental HTML parser that keeps the readable paragraphs of a page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.paragraphs: List[str] = []
+        self._buffer: List[str] = []
+        self._skip_depth = 0
+        self._in_title = False
+        self._in_heading = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == "br":
+                self._flush()
+            return
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            self._in_heading = tag in HEADING_TAGS
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            self._in_heading = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self._buffer.append(data)
+
+    def _flush(self):
+        text = " ".join("".join(self._buffer).split())
+        self._buffer = []
+        # Headings are short but give the following paragraphs their context
+        if len(text) >= MIN_PARAGRAPH_CHARS or (self._in_heading and text):
+            self.paragraphs.append(text)
+
+    def text(self) -> str:
+        """Main text, one paragraph per line"""
+        self._flush()
+        # Drop trailing headings that introduce nothing
+        while self.paragraphs and len(self.paragraphs[-1]) < MIN_PARAGRAPH_CHARS:
+            self.paragraphs.pop()
+        return "\n".join(self.paragraphs)
+
+
+def extract_main_text(html: str) -> Dict[str, str]:
+    """Title and main text of a complete HTML document"""
+    parser = MainTextExtractor()
+    parser.feed(html)
+    parser.close()
+    return {"title": " ".join(parser.title.split()), "text": parser.text()}
+
+
+def page_id(url: str) -> str:
+    """Stable document id for a page"""
+    return "web_" + hashlib.sha1(canonicalize_url(url).encode("utf-8")).hexdigest()[:16]
+
+
+def page_category(query: str, title: str = "") -> str:
+    """Knowledge base category of a page, from the question that found it and its title"""
+    words = set(re.findall(r"[a-z]+", f"{query} {title}".lower()))
+    for category, keywords in CATEGORY_KEYWORDS:
+        if words & keywords:
+            return category
+    return WEB_CATEGORY
+
+
+class WebIngestionPipeline:
+    """Fetch, extract and store web pages in the knowledge base"""
+
+    def __init__(self, knowledge_base: KnowledgeBase, max_bytes: int = MAX_PAGE_BYTES,
+                 timeout: float = FETCH_TIMEOUT, min_relevance: float = MIN_INGEST_RELEVANCE):
+        self.knowledge_base = knowledge_base
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.min_relevance = min_relevance
+        self.session = None
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+        # Pages selected and still being fetched; failures can be picked again later
+        self._pending: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {"fetched": 0, "failed": 0, "skipped": 0, "stored": 0}
+
+    async def get_session(self):
+        """Get or create the aiohttp session"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": "Mozilla/5.0 (compatible; AgroMitraBot/1.0)"},
+            )
+        return self.session
+
+    async def fetch_page(self, url: str) -> Optional[Dict[str, str]]:
+        """Stream a page into the extractor; None if it fails, is not HTML or has no main text"""
+        parser = MainTextExtractor()
+        error = None
+        try:
+            session = await self.get_session()
+            async with self._semaphore, session.get(url) as response:
+                if response.status != 200 or "html" not in response.headers.get("Content-Type", ""):
+                    self.stats["skipped"] += 1
+                    return None
+                decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="replace")
+                received = 0
+                async for block in response.content.iter_chunked(READ_SIZE):
+                    block = block[:self.max_bytes - received]
+                    received += len(block)
+                    parser.feed(decoder.decode(block))
+                    if received >= self.max_bytes:
+                        logger.info(f"Page {url} cut off at {self.max_bytes} bytes")
+                        break
+                parser.feed(decoder.decode(b"", final=True))
+        except (asyncio.TimeoutError, aiohttp.ClientError, LookupError) as e:
+            # Whatever arrived before a timeout is still usable
+            error = e
+        parser.close()
+        text = parser.text()
+        if len(text) < MIN_PAGE_TEXT:
+            if error is not None:
+                self.stats["failed"] += 1
+                logger.warning(f"Could not fetch {url}: {error.__class__.__name__} {error}")
+            return None
+        self.stats["fetched"] += 1
+        return {"title": " ".join(parser.title.split()), "text": text}
+
+    def select(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """High-relevance results whose pages are not stored yet"""
+        selected = []
+        for result in sorted(results, key=lambda r: r.get("relevance_score", 0), reverse=True):
+            url = result.get("url", "")
+            if not url.startswith(("http://", "https://")) or result.get("relevance_score", 0) < self.min_relevance:
+                continue
+            doc_id = page_id(url)
+            if doc_id in self._pending or self.knowledge_base.has_document(doc_id):
+                continue
+            self._pending.add(doc_id)
+            selected.append(result)
+            if len(selected) >= MAX_PAGES_PER_SEARCH:
+                break
+        return selected
+
+    async def ingest_page(self, result: Dict[str, Any], query: str = "") -> bool:
+        """Fetch one result's page and store it; returns whether it was stored"""
+        url = result["url"]
+        try:
+            return await self._ingest_page(url, result, query)
+        finally:
+            self._pending.discard(page_id(url))
+
+    async def _ingest_page(self, url: str, result: Dict[str, Any], query: str) -> bool:
+        page = await self.fetch_page(url)
+        if page is None:
+            return False
+
+        fetched_at = datetime.now()
+        title = page["title"] or result.get("title", "")
+        document = RAGDocument(
+            id=page_id(url),
+            content=page["text"],
+            metadata={
+                "url": url,
+                "title": title,
+                "summary": title,
+                "query": query,
+                "fetched_at": fetched_at.isoformat(),
+                "type": "web_page",
+            },
+            timestamp=fetched_at,
+            source=f"web:{urlsplit(url).hostname or ''}",
+            category=page_category(query, title),
+        )
+        stored = await self.knowledge_base.add_document(document)
+        if stored:
+            self.stats["stored"] += 1
+            logger.info(f"Ingested {url}")
+        return stored
+
+    async def ingest_results(self, results: List[Dict[str, Any]], query: str = "") -> int:
+        """Ingest the best new pages of a search; returns the number of pages stored"""
+        selected = self.select(results)
+        if not selected:
+            return 0
+        stored = await asyncio.gather(*(self.ingest_page(result, query) for result in selected),
+                                      return_exceptions=True)
+        for result, outcome in zip(selected, stored):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error ingesting {result['url']}: {outcome}")
+        return sum(1 for outcome in stored if outcome is True)
+
+    def schedule(self, results: List[Dict[str, Any]], query: str = ""):
+        """Ingest in the background so the voice answer is not delayed"""
+        if not any(result.get("relevance_score", 0) >= self.min_relevance for result in results):
+            return
+        task = asyncio.create_task(self.ingest_results(results, query))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close_session(self):
+        """Cancel pending ingestion and close the aiohttp session"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self.session:
+            await self.session.close()
+            self.session = None
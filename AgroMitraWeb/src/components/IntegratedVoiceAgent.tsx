@@ -482,6 +482,21 @@ function LiveKitAgentInterface({
       const data = JSON.parse(new TextDecoder().decode(message.payload));
       console.log('📦 Received LiveKit data:', data);
 
+      // Farm data RPC from the agent: reply with the farms saved on the My Farm page
+      if (data.type === 'farm_data_request') {
+        const storedFarms = JSON.parse(localStorage.getItem('aifarmcare_farms') || '[]');
+        const reply = {
+          type: 'farm_data_response',
+          request_id: data.request_id,
+          action: data.action,
+          // Images are too large for a data packet and not needed by the agent
+          farms: storedFarms.map(({ farmImage, ...farm }: any) => farm),
+          selected_farm_id: localStorage.getItem('aifarmcare_selected_farm'),
+        };
+        room.localParticipant.publishData(new TextEncoder().encode(JSON.stringify(reply)), { reliable: true, topic: 'farm_data' });
+        return;
+      }
+
       // HARDCODED URL MAPPING - EXACT URLS YOU WANT!
       const HARDCODED_URLS = {
         'tasks': 'http://localhost:3000/tasks',